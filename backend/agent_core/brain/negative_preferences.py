@@ -0,0 +1,142 @@
+# FILE: agent_core/brain/negative_preferences.py
+# Per-user matrices of dismissed-nudge embeddings for the feedback penalty.
+
+import time
+import logging
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set, Tuple
+from uuid import UUID
+
+import numpy as np
+from sqlmodel import Session
+
+from data import crm as crm_service
+from data.vector import has_embedding
+from agent_core.similarity import cosine, normalize, normalize_rows, one_to_many
+
+FEEDBACK_PENALTY_THRESHOLD = 0.85
+# How long a cached matrix is trusted before re-checking the user's preference
+# version in the database; writes made in this process invalidate it at once.
+VERSION_CHECK_INTERVAL_SECONDS = 30
+# Per-user matrices kept in memory; the least recently used is evicted first.
+MAX_CACHED_USERS = 256
+# Similarities from the batched product this close to the threshold are
+# re-checked pair by pair, so batching never changes the penalty decision.
+_SIMILARITY_GUARD = 1e-5
+
+
+class NegativePreferenceMatrix:
+    """
+    All of a user's dismissed embeddings as one unit-normalized float32 matrix,
+    rows grouped by client with an offset table. `penalized_clients` checks every
+    client with one matrix-vector product; `is_penalized` checks one client's
+    slice. Both agree exactly with comparing each dismissed embedding through
+    similarity.cosine against FEEDBACK_PENALTY_THRESHOLD.
+    """
+
+    def __init__(self, rows: List[Tuple[UUID, np.ndarray]]):
+        usable = [(client_id, np.asarray(embedding)) for client_id, embedding in rows if has_embedding(embedding)]
+        widths: Dict[int, int] = {}
+        for _, embedding in usable:
+            widths[embedding.shape[0]] = widths.get(embedding.shape[0], 0) + 1
+        self.dimension: Optional[int] = max(widths, key=widths.get) if widths else None
+
+        # Vectors of another width can still match a resource of that width; they are checked one by one.
+        self.stragglers: Dict[UUID, List[np.ndarray]] = {}
+        by_client: "OrderedDict[UUID, List[np.ndarray]]" = OrderedDict()
+        for client_id, embedding in usable:
+            if embedding.ndim != 1 or embedding.shape[0] != self.dimension:
+                self.stragglers.setdefault(client_id, []).append(embedding)
+            elif np.linalg.norm(embedding) > 0:
+                by_client.setdefault(client_id, []).append(embedding)
+
+        self.client_ids: List[UUID] = list(by_client)
+        self.offsets: Dict[UUID, Tuple[int, int]] = {}
+        vectors, owners = [], []
+        for index, (client_id, embeddings) in enumerate(by_client.items()):
+            self.offsets[client_id] = (len(vectors), len(vectors) + len(embeddings))
+            vectors.extend(embeddings)
+            owners.extend([index] * len(embeddings))
+
+        self.raw = vectors
+        self.unit = normalize_rows(vectors, dimension=self.dimension or 0)
+        self.owners = np.array(owners, dtype=np.intp)
+
+    def __len__(self) -> int:
+        return len(self.raw) + sum(len(embeddings) for embeddings in self.stragglers.values())
+
+    def _unit_resource(self, resource_embedding) -> Optional[np.ndarray]:
+        unit_resource = normalize(resource_embedding)
+        if unit_resource is None or unit_resource.shape[0] != self.dimension:
+            return None
+        return unit_resource
+
+    def _hits(self, start: int, end: int, resource_embedding, unit_resource: np.ndarray) -> np.ndarray:
+        """Rows in [start, end) above the threshold, with near-threshold rows settled exactly."""
+        similarity = one_to_many(unit_resource, self.unit[start:end])
+        hits = similarity > FEEDBACK_PENALTY_THRESHOLD
+        for row in np.flatnonzero(np.abs(similarity - FEEDBACK_PENALTY_THRESHOLD) <= _SIMILARITY_GUARD):
+            hits[row] = cosine(resource_embedding, self.raw[start + row]) > FEEDBACK_PENALTY_THRESHOLD
+        return hits
+
+    def _straggler_hit(self, client_id: UUID, resource_embedding) -> bool:
+        return any(
+            cosine(resource_embedding, embedding) > FEEDBACK_PENALTY_THRESHOLD
+            for embedding in self.stragglers.get(client_id, [])
+        )
+
+    def is_penalized(self, client_id: UUID, resource_embedding) -> bool:
+        """True if the resource resembles something this client's nudges were dismissed for."""
+        if client_id in self.offsets:
+            unit_resource = self._unit_resource(resource_embedding)
+            if unit_resource is not None:
+                start, end = self.offsets[client_id]
+                if self._hits(start, end, resource_embedding, unit_resource).any():
+                    return True
+        return self._straggler_hit(client_id, resource_embedding)
+
+    def penalized_clients(self, resource_embedding) -> Set[UUID]:
+        """The IDs of every client the resource would be penalized for, from one batched product."""
+        penalized: Set[UUID] = set()
+        unit_resource = self._unit_resource(resource_embedding)
+        if unit_resource is not None and self.owners.size:
+            hits = self._hits(0, len(self.raw), resource_embedding, unit_resource)
+            hit_owners = np.bincount(self.owners, weights=hits.astype(np.float64), minlength=len(self.client_ids)) > 0
+            penalized.update(self.client_ids[index] for index in np.flatnonzero(hit_owners))
+        penalized.update(client_id for client_id in self.stragglers if self._straggler_hit(client_id, resource_embedding))
+        return penalized
+
+
+# user_id -> (preference version, matrix, monotonic time the version was last checked)
+_cache: "OrderedDict[UUID, Tuple[tuple, NegativePreferenceMatrix, float]]" = OrderedDict()
+
+
+def get_matrix_for_user(user_id: UUID, session: Session) -> NegativePreferenceMatrix:
+    """
+    Returns the user's dismissed-embedding matrix, rebuilding it only when the
+    user's negative preferences changed. The version check is one aggregate
+    query, made at most every VERSION_CHECK_INTERVAL_SECONDS.
+    """
+    cached = _cache.get(user_id)
+    now = time.monotonic()
+    if cached is not None and now - cached[2] <= VERSION_CHECK_INTERVAL_SECONDS:
+        _cache.move_to_end(user_id)
+        return cached[1]
+
+    version = crm_service.get_negative_preference_version(user_id, session)
+    if cached is not None and cached[0] == version:
+        matrix = cached[1]
+    else:
+        matrix = NegativePreferenceMatrix(crm_service.get_negative_preferences_for_user(user_id, session))
+        logging.info(f"NEGATIVE_PREFERENCES: Built matrix for user {user_id} with {len(matrix)} dismissed embeddings.")
+
+    _cache[user_id] = (version, matrix, now)
+    _cache.move_to_end(user_id)
+    while len(_cache) > MAX_CACHED_USERS:
+        _cache.popitem(last=False)
+    return matrix
+
+
+def invalidate_user(user_id: UUID) -> None:
+    """Drops the user's cached matrix; called when a negative preference is written."""
+    _cache.pop(user_id, None)
@@ -3,6 +3,7 @@
 
 import uuid
 import asyncio
+import hashlib
 import logging
 from datetime import datetime, timezone
 from typing import Dict, Any, List, Optional, Tuple
@@ -18,14 +19,44 @@ from data import crm as crm_service
 from agent_core.agents import conversation as conversation_agent
 from agent_core import llm_client
 from .verticals import VERTICAL_CONFIGS
-from .nudge_engine_utils import calculate_cosine_similarity
+from . import negative_preferences
 
 # --- [UNCHANGED] Constants ---
 MATCH_THRESHOLD = 25
-FEEDBACK_PENALTY_THRESHOLD = 0.85
 FEEDBACK_PENALTY_FACTOR = 0.1
 
 # --- [NEW] Reusable Scoring Primitive ---
+async def _get_resource_embedding(resource: Resource, session: Optional[Session] = None) -> Optional[List[float]]:
+    """
+    Embeds a property's public remarks; other resource types have no embedding.
+    Embeddings are cached per (entity_id, remarks hash), so a listing costs one
+    embedding API call no matter how many clients or pipeline runs score it.
+    """
+    if resource.resource_type != "property" or not resource.attributes.get('PublicRemarks'):
+        return None
+
+    remarks = resource.attributes['PublicRemarks']
+    if not resource.entity_id:
+        return await llm_client.generate_embedding(remarks)
+
+    remarks_hash = hashlib.sha256(remarks.encode("utf-8")).hexdigest()
+    cached_embedding = crm_service.get_listing_embedding(resource.entity_id, remarks_hash, session)
+    if cached_embedding is not None:
+        return cached_embedding
+
+    embedding = await llm_client.generate_embedding(remarks)
+    # A zero vector means the embedding call failed; don't pin that result in the cache.
+    if embedding and any(embedding):
+        crm_service.save_listing_embedding(resource.entity_id, remarks_hash, embedding)
+    return embedding
+
+def _apply_feedback_penalty(score: int, reasons: List[str], is_penalized: bool) -> int:
+    """Down-weights a score if the resource resembles a nudge the user dismissed for this client."""
+    if is_penalized:
+        score *= FEEDBACK_PENALTY_FACTOR
+        reasons.append("🎯 Penalized: Similar to a previously dismissed nudge.")
+    return score
+
 async def score_event_against_client(
     client: Client,
     event: MarketEvent,
@@ -42,26 +73,80 @@ async def score_event_against_client(
         return 0, []
 
     # 1. Get base score from vertical-specific logic
-    resource_embedding = None
-    if resource.resource_type == "property" and resource.attributes.get('PublicRemarks'):
-        resource_embedding = await llm_client.generate_embedding(resource.attributes['PublicRemarks'])
+    resource_embedding = await _get_resource_embedding(resource, session)
     
     score, reasons = scorer_function(client, event, resource_embedding, vertical_config)
 
     # 2. Apply penalty if the nudge is similar to a previously dismissed one
     if resource_embedding:
-        negative_preferences = crm_service.get_negative_preferences(client_id=client.id, session=session)
-        if negative_preferences:
-            is_penalized = any(
-                calculate_cosine_similarity(resource_embedding, dismissed_embedding) > FEEDBACK_PENALTY_THRESHOLD
-                for dismissed_embedding in negative_preferences
-            )
-            if is_penalized:
-                score *= FEEDBACK_PENALTY_FACTOR
-                reasons.append("🎯 Penalized: Similar to a previously dismissed nudge.")
+        preference_matrix = negative_preferences.get_matrix_for_user(client.user_id, session)
+        score = _apply_feedback_penalty(score, reasons, preference_matrix.is_penalized(client.id, resource_embedding))
     
     return score, reasons
 
+async def score_event_against_clients(
+    clients: List[Client],
+    event: MarketEvent,
+    resource: Resource,
+    vertical_config: dict,
+    session: Session
+) -> List[Tuple[int, List[str]]]:
+    """
+    Batch version of score_event_against_client. Embeds the resource once,
+    scores every client in a single vectorized pass when the vertical provides
+    a client matrix, and checks negative preferences with one matrix product
+    per user.
+    Results are aligned with `clients` and identical to the per-client scorer.
+    """
+    scorer_function = vertical_config.get("scorer")
+    if not scorer_function or not clients:
+        return [(0, []) for _ in clients]
+
+    resource_embedding = await _get_resource_embedding(resource, session)
+
+    client_matrix_class = vertical_config.get("client_matrix")
+    if client_matrix_class:
+        results = client_matrix_class(clients, vertical_config).score_event(event, resource_embedding)
+    else:
+        results = [scorer_function(client, event, resource_embedding, vertical_config) for client in clients]
+
+    if resource_embedding:
+        penalized_client_ids = set()
+        for user_id in {client.user_id for client in clients}:
+            preference_matrix = negative_preferences.get_matrix_for_user(user_id, session)
+            penalized_client_ids |= preference_matrix.penalized_clients(resource_embedding)
+        _apply_feedback_penalties(clients, results, penalized_client_ids)
+
+    return results
+
+def _apply_feedback_penalties(clients: List[Client], results: List[Tuple[int, List[str]]], penalized_client_ids: set) -> None:
+    """Applies _apply_feedback_penalty in place to the batch results aligned with `clients`."""
+    for i, client in enumerate(clients):
+        if client.id in penalized_client_ids:
+            score, reasons = results[i]
+            results[i] = (_apply_feedback_penalty(score, reasons, True), reasons)
+
+def _score_candidates(clients: List[Client], events: List[MarketEvent], resource_embeddings: List[Optional[List[float]]], vertical_config: dict) -> List[Tuple[List[Client], List[Tuple[int, List[str]]]]]:
+    """
+    Scores each event against the clients it could match, returning the
+    (candidates, results) pair per event. With a client matrix, clients the
+    listing knocks out (over budget, too few beds or baths, wrong role for the
+    event) are dropped by index lookup before any scoring; they can only score
+    0, below MATCH_THRESHOLD. Without one every client is scored.
+    """
+    client_matrix_class = vertical_config.get("client_matrix")
+    if client_matrix_class:
+        client_matrix = client_matrix_class(clients, vertical_config)
+        rows_by_event = [client_matrix.candidate_rows(event) for event in events]
+        batch_results = client_matrix.score_events(events, resource_embeddings, rows_by_event=rows_by_event)
+        return [([clients[row] for row in rows], results) for rows, results in zip(rows_by_event, batch_results)]
+
+    scorer_function = vertical_config["scorer"]
+    return [
+        (clients, [scorer_function(client, event, resource_embedding, vertical_config) for client in clients])
+        for event, resource_embedding in zip(events, resource_embeddings)
+    ]
+
 # --- [NEW] Logic for the Proactive Pipeline ---
 async def find_best_match_for_event(event: MarketEvent, user: User, resource: Resource, db_session: Session) -> None:
     """
@@ -72,17 +157,94 @@ async def find_best_match_for_event(event: MarketEvent, user: User, resource: Re
     if not vertical_config:
         return
 
-    all_clients = crm_service.get_all_clients(user_id=user.id, session=db_session)
+    all_clients = crm_service.get_all_clients(user_id=user.id, session=db_session, include_embeddings=True)
     if not all_clients:
         return
 
-    scored_clients = []
-    for client in all_clients:
-        # Prevent creating a nudge if one already exists for this client/resource pair
-        if crm_service.does_nudge_exist_for_client_and_resource(client.id, resource.id, db_session, event.event_type):
-            continue
+    # Prevent creating a nudge if one already exists for this client/resource pair
+    nudged_client_ids = crm_service.get_client_ids_with_nudge_for_resource(resource.id, event.event_type, db_session)
+    unnudged_clients = [client for client in all_clients if str(client.id) not in nudged_client_ids]
+    if not unnudged_clients or not vertical_config.get("scorer"):
+        return
+
+    resource_embedding = await _get_resource_embedding(resource, db_session)
+    [(candidates, results)] = _score_candidates(unnudged_clients, [event], [resource_embedding], vertical_config)
+    if resource_embedding:
+        preference_matrix = negative_preferences.get_matrix_for_user(user.id, db_session)
+        _apply_feedback_penalties(candidates, results, preference_matrix.penalized_clients(resource_embedding))
+    await _create_campaign_for_best_match(event, user, resource, candidates, results, db_session)
+
+async def find_best_matches_for_events(events: List[MarketEvent], user: User, db_session: Session) -> List[MarketEvent]:
+    """
+    Batch version of find_best_match_for_event for one user's events. The
+    user's clients, their negative preferences, the events' resources and the
+    existing nudges are each loaded with one query, and the client matrix is
+    built once and scores each event's surviving candidates. Returns the events that had a
+    resource and were scored.
+
+    Each event's nudge is created inside its own savepoint, so a failure rolls
+    back only that event's writes. Every returned event has its status set to
+    "processed" or "error"; the caller commits.
+    """
+    resources_by_entity_id = crm_service.get_resources_by_entity_ids([event.entity_id for event in events], db_session)
+    scorable = [
+        (event, resources_by_entity_id[str(event.entity_id)])
+        for event in events if event.entity_id and str(event.entity_id) in resources_by_entity_id
+    ]
+
+    vertical_config = VERTICAL_CONFIGS.get(user.vertical, {})
+    scorer_function = vertical_config.get("scorer")
+    scorable_events = [event for event, _ in scorable]
+    if not scorer_function or not scorable:
+        return _mark_events(scorable_events, "processed", db_session)
 
-        score, reasons = await score_event_against_client(client, event, resource, vertical_config, db_session)
+    all_clients = crm_service.get_all_clients(user_id=user.id, session=db_session, include_embeddings=True)
+    if not all_clients:
+        return _mark_events(scorable_events, "processed", db_session)
+
+    # Embedded concurrently so llm_client's micro-batcher merges the cache misses into one request.
+    resource_embeddings = await asyncio.gather(*(_get_resource_embedding(resource, db_session) for _, resource in scorable))
+
+    scored_by_event = _score_candidates(all_clients, scorable_events, resource_embeddings, vertical_config)
+
+    preference_matrix = negative_preferences.get_matrix_for_user(user.id, db_session)
+    nudged_by_resource = crm_service.get_client_ids_with_nudge_for_resources([resource.id for _, resource in scorable], db_session)
+
+    for (event, resource), resource_embedding, (scored_clients, results) in zip(scorable, resource_embeddings, scored_by_event):
+        try:
+            with db_session.begin_nested():
+                if resource_embedding:
+                    _apply_feedback_penalties(scored_clients, results, preference_matrix.penalized_clients(resource_embedding))
+
+                # Prevent creating a nudge if one already exists for this client/resource pair
+                nudged_client_ids = nudged_by_resource.get((resource.id, event.event_type), set())
+                candidates, candidate_results = [], []
+                for client, result in zip(scored_clients, results):
+                    if str(client.id) not in nudged_client_ids:
+                        candidates.append(client)
+                        candidate_results.append(result)
+                await _create_campaign_for_best_match(event, user, resource, candidates, candidate_results, db_session)
+            _mark_events([event], "processed", db_session)
+        except Exception as e:
+            logging.error(f"NUDGE_ENGINE: Failed to create a nudge for event {event.id}: {e}", exc_info=True)
+            _mark_events([event], "error", db_session)
+
+    logging.info(f"NUDGE_ENGINE: Scored {len(scorable)} events against {len(all_clients)} clients for user {user.id}.")
+    return scorable_events
+
+def _mark_events(events: List[MarketEvent], status: str, db_session: Session) -> List[MarketEvent]:
+    for event in events:
+        event.status = status
+        db_session.add(event)
+    return events
+
+async def _create_campaign_for_best_match(event: MarketEvent, user: User, resource: Resource, candidates: List[Client], results: List[Tuple[int, List[str]]], db_session: Session) -> None:
+    """
+    Ranks the scored candidates for an event and creates one nudge for the best
+    match, adding the other clients above MATCH_THRESHOLD to its audience.
+    """
+    scored_clients = []
+    for client, (score, reasons) in zip(candidates, results):
         if score >= MATCH_THRESHOLD:
             # Use a timezone-aware min datetime if last_interaction is None
             last_interaction_ts = client.last_interaction or datetime.min.replace(tzinfo=timezone.utc)
@@ -202,6 +364,7 @@ async def _create_campaign_from_event(event: MarketEvent, user: User, resource:
         source=source # Add the source of creation
     )
     db_session.add(new_briefing)
+    crm_service.set_campaign_audience(new_briefing, db_session)
     logging.info(f"NUDGE_ENGINE: Successfully created CampaignBriefing {new_briefing.id} for event {event.id}.")
 
 # --- [REMOVED IN THIS VERSION] ---
@@ -3,19 +3,15 @@
 # nudge engine and can be safely imported by any module without causing
 # circular dependencies.
 
-import numpy as np
 from typing import List
 
+from agent_core.similarity import cosine
+
 def calculate_cosine_similarity(vec1: List[float], vec2: List[float]) -> float:
     """
     Calculates the cosine similarity between two vectors.
-    This is a generic mathematical utility.
+    This is a generic mathematical utility. Accepts lists or the float32
+    arrays embeddings are read back from the database as. Kept for callers
+    that score one pair; batches should use agent_core.similarity directly.
     """
-    if not isinstance(vec1, list) or not isinstance(vec2, list) or not vec1 or not vec2:
-        return 0.0
-    v1 = np.array(vec1)
-    v2 = np.array(vec2)
-    if v1.shape != v2.shape or np.linalg.norm(v1) == 0 or np.linalg.norm(v2) == 0:
-        return 0.0
-    return np.dot(v1, v2) / (np.linalg.norm(v1) * np.linalg.norm(v2))
-
+    return cosine(vec1, vec2)
@@ -4,12 +4,17 @@
 
 import logging
 import re
-from typing import Dict, Any, List, Optional
+from collections import Counter
+from typing import Dict, Any, List, Optional, Set, Tuple
+
+import numpy as np
 
 from data.models.event import MarketEvent
 from data.models.resource import Resource
 from data.models.client import Client
-from agent_core.brain.nudge_engine_utils import calculate_cosine_similarity
+from agent_core.similarity import cosine, normalize, normalize_rows, one_to_many, many_to_many
+from agent_core.term_index import TermIndex
+from data.vector import has_embedding
 
 # --- Intel Builders (No Change) ---
 def _build_price_drop_intel(event: MarketEvent, resource: Resource) -> Dict[str, Any]:
@@ -24,12 +29,96 @@ def _build_simple_intel(event: MarketEvent, resource: Resource) -> Dict[str, Any
 def _build_status_intel(event: MarketEvent, resource: Resource, status: str) -> Dict[str, Any]:
     return {"Last Price": f"${event.payload.get('ListPrice', 0):,.0f}", "Status": status, "Address": resource.attributes.get('UnparsedAddress', 'N/A')}
 
+# --- Client Profile Helpers (shared by the per-client and batch scorers) ---
+
+def _get_client_role(client: Client, config: Dict) -> str:
+    """Resolves a client's role from their user tags. Investor wins over seller."""
+    if config["roles"]["investor"]["identifier_tag"] in client.user_tags:
+        return "investor"
+    if config["roles"]["seller"]["identifier_tag"] in client.user_tags:
+        return "seller"
+    return "buyer"
+
+def _resolve_max_budget(client: Client, client_prefs: Dict[str, Any]) -> Optional[int]:
+    """
+    Finds a client's max budget, preferring structured preferences and falling
+    back to parsing the free-text notes.
+    """
+    max_budget = None
+
+    budget_pref = client_prefs.get('budget_max')
+    if budget_pref is not None and str(budget_pref).strip():
+        try:
+            max_budget = int(float(budget_pref))
+        except (ValueError, TypeError):
+            logging.warning(f"NUDGE_ENGINE (VALIDATION): Could not parse budget from preferences for client {client.id}. Value: {budget_pref}")
+
+    if max_budget is None and client.notes:
+        try:
+            # This regex looks for "max budget", "budget", etc., followed by a number.
+            match = re.search(r'(?:max budget|budget|price)\s*:?\s*\$?\s*([\d,]{4,})', client.notes, re.IGNORECASE)
+            if match:
+                max_budget = int(match.group(1).replace(',', ''))
+                logging.info(f"NUDGE_ENGINE (NOTES PARSE): Extracted max budget ${max_budget:,} from notes for client {client.id}.")
+        except (ValueError, TypeError) as e:
+            logging.error(f"NUDGE_ENGINE (NOTES PARSE): Failed to parse budget from notes for client {client.id}. Error: {e}")
+
+    return max_budget
+
+# Bump when build_scoring_profile derives anything differently; older stored profiles are then ignored.
+SCORING_PROFILE_VERSION = 2
+
+def build_scoring_profile(client: Client, config: Dict) -> Optional[Dict[str, Any]]:
+    """
+    Derives everything the scorer needs from a client's tags, preferences and
+    notes, so scoring an event does no text parsing: role, max budget, minimum
+    beds/baths and lowercased locations and keywords. Stored on the client
+    whenever those fields change (see crm.refresh_client_scoring_profile).
+    Returns None for clients whose data the scorer has to handle live, e.g.
+    malformed preference types.
+    """
+    try:
+        client_prefs = client.preferences or {}
+        client_role = _get_client_role(client, config)
+        profile = {
+            "version": SCORING_PROFILE_VERSION,
+            "role": client_role,
+            "max_budget": None, "min_beds": None, "min_baths": None,
+            "data_error": False, "feature_min_beds": 0,
+        }
+
+        if client_role in ["buyer", "investor"]:
+            profile["max_budget"] = _resolve_max_budget(client, client_prefs)
+            try:
+                profile["min_beds"] = int(float(client_prefs.get('min_bedrooms'))) if client_prefs.get('min_bedrooms') else None
+                profile["min_baths"] = int(float(client_prefs.get('min_bathrooms'))) if client_prefs.get('min_bathrooms') else None
+            except (ValueError, TypeError):
+                profile["data_error"] = True
+
+        if client_role == "buyer" and not profile["data_error"]:
+            profile["feature_min_beds"] = int(client_prefs.get('min_bedrooms', 0))
+
+        profile["locations"] = [str(loc).lower() for loc in client_prefs.get('locations', [])]
+        keywords = client_prefs.get('keywords', [])
+        profile["keywords"] = [[kw, kw.lower()] for kw in keywords] if keywords else []
+        return profile
+    except Exception:
+        return None
+
+def _scoring_profile(client: Client, config: Dict) -> Optional[Dict[str, Any]]:
+    """The client's stored scoring profile if it is current, otherwise one derived now."""
+    profile = getattr(client, "scoring_profile", None)
+    if profile and profile.get("version") == SCORING_PROFILE_VERSION:
+        return profile
+    return build_scoring_profile(client, config)
+
 # --- Real Estate Specific Scoring Function ---
 
 def score_real_estate_event(client: Client, event: MarketEvent, resource_embedding: Optional[List[float]], config: Dict) -> tuple[int, list[str]]:
     """
     MODIFIED: Contains all scoring logic, now robustly checks for budget in
-    both structured preferences and unstructured notes.
+    both structured preferences and unstructured notes. Client-side values come
+    from the precomputed scoring profile; clients without one are parsed live.
     """
     total_score = 0
     reasons = []
@@ -37,42 +126,29 @@ def score_real_estate_event(client: Client, event: MarketEvent, resource_embeddi
     client_prefs = client.preferences or {}
     resource_payload = event.payload
     event_type = event.event_type
+    profile = _scoring_profile(client, config)
 
-    client_role = "buyer"
-    if config["roles"]["investor"]["identifier_tag"] in client.user_tags:
-        client_role = "investor"
-    elif config["roles"]["seller"]["identifier_tag"] in client.user_tags:
-        client_role = "seller"
+    client_role = profile["role"] if profile else _get_client_role(client, config)
 
     # --- FINAL FIX: Robust Knockout Criteria with Notes Parsing ---
     if client_role in ["buyer", "investor"]:
-        max_budget = None
-        
-        # Step 1: Try to get budget from structured preferences first.
-        budget_pref = client_prefs.get('budget_max')
-        if budget_pref is not None and str(budget_pref).strip():
-            try:
-                max_budget = int(float(budget_pref))
-            except (ValueError, TypeError):
-                logging.warning(f"NUDGE_ENGINE (VALIDATION): Could not parse budget from preferences for client {client.id}. Value: {budget_pref}")
-        
-        # Step 2: If no budget in preferences, try to parse it from notes.
-        if max_budget is None and client.notes:
-            try:
-                # This regex looks for "max budget", "budget", etc., followed by a number.
-                match = re.search(r'(?:max budget|budget|price)\s*[:\$]?\s*(\d{4,})', client.notes, re.IGNORECASE)
-                if match:
-                    max_budget = int(match.group(1))
-                    logging.info(f"NUDGE_ENGINE (NOTES PARSE): Extracted max budget ${max_budget:,} from notes for client {client.id}.")
-            except (ValueError, TypeError) as e:
-                logging.error(f"NUDGE_ENGINE (NOTES PARSE): Failed to parse budget from notes for client {client.id}. Error: {e}")
+        # Steps 1 & 2: Budget from structured preferences, falling back to notes.
+        max_budget = profile["max_budget"] if profile else _resolve_max_budget(client, client_prefs)
 
         # Step 3: Now, perform the knockout check with whatever budget was found.
         try:
+            if profile and profile["data_error"]:
+                raise ValueError("unparseable minimum beds/baths in client preferences")
             list_price = int(float(resource_payload.get('ListPrice'))) if resource_payload.get('ListPrice') is not None else None
-            min_beds = int(float(client_prefs.get('min_bedrooms'))) if client_prefs.get('min_bedrooms') else None
+            if profile:
+                min_beds = profile["min_beds"]
+            else:
+                min_beds = int(float(client_prefs.get('min_bedrooms'))) if client_prefs.get('min_bedrooms') else None
             resource_beds = int(float(resource_payload.get('BedroomsTotal'))) if resource_payload.get('BedroomsTotal') is not None else None
-            min_baths = int(float(client_prefs.get('min_bathrooms'))) if client_prefs.get('min_bathrooms') else None
+            if profile:
+                min_baths = profile["min_baths"]
+            else:
+                min_baths = int(float(client_prefs.get('min_bathrooms'))) if client_prefs.get('min_bathrooms') else None
             resource_baths = int(float(resource_payload.get('BathroomsTotalInteger'))) if resource_payload.get('BathroomsTotalInteger') is not None else None
         except (ValueError, TypeError) as e:
             logging.error(f"NUDGE_ENGINE (VALIDATION): Could not parse data for scoring. Client: {client.id}. Error: {e}")
@@ -92,16 +168,29 @@ def score_real_estate_event(client: Client, event: MarketEvent, resource_embeddi
     # --- END OF FIX ---
     
     combined_remarks = f"{resource_payload.get('PublicRemarks', '')} {resource_payload.get('PrivateRemarks', '')}".strip()
+
+    def client_locations() -> List[str]:
+        return profile["locations"] if profile else [str(loc).lower() for loc in client_prefs.get('locations', [])]
+
+    def found_keywords() -> List[str]:
+        """The client's keywords found in the listing remarks."""
+        remarks_lower = combined_remarks.lower()
+        if profile:
+            return [kw for kw, kw_lower in profile["keywords"] if kw_lower in remarks_lower]
+        return [kw for kw in client_prefs.get('keywords', []) if kw.lower() in remarks_lower]
+
+    def has_keywords() -> bool:
+        return bool(profile["keywords"]) if profile else bool(client_prefs.get('keywords', []))
     
     # A) Seller Scoring Logic
     if client_role == "seller" and event_type in config["roles"]["seller"]["event_types"]:
         resource_subdivision = str(resource_payload.get('SubdivisionName', '')).lower()
         resource_city = str(resource_payload.get('City', '')).lower()
-        client_locations = [str(loc).lower() for loc in client_prefs.get('locations', [])]
-        if client_locations and resource_subdivision and any(loc in resource_subdivision for loc in client_locations):
+        locations = client_locations()
+        if locations and resource_subdivision and any(loc in resource_subdivision for loc in locations):
             total_score += weights.get("seller_location_neighborhood", 80)
             reasons.append("📍 In Their Neighborhood")
-        elif client_locations and resource_city and any(loc in resource_city for loc in client_locations):
+        elif locations and resource_city and any(loc in resource_city for loc in locations):
             total_score += weights.get("seller_location_city", 40)
             reasons.append("📍 In Their City")
         else:
@@ -110,17 +199,15 @@ def score_real_estate_event(client: Client, event: MarketEvent, resource_embeddi
 
     # B) Investor Scoring Logic
     elif client_role == "investor" and event_type in config["roles"]["investor"]["event_types"]:
-        keywords = client_prefs.get('keywords', [])
-        if keywords and combined_remarks:
-            remarks_lower = combined_remarks.lower()
-            found_keywords = [kw for kw in keywords if kw.lower() in remarks_lower]
-            if found_keywords:
+        if has_keywords() and combined_remarks:
+            keywords_found = found_keywords()
+            if keywords_found:
                 total_score += weights.get("investor_keywords", 90)
-                reasons.append(f"✅ Investor Keyword: {', '.join(found_keywords)}")
+                reasons.append(f"✅ Investor Keyword: {', '.join(keywords_found)}")
         
         resource_city = str(resource_payload.get('City', '')).lower()
-        client_locations = [str(loc).lower() for loc in client_prefs.get('locations', [])]
-        if client_locations and resource_city and any(loc in resource_city for loc in client_locations):
+        locations = client_locations()
+        if locations and resource_city and any(loc in resource_city for loc in locations):
             total_score += weights.get("buyer_location", 25)
             reasons.append("✅ Location Match")
         
@@ -130,8 +217,8 @@ def score_real_estate_event(client: Client, event: MarketEvent, resource_embeddi
 
     # C) Buyer Scoring Logic
     elif client_role == "buyer" and event_type in config["roles"]["buyer"]["event_types"]:
-        if client.notes_embedding and resource_embedding:
-            similarity = calculate_cosine_similarity(client.notes_embedding, resource_embedding)
+        if has_embedding(client.notes_embedding) and resource_embedding:
+            similarity = cosine(client.notes_embedding, resource_embedding)
             if similarity > 0.45:
                 score_from_similarity = weights.get("buyer_semantic", 50) * similarity
                 total_score += score_from_similarity
@@ -141,24 +228,22 @@ def score_real_estate_event(client: Client, event: MarketEvent, resource_embeddi
         reasons.append("✅ Within Budget")
         
         resource_location = str(resource_payload.get('SubdivisionName', '')).lower()
-        client_locations = [str(loc).lower() for loc in client_prefs.get('locations', [])]
-        if resource_location and client_locations and any(loc in resource_location for loc in client_locations):
+        locations = client_locations()
+        if resource_location and locations and any(loc in resource_location for loc in locations):
             total_score += weights.get("buyer_location", 25)
             reasons.append("✅ Location Match")
         
-        min_beds = int(client_prefs.get('min_bedrooms', 0))
+        min_beds = profile["feature_min_beds"] if profile else int(client_prefs.get('min_bedrooms', 0))
         resource_beds = int(resource_payload.get('BedroomsTotal', 0))
         if min_beds and resource_beds and resource_beds >= min_beds:
             total_score += weights.get("buyer_features", 15)
             reasons.append(f"✅ Features Match ({resource_beds} Beds)")
         
-        keywords = client_prefs.get('keywords', [])
-        if keywords and combined_remarks:
-            remarks_lower = combined_remarks.lower()
-            found_keywords = [kw for kw in keywords if kw.lower() in remarks_lower]
-            if found_keywords:
+        if has_keywords() and combined_remarks:
+            keywords_found = found_keywords()
+            if keywords_found:
                 total_score += weights.get("buyer_keywords", 20)
-                reasons.append(f"✅ Keyword Match: {', '.join(found_keywords)}")
+                reasons.append(f"✅ Keyword Match: {', '.join(keywords_found)}")
         
         if total_score == 0 and event_type == "new_listing":
             total_score += 25
@@ -166,9 +251,513 @@ def score_real_estate_event(client: Client, event: MarketEvent, resource_embeddi
 
     return int(total_score), reasons
 
+# --- Batch Scoring: Column-Oriented Client Matrix ---
+
+_ROLE_CODES = {"buyer": 0, "investor": 1, "seller": 2}
+
+# A float32 matrix product may accumulate in a different order than the per-client
+# dot product, so similarities this close to a cut-off are re-scored per client.
+_SIMILARITY_GUARD = 1e-5
+_MAX_EXACT_FLOAT_INT = 2 ** 53
+
+
+def _postings(owners_by_term: List[List[int]]) -> List[np.ndarray]:
+    return [np.array(rows, dtype=np.intp) for rows in owners_by_term]
+
+
+def _rows_for_terms(term_ids: Set[int], postings: List[np.ndarray], size: int) -> np.ndarray:
+    """Mask of clients holding at least one of the matched terms, from their posting lists."""
+    mask = np.zeros(size, dtype=bool)
+    if term_ids:
+        mask[np.concatenate([postings[term_id] for term_id in term_ids])] = True
+    return mask
+
+
+def _listing_thresholds(resource_payload: Dict[str, Any]) -> Tuple[Optional[int], Optional[int], Optional[int], bool]:
+    """
+    The listing's price, beds and baths parsed as the knockout check parses
+    them, and whether that parse failed. Unexpected errors propagate.
+    """
+    try:
+        list_price = int(float(resource_payload.get('ListPrice'))) if resource_payload.get('ListPrice') is not None else None
+        resource_beds = int(float(resource_payload.get('BedroomsTotal'))) if resource_payload.get('BedroomsTotal') is not None else None
+        resource_baths = int(float(resource_payload.get('BathroomsTotalInteger'))) if resource_payload.get('BathroomsTotalInteger') is not None else None
+    except (ValueError, TypeError):
+        return None, None, None, True
+    return list_price, resource_beds, resource_baths, False
+
+
+class _ThresholdColumn:
+    """One knockout threshold of a role bucket, sorted so a listing's survivors are a contiguous range."""
+
+    def __init__(self, rows: np.ndarray, values: np.ndarray, survive_at_or_above: bool):
+        is_set = ~np.isnan(values[rows])
+        ordered = rows[is_set][np.argsort(values[rows][is_set], kind="stable")]
+        self.ordered_rows = ordered
+        self.sorted_values = values[ordered]
+        # Clients without this threshold are never knocked out by it.
+        self.open_rows = rows[~is_set]
+        self.survive_at_or_above = survive_at_or_above
+
+    def survivors(self, listing_value: int) -> np.ndarray:
+        if self.survive_at_or_above:
+            ranged = self.ordered_rows[np.searchsorted(self.sorted_values, listing_value, side="left"):]
+        else:
+            ranged = self.ordered_rows[:np.searchsorted(self.sorted_values, listing_value, side="right")]
+        return np.concatenate([ranged, self.open_rows])
+
+    def survivor_count(self, listing_value: int) -> int:
+        position = np.searchsorted(self.sorted_values, listing_value, side="left" if self.survive_at_or_above else "right")
+        ranged = len(self.sorted_values) - position if self.survive_at_or_above else position
+        return int(ranged) + len(self.open_rows)
+
+
+class _KnockoutIndex:
+    """
+    Sorted-array index over one role bucket's max budget, minimum beds and
+    minimum baths. `survivors` enumerates the most selective criterion's range
+    with a binary search and checks the other two on that range only.
+    """
+
+    def __init__(self, rows: np.ndarray, max_budget: np.ndarray, min_beds: np.ndarray, min_baths: np.ndarray):
+        self.rows = rows
+        self.max_budget, self.min_beds, self.min_baths = max_budget, min_beds, min_baths
+        self.budget = _ThresholdColumn(rows, max_budget, survive_at_or_above=True)
+        self.beds = _ThresholdColumn(rows, min_beds, survive_at_or_above=False)
+        self.baths = _ThresholdColumn(rows, min_baths, survive_at_or_above=False)
+
+    def survivors(self, list_price: Optional[int], resource_beds: Optional[int], resource_baths: Optional[int]) -> np.ndarray:
+        """Rows the listing does not knock out, in no particular order."""
+        criteria = [
+            (column, value) for column, value in
+            ((self.budget, list_price), (self.beds, resource_beds), (self.baths, resource_baths))
+            if value is not None
+        ]
+        if not criteria:
+            return self.rows
+        column, value = min(criteria, key=lambda criterion: criterion[0].survivor_count(criterion[1]))
+        rows = column.survivors(value)
+        # NaN thresholds compare False, so clients without one stay in.
+        keep = np.ones(len(rows), dtype=bool)
+        if list_price is not None:
+            keep &= ~(list_price > self.max_budget[rows])
+        if resource_beds is not None:
+            keep &= ~(resource_beds < self.min_beds[rows])
+        if resource_baths is not None:
+            keep &= ~(resource_baths < self.min_baths[rows])
+        return rows[keep]
+
+
+class RealEstateClientMatrix:
+    """
+    A column-oriented snapshot of a user's clients for the real estate scorer.
+    Scoring profiles and embeddings are loaded once into NumPy arrays so each
+    event is scored against every client with vectorized knockout and weighting
+    masks. Keywords and locations of all clients go into one term index each,
+    so a listing's text is scanned once per event rather than once per client
+    keyword. Buyers and investors are bucketed by role and indexed by their
+    knockout thresholds, so `candidate_rows` finds the clients a listing could
+    score for without touching the rest. `score_event` returns exactly what `score_real_estate_event` returns
+    for each client, in client order. Rows the vectorized path cannot represent
+    faithfully (malformed preferences, odd embedding shapes) are handed to the
+    per-client scorer instead.
+    """
+
+    def __init__(self, clients: List[Client], config: Dict):
+        self.clients = list(clients)
+        self.config = config
+        size = len(self.clients)
+
+        self.role = np.zeros(size, dtype=np.int8)
+        self.max_budget = np.full(size, np.nan)
+        self.min_beds = np.full(size, np.nan)
+        self.min_baths = np.full(size, np.nan)
+        self.feature_min_beds = np.zeros(size, dtype=np.int64)
+        self.data_error = np.zeros(size, dtype=bool)
+        self.fallback = np.zeros(size, dtype=bool)
+        self.has_locations = np.zeros(size, dtype=bool)
+        self.has_keywords = np.zeros(size, dtype=bool)
+        self.keywords: List[List[Tuple[str, str]]] = [[] for _ in range(size)]
+
+        location_vocab: Dict[str, int] = {}
+        keyword_vocab: Dict[str, int] = {}
+        # Inverted index: term id -> rows of the clients holding that term.
+        location_owners: List[List[int]] = []
+        keyword_owners: List[List[int]] = []
+        embedding_rows, embeddings = [], []
+
+        # The matrix holds the most common embedding width; stragglers are scored per client.
+        embedding_widths = Counter(
+            len(c.notes_embedding) for c in self.clients if has_embedding(c.notes_embedding)
+        )
+        self.dimension: Optional[int] = embedding_widths.most_common(1)[0][0] if embedding_widths else None
+
+        for row, client in enumerate(self.clients):
+            try:
+                profile = _scoring_profile(client, config)
+                if profile is None:
+                    raise ValueError("client has no scoring profile")
+                client_role = profile["role"]
+                self.role[row] = _ROLE_CODES[client_role]
+
+                max_budget = profile["max_budget"]
+                if max_budget is not None:
+                    if abs(max_budget) > _MAX_EXACT_FLOAT_INT:
+                        raise OverflowError("budget exceeds exact float range")
+                    self.max_budget[row] = max_budget
+                self.data_error[row] = profile["data_error"]
+                if profile["min_beds"]:
+                    self.min_beds[row] = profile["min_beds"]
+                if profile["min_baths"]:
+                    self.min_baths[row] = profile["min_baths"]
+                self.feature_min_beds[row] = profile["feature_min_beds"]
+
+                client_locations = profile["locations"]
+                client_keywords = [(kw, kw_lower) for kw, kw_lower in profile["keywords"]]
+
+                embedding_vector = None
+                if client_role == "buyer" and has_embedding(client.notes_embedding):
+                    embedding_vector = np.array(client.notes_embedding)
+                    if embedding_vector.dtype.kind != 'f' or embedding_vector.ndim != 1:
+                        raise TypeError("embedding is not a flat float vector")
+                    if embedding_vector.shape[0] != self.dimension:
+                        raise ValueError("embedding dimension mismatch")
+            except Exception:
+                self.fallback[row] = True
+                continue
+
+            for loc in client_locations:
+                if loc not in location_vocab:
+                    location_vocab[loc] = len(location_vocab)
+                    location_owners.append([])
+                location_owners[location_vocab[loc]].append(row)
+            self.has_locations[row] = bool(client_locations)
+
+            for _, kw_lower in client_keywords:
+                if kw_lower not in keyword_vocab:
+                    keyword_vocab[kw_lower] = len(keyword_vocab)
+                    keyword_owners.append([])
+                keyword_owners[keyword_vocab[kw_lower]].append(row)
+            self.keywords[row] = client_keywords
+            self.has_keywords[row] = bool(client_keywords)
+
+            if embedding_vector is not None:
+                embedding_rows.append(row)
+                embeddings.append(embedding_vector)
+
+        self.location_index = TermIndex(list(location_vocab))
+        self.location_postings = _postings(location_owners)
+        self.keyword_index = TermIndex(list(keyword_vocab))
+        self.keyword_postings = _postings(keyword_owners)
+        self.embedding_rows = np.array(embedding_rows, dtype=np.intp)
+        # Unit-normalized once, so every similarity below is a plain dot product.
+        self.unit_embeddings = normalize_rows(embeddings, dimension=self.dimension or 0)
+
+        # Role buckets for candidate selection. Data-error rows are always knocked
+        # out, and fallback rows are always candidates, so neither is indexed.
+        indexed = ~self.fallback
+        self.fallback_rows = np.flatnonzero(self.fallback)
+        self.seller_rows = np.flatnonzero(indexed & (self.role == _ROLE_CODES["seller"]))
+        self.knockout_indexes = {
+            role: _KnockoutIndex(
+                np.flatnonzero(indexed & ~self.data_error & (self.role == _ROLE_CODES[role])),
+                self.max_budget, self.min_beds, self.min_baths,
+            )
+            for role in ("buyer", "investor")
+        }
+
+    def __len__(self) -> int:
+        return len(self.clients)
+
+    def candidate_rows(self, event: MarketEvent) -> np.ndarray:
+        """
+        Rows, in client order, of every client the event could give a non-zero
+        score: fallback rows, sellers for seller events, and the buyers and
+        investors the listing does not knock out on budget, beds or baths.
+        Every other client scores 0 for this event.
+        """
+        size = len(self.clients)
+        try:
+            list_price, resource_beds, resource_baths, event_data_error = _listing_thresholds(event.payload)
+        except Exception:
+            return np.arange(size)
+        if any(value is not None and abs(value) > _MAX_EXACT_FLOAT_INT for value in (list_price, resource_beds, resource_baths)):
+            return np.arange(size)
+
+        roles = self.config["roles"]
+        parts = [self.fallback_rows]
+        if event.event_type in roles["seller"]["event_types"]:
+            parts.append(self.seller_rows)
+        if not event_data_error:
+            for role, knockout_index in self.knockout_indexes.items():
+                if event.event_type in roles[role]["event_types"]:
+                    parts.append(knockout_index.survivors(list_price, resource_beds, resource_baths))
+        return np.sort(np.concatenate(parts))
+
+    def _locations_in(self, text: str) -> np.ndarray:
+        """Mask of clients with at least one location that is a substring of `text`."""
+        return _rows_for_terms(self.location_index.scan(text), self.location_postings, len(self.clients))
+
+    def _keywords_in(self, text: str) -> Tuple[np.ndarray, Set[str]]:
+        """
+        Mask of clients with at least one keyword that is a substring of `text`,
+        and the (lowercased) keywords that matched.
+        """
+        term_ids = self.keyword_index.scan(text)
+        matched = {self.keyword_index.terms[term_id] for term_id in term_ids}
+        return _rows_for_terms(term_ids, self.keyword_postings, len(self.clients)), matched
+
+    def _similarities(self, rows_mask: np.ndarray, resource_embedding: Optional[List[float]], batch_similarity: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Cosine similarity between the resource and every embedded client in
+        `rows_mask`. `batch_similarity` may carry the resource's precomputed
+        similarity to every embedded client (see `score_events`).
+        Returns (rows, similarities, rows_too_close_to_a_cut_off).
+        """
+        empty = np.zeros(0, dtype=np.intp)
+        if not resource_embedding or not isinstance(resource_embedding, list) or not self.embedding_rows.size:
+            return empty, np.zeros(0), empty
+
+        selected = rows_mask[self.embedding_rows]
+        rows = self.embedding_rows[selected]
+        if not rows.size:
+            return empty, np.zeros(0), empty
+
+        resource_vector = np.array(resource_embedding)
+        if resource_vector.dtype != np.float64 or resource_vector.ndim != 1:
+            return empty, np.zeros(0), rows
+        unit_resource = normalize(resource_vector)
+        if resource_vector.shape[0] != self.dimension or unit_resource is None:
+            return empty, np.zeros(0), empty
+
+        if batch_similarity is not None:
+            similarity = batch_similarity[selected]
+        else:
+            similarity = one_to_many(unit_resource, self.unit_embeddings[selected])
+        # Widen before weighting, as the per-client scorer does with its Python float.
+        similarity = similarity.astype(np.float64)
+
+        semantic_weight = self.config["scoring_weights"].get("buyer_semantic", 50)
+        scaled = similarity * 100
+        weighted = semantic_weight * similarity
+        near_cut_off = (
+            (np.abs(similarity - 0.45) <= _SIMILARITY_GUARD)
+            | (np.abs(scaled - np.rint(scaled)) <= 100 * _SIMILARITY_GUARD)
+            | (np.abs(weighted - np.rint(weighted)) <= max(abs(semantic_weight), 1) * _SIMILARITY_GUARD)
+        )
+        return rows[~near_cut_off], similarity[~near_cut_off], rows[near_cut_off]
+
+    def score_events(self, events: List[MarketEvent], resource_embeddings: List[Optional[List[float]]], rows_by_event: Optional[List[np.ndarray]] = None) -> List[List[Tuple[int, List[str]]]]:
+        """
+        Scores a batch of events against every client in the matrix, or against
+        each event's `rows_by_event` entry when given. The similarities for the
+        whole batch come from one (clients x events) matrix product; everything
+        else is per-event mask arithmetic. Returns one `score_event` result list
+        per event, in event order.
+        """
+        batch_columns: List[int] = []
+        unit_resources = []
+        for index, resource_embedding in enumerate(resource_embeddings):
+            if not resource_embedding or not isinstance(resource_embedding, list):
+                continue
+            resource_vector = np.array(resource_embedding)
+            if resource_vector.dtype == np.float64 and resource_vector.ndim == 1 and resource_vector.shape[0] == self.dimension:
+                unit_resource = normalize(resource_vector)
+                if unit_resource is not None:
+                    batch_columns.append(index)
+                    unit_resources.append(unit_resource)
+
+        similarity_by_event: Dict[int, np.ndarray] = {}
+        if unit_resources and self.embedding_rows.size:
+            batch_similarity = many_to_many(self.unit_embeddings, np.vstack(unit_resources))
+            similarity_by_event = {index: batch_similarity[:, column] for column, index in enumerate(batch_columns)}
+
+        return [
+            self.score_event(
+                event, resource_embedding, batch_similarity=similarity_by_event.get(index),
+                rows=rows_by_event[index] if rows_by_event is not None else None,
+            )
+            for index, (event, resource_embedding) in enumerate(zip(events, resource_embeddings))
+        ]
+
+    def score_event(self, event: MarketEvent, resource_embedding: Optional[List[float]], batch_similarity: Optional[np.ndarray] = None, rows: Optional[np.ndarray] = None) -> List[Tuple[int, List[str]]]:
+        """
+        Scores one event against every client in the matrix, or only against
+        `rows` (e.g. from `candidate_rows`). The result list is aligned with
+        `self.clients`, or with `rows` when given.
+        """
+        config = self.config
+        size = len(self.clients)
+        weights = config["scoring_weights"]
+        resource_payload = event.payload
+        event_type = event.event_type
+        row_ids = list(range(size)) if rows is None else np.asarray(rows, dtype=np.intp).tolist()
+        selected = np.ones(size, dtype=bool)
+        if rows is not None:
+            selected[:] = False
+            selected[row_ids] = True
+        fallback = self.fallback & selected
+
+        try:
+            list_price, resource_beds, resource_baths, event_data_error = _listing_thresholds(resource_payload)
+        except Exception:
+            return [score_real_estate_event(self.clients[row], event, resource_embedding, config) for row in row_ids]
+
+        if any(value is not None and abs(value) > _MAX_EXACT_FLOAT_INT for value in (list_price, resource_beds, resource_baths)):
+            return [score_real_estate_event(self.clients[row], event, resource_embedding, config) for row in row_ids]
+
+        is_buyer = self.role == _ROLE_CODES["buyer"]
+        is_investor = self.role == _ROLE_CODES["investor"]
+        is_seller = self.role == _ROLE_CODES["seller"]
+
+        # --- Knockout criteria (buyers and investors only) ---
+        data_error = ~is_seller & (self.data_error | event_data_error)
+        still_in = ~is_seller & ~data_error
+        over_budget = still_in & (list_price > self.max_budget) if list_price is not None else np.zeros(size, dtype=bool)
+        still_in &= ~over_budget
+        short_beds = still_in & (resource_beds < self.min_beds) if resource_beds is not None else np.zeros(size, dtype=bool)
+        still_in &= ~short_beds
+        short_baths = still_in & (resource_baths < self.min_baths) if resource_baths is not None else np.zeros(size, dtype=bool)
+        knocked_out = data_error | over_budget | short_beds | short_baths
+
+        combined_remarks = f"{resource_payload.get('PublicRemarks', '')} {resource_payload.get('PrivateRemarks', '')}".strip()
+        remarks_lower = combined_remarks.lower()
+        resource_subdivision = str(resource_payload.get('SubdivisionName', '')).lower()
+        resource_city = str(resource_payload.get('City', '')).lower()
+
+        eligible = ~knocked_out & ~fallback & selected
+        seller_active = eligible & is_seller & (event_type in config["roles"]["seller"]["event_types"])
+        investor_active = eligible & is_investor & (event_type in config["roles"]["investor"]["event_types"])
+        buyer_active = eligible & is_buyer & (event_type in config["roles"]["buyer"]["event_types"])
+
+        no_rows = np.zeros(size, dtype=bool)
+        in_subdivision = self._locations_in(resource_subdivision) & self.has_locations if resource_subdivision else no_rows
+        in_city = self._locations_in(resource_city) & self.has_locations if resource_city else no_rows
+        keyword_hit, matched_keywords = no_rows, set()
+        if combined_remarks:
+            keyword_hit, matched_keywords = self._keywords_in(remarks_lower)
+            keyword_hit &= self.has_keywords
+
+        total = np.zeros(size, dtype=np.float64)
+
+        # A) Sellers
+        seller_neighborhood = seller_active & in_subdivision
+        seller_city = seller_active & ~seller_neighborhood & in_city
+        seller_market = seller_active & ~seller_neighborhood & ~seller_city
+        total[seller_neighborhood] += weights.get("seller_location_neighborhood", 80)
+        total[seller_city] += weights.get("seller_location_city", 40)
+        total[seller_market] += 30
+
+        # B) Investors
+        investor_keywords = investor_active & keyword_hit
+        investor_location = investor_active & in_city
+        total[investor_keywords] += weights.get("investor_keywords", 90)
+        total[investor_location] += weights.get("buyer_location", 25)
+        investor_default = investor_active & (total == 0)
+        total[investor_default] += 35
+
+        # C) Buyers
+        similarity_by_row: Dict[int, float] = {}
+        buyer_semantic = no_rows.copy()
+        buyer_features = no_rows.copy()
+        buyer_default = no_rows
+        if buyer_active.any():
+            sim_rows, similarity, near_rows = self._similarities(buyer_active, resource_embedding, batch_similarity)
+            fallback[near_rows] = True
+            buyer_active &= ~fallback
+
+            matched = similarity > 0.45
+            sim_rows, similarity = sim_rows[matched], similarity[matched]
+            buyer_semantic[sim_rows] = True
+            total[sim_rows] += weights.get("buyer_semantic", 50) * similarity
+            similarity_by_row = dict(zip(sim_rows.tolist(), similarity.tolist()))
+
+            total[buyer_active] += weights.get("buyer_price", 30)
+            total[buyer_active & in_subdivision] += weights.get("buyer_location", 25)
+
+            try:
+                feature_beds = int(resource_payload.get('BedroomsTotal', 0))
+            except Exception:
+                fallback |= buyer_active
+                buyer_active &= ~fallback
+                feature_beds = 0
+            if feature_beds:
+                buyer_features = buyer_active & (self.feature_min_beds != 0) & (feature_beds >= self.feature_min_beds)
+                total[buyer_features] += weights.get("buyer_features", 15)
+
+            total[buyer_active & keyword_hit] += weights.get("buyer_keywords", 20)
+            if event_type == "new_listing":
+                buyer_default = buyer_active & (total == 0)
+                total[buyer_default] += 25
+
+        # --- Assemble (score, reasons) per client ---
+        results: List[Tuple[int, List[str]]] = []
+        pick = (lambda column: column.tolist()) if rows is None else (lambda column: column[row_ids].tolist())
+        flags = zip(
+            pick(fallback), pick(data_error), pick(over_budget), pick(short_beds), pick(short_baths),
+            pick(seller_neighborhood), pick(seller_city), pick(seller_market),
+            pick(investor_keywords), pick(investor_location), pick(investor_default),
+            pick(buyer_active), pick(buyer_semantic), pick(buyer_active & in_subdivision),
+            pick(buyer_features), pick(buyer_active & keyword_hit), pick(buyer_default), pick(total),
+        )
+        for row, (is_fallback, is_data_error, is_over_budget, is_short_beds, is_short_baths,
+                  s_nbhd, s_city, s_market, i_kw, i_loc, i_default,
+                  b_active, b_semantic, b_loc, b_features, b_kw, b_default, row_total) in zip(row_ids, flags):
+            client = self.clients[row]
+            if is_fallback:
+                results.append(score_real_estate_event(client, event, resource_embedding, config))
+                continue
+            if is_data_error:
+                results.append((0, ["Data Error"]))
+                continue
+            if is_over_budget:
+                results.append((0, ["Deal-Breaker: Over Budget"]))
+                continue
+            if is_short_beds:
+                results.append((0, ["Deal-Breaker: Not Enough Bedrooms"]))
+                continue
+            if is_short_baths:
+                results.append((0, ["Deal-Breaker: Not Enough Bathrooms"]))
+                continue
+
+            reasons = []
+            if s_nbhd:
+                reasons.append("📍 In Their Neighborhood")
+            elif s_city:
+                reasons.append("📍 In Their City")
+            elif s_market:
+                reasons.append("📊 Market Activity")
+
+            if i_kw:
+                found_keywords = [kw for kw, kw_lower in self.keywords[row] if kw_lower in matched_keywords]
+                reasons.append(f"✅ Investor Keyword: {', '.join(found_keywords)}")
+            if i_loc:
+                reasons.append("✅ Location Match")
+            if i_default:
+                reasons.append("📈 Market Opportunity")
+
+            if b_active:
+                if b_semantic:
+                    reasons.append(f"🔥 Conceptual Match ({int(similarity_by_row[row]*100)}%)")
+                reasons.append("✅ Within Budget")
+                if b_loc:
+                    reasons.append("✅ Location Match")
+                if b_features:
+                    reasons.append(f"✅ Features Match ({feature_beds} Beds)")
+                if b_kw:
+                    found_keywords = [kw for kw, kw_lower in self.keywords[row] if kw_lower in matched_keywords]
+                    reasons.append(f"✅ Keyword Match: {', '.join(found_keywords)}")
+                if b_default:
+                    reasons.append("🏠 New Property Alert")
+
+            results.append((int(row_total), reasons))
+        return results
+
 # --- Real Estate Vertical Configuration Object ---
 REAL_ESTATE_CONFIG = {
     "scorer": score_real_estate_event,
+    "client_matrix": RealEstateClientMatrix,
+    "profile_builder": build_scoring_profile,
     "resource_type": "property",
     "roles": {
         "buyer": {"event_types": ["new_listing", "price_drop", "back_on_market", "coming_soon", "expired_listing", "withdrawn_listing"]},
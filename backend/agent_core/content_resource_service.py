@@ -2,7 +2,7 @@
 # Content resource service for integrating content recommendations into AI suggestions
 
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 from uuid import UUID
 from sqlmodel import Session, select
 from difflib import SequenceMatcher
@@ -11,7 +11,9 @@ from data.models.resource import ContentResource, Resource
 from data.models.client import Client
 from data.database import engine
 from agent_core.llm_client import get_chat_completion
-from agent_core.llm_client import generate_embedding
+from agent_core.llm_client import generate_embedding, generate_embeddings
+from agent_core.similarity import normalize_rows, many_to_many
+from data.vector import has_embedding
 
 def calculate_fuzzy_similarity(str1: str, str2: str) -> float:
     """
@@ -258,58 +260,86 @@ def find_matching_clients_generic(resource, clients: List[Client], use_fuzzy: bo
     logging.info(f"CONTENT_MATCHING_GENERIC: Found {len(matched_clients)} matches for resource '{resource_title}'")
     return matched_clients
 
+def _content_text(resource: ContentResource) -> str:
+    return f"{resource.title} {resource.description or ''}"
+
+def _client_profile_text(client: Client) -> str:
+    client_tags = (client.user_tags or []) + (client.ai_tags or [])
+    return f"{client.full_name} {' '.join(client_tags)} {client.notes or ''}"
+
+def _usable_embedding(embedding) -> Optional[List[float]]:
+    """None for a missing embedding or the zero vector a failed embedding call returns."""
+    return embedding if has_embedding(embedding) and any(embedding) else None
+
+async def embed_content_resource(resource: ContentResource) -> None:
+    """
+    Stores the embedding of the resource's title and description on it. Called
+    on create and whenever either field changes; the caller commits.
+    """
+    resource.embedding = _usable_embedding(await generate_embedding(_content_text(resource)))
+
+async def _resource_embeddings(resources: List[ContentResource], session: Optional[Session] = None) -> List[Any]:
+    """
+    Stored resource embeddings, aligned with `resources`. Resources saved before
+    embeddings were stored are embedded in one batch, and persisted when a
+    session is given.
+    """
+    missing = [resource for resource in resources if not has_embedding(resource.embedding)]
+    if missing:
+        for resource, embedding in zip(missing, await generate_embeddings([_content_text(r) for r in missing])):
+            resource.embedding = _usable_embedding(embedding)
+            if session is not None and resource.embedding is not None:
+                session.add(resource)
+    return [resource.embedding for resource in resources]
+
+async def _client_embeddings(clients: List[Client]) -> List[Any]:
+    """
+    Each client's stored composite embedding (Client.notes_embedding, kept current
+    by semantic_service on every profile write), aligned with `clients`. Clients
+    that have none yet are embedded from their name, tags and notes in one batch.
+    """
+    embeddings = [client.notes_embedding if has_embedding(client.notes_embedding) else None for client in clients]
+    missing = [index for index, embedding in enumerate(embeddings) if embedding is None]
+    if missing:
+        for index, embedding in zip(missing, await generate_embeddings([_client_profile_text(clients[i]) for i in missing])):
+            embeddings[index] = embedding
+    return embeddings
+
+async def match_resources_to_clients(resources: List[ContentResource], clients: List[Client], similarity_threshold: float = 0.7, session: Optional[Session] = None) -> List[List[Tuple[Client, float]]]:
+    """
+    Semantic matches for many resources at once: one resources x clients
+    similarity product over stored embeddings. Returns, per resource, the
+    (client, similarity) pairs at or above the threshold, in client order.
+    """
+    if not resources or not clients:
+        return [[] for _ in resources]
+
+    unit_resources = normalize_rows(await _resource_embeddings(resources, session))
+    unit_clients = normalize_rows(await _client_embeddings(clients), dimension=unit_resources.shape[1])
+    similarities = many_to_many(unit_resources, unit_clients)
+
+    matches = []
+    for resource, row in zip(resources, similarities.tolist()):
+        resource_matches = [(client, similarity) for client, similarity in zip(clients, row) if similarity >= similarity_threshold]
+        for client, similarity in resource_matches:
+            logging.info(f"Semantic match found: {client.full_name} -> {resource.title} (similarity: {similarity:.3f})")
+        matches.append(resource_matches)
+    return matches
+
 async def find_matching_clients_semantic(resource: ContentResource, clients: List[Client], similarity_threshold: float = 0.7) -> List[Client]:
     """
     Find clients that match the content resource using semantic embeddings.
     This provides more intelligent matching based on content meaning, not just exact string matches.
     """
     try:
-        matched_clients = []
-        
-        # Create embedding for the resource content
-        resource_text = f"{resource.title} {resource.description or ''}"
-        resource_embedding = await generate_embedding(resource_text)
-        
-        for client in clients:
-            # Create embedding for client profile
-            client_tags = (client.user_tags or []) + (client.ai_tags or [])
-            client_notes = client.notes or ""
-            client_text = f"{client.full_name} {' '.join(client_tags)} {client_notes}"
-            client_embedding = await generate_embedding(client_text)
-            
-            # Calculate cosine similarity
-            similarity = calculate_cosine_similarity(resource_embedding, client_embedding)
-            
-            if similarity >= similarity_threshold:
-                logging.info(f"Semantic match found: {client.full_name} -> {resource.title} (similarity: {similarity:.3f})")
-                matched_clients.append(client)
-        
-        return matched_clients
+        [matches] = await match_resources_to_clients([resource], clients, similarity_threshold)
+        return [client for client, _ in matches]
         
     except Exception as e:
         logging.error(f"Error in semantic matching: {e}", exc_info=True)
         # Fallback to exact matching if semantic matching fails
         return find_matching_clients(resource, clients)
 
-def calculate_cosine_similarity(embedding1: List[float], embedding2: List[float]) -> float:
-    """
-    Calculate cosine similarity between two embeddings.
-    """
-    import numpy as np
-    
-    vec1 = np.array(embedding1)
-    vec2 = np.array(embedding2)
-    
-    # Calculate cosine similarity
-    dot_product = np.dot(vec1, vec2)
-    norm1 = np.linalg.norm(vec1)
-    norm2 = np.linalg.norm(vec2)
-    
-    if norm1 == 0 or norm2 == 0:
-        return 0.0
-    
-    return dot_product / (norm1 * norm2)
-
 async def get_content_recommendations_semantic(user_id: UUID, use_semantic: bool = True) -> List[Dict[str, Any]]:
     """
     Get content recommendations using semantic matching when enabled.
@@ -333,17 +363,24 @@ async def get_content_recommendations_semantic(user_id: UUID, use_semantic: bool
             ).all()
             
             recommendations = []
+
+            semantic_matches = None
+            if use_semantic:
+                try:
+                    semantic_matches = await match_resources_to_clients(resources, clients, session=session)
+                except Exception as e:
+                    logging.error(f"Error in semantic matching: {e}", exc_info=True)
             
-            for resource in resources:
-                if use_semantic:
+            for index, resource in enumerate(resources):
+                if semantic_matches is not None:
                     # Use semantic matching
-                    matched_clients = await find_matching_clients_semantic(resource, clients)
+                    matched = semantic_matches[index]
                 else:
-                    # Use exact matching
-                    matched_clients = find_matching_clients(resource, clients)
+                    # Use exact matching (also the fallback if semantic matching failed)
+                    matched = [(client, None) for client in find_matching_clients(resource, clients)]
                 
-                if matched_clients:
-                    for client in matched_clients:
+                if matched:
+                    for client, similarity in matched:
                         message = generate_resource_message_sync(resource, client)
                         
                         recommendation = {
@@ -360,12 +397,15 @@ async def get_content_recommendations_semantic(user_id: UUID, use_semantic: bool
                             'matched_clients': [{
                                 'client_id': client.id,
                                 'client_name': client.full_name,
-                                'match_reason': f"Semantic match (similarity: {calculate_cosine_similarity([], []) if use_semantic else 'exact match'})"
+                                'match_reason': f"Semantic match (similarity: {similarity:.3f})" if similarity is not None else "Exact match"
                             }],
                             'generated_message': message
                         }
                         recommendations.append(recommendation)
             
+            # Persist embeddings computed for resources saved before they were stored.
+            if session.dirty:
+                session.commit()
             return recommendations
             
     except Exception as e:
@@ -0,0 +1,127 @@
+# FILE: backend/agent_core/embedding_cache.py
+#
+# PURPOSE:
+# Content-addressed cache for llm_client embeddings. An entry is keyed by
+# sha256(model, text), so identical text is sent to the provider once no matter
+# which caller asks for it. Two tiers: an in-process LRU bounded by the bytes of
+# float32 vectors it holds, and the EmbeddingCacheEntry table shared by every
+# process (pruned to PERSISTENT_CACHE_MAX_ENTRIES by a periodic task). The
+# table is read and written on a worker thread, so a lookup never blocks the
+# event loop on database I/O; the memory tier is only touched on the loop.
+
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from data import crm as crm_service
+from data.vector import VECTOR_DTYPE
+
+# ~10k 1536-d vectors per process.
+MEMORY_CACHE_MAX_BYTES = 64 * 1024 * 1024
+PERSISTENT_CACHE_MAX_ENTRIES = 500_000
+
+
+def cache_key(model: str, text: str) -> str:
+    """The content address of `text` embedded with `model`."""
+    return hashlib.sha256(f"{model}\0{text}".encode("utf-8")).hexdigest()
+
+
+def as_stored(embedding) -> List[float]:
+    """
+    The embedding as the cache stores and returns it (float32 precision), so a
+    fresh result and a later cache hit for the same text are identical.
+    """
+    return np.asarray(embedding, dtype=VECTOR_DTYPE).tolist()
+
+
+class EmbeddingCache:
+    """In-process LRU over the persistent table, with hit/miss counters per tier."""
+
+    def __init__(self, max_bytes: int = MEMORY_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._bytes = 0
+        self.memory_hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+
+    def _remember(self, key: str, vector: np.ndarray) -> None:
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= previous.nbytes
+        self._entries[key] = vector
+        self._bytes += vector.nbytes
+        while self._bytes > self.max_bytes and self._entries:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.nbytes
+
+    def get(self, key: str) -> Optional[List[float]]:
+        """Memory tier only; cheap enough to call before queueing a provider request."""
+        vector = self._entries.get(key)
+        if vector is None:
+            return None
+        self._entries.move_to_end(key)
+        self.memory_hits += 1
+        return vector.tolist()
+
+    async def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        """Both tiers: memory first, then one query for the rest. Counts a miss for each key not found."""
+        found: Dict[str, List[float]] = {}
+        missing = []
+        for key in dict.fromkeys(keys):
+            embedding = self.get(key)
+            if embedding is None:
+                missing.append(key)
+            else:
+                found[key] = embedding
+
+        stored_embeddings = await asyncio.to_thread(crm_service.get_cached_embeddings, missing) if missing else {}
+        for key, stored in stored_embeddings.items():
+            vector = np.array(stored, dtype=VECTOR_DTYPE)
+            self._remember(key, vector)
+            found[key] = vector.tolist()
+        self.persistent_hits += len(stored_embeddings)
+        self.misses += len(missing) - len(stored_embeddings)
+        return found
+
+    async def put_many(self, model: str, embeddings: Dict[str, List[float]]) -> None:
+        """Stores fresh embeddings in both tiers. Zero vectors (failed calls) are never cached."""
+        entries = []
+        for key, embedding in embeddings.items():
+            vector = np.array(embedding, dtype=VECTOR_DTYPE)
+            if vector.ndim != 1 or not vector.size or not vector.any():
+                continue
+            self._remember(key, vector)
+            entries.append({"content_hash": key, "model": model, "embedding": vector})
+        if entries:
+            await asyncio.to_thread(crm_service.save_cached_embeddings, entries)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "memory_hits": self.memory_hits,
+            "persistent_hits": self.persistent_hits,
+            "misses": self.misses,
+        }
+
+
+_cache = EmbeddingCache()
+
+
+def get_cache() -> EmbeddingCache:
+    return _cache
+
+
+def prune_persistent_cache(max_entries: int = PERSISTENT_CACHE_MAX_ENTRIES) -> int:
+    removed = crm_service.prune_embedding_cache(max_entries)
+    logging.info(f"EMBEDDING_CACHE: Pruned {removed} persistent entries; process stats {_cache.stats()}.")
+    return removed
@@ -3,40 +3,156 @@
 
 import logging
 import asyncio
-from typing import List, Optional
+import weakref
+from typing import Dict, List, Optional, Set
 from common.config import get_settings
 
 logger = logging.getLogger(__name__)
 
+EMBEDDING_DIMENSION = 1536  # OpenAI embedding dimension
+# generate_embedding calls arriving within this window are sent as one request.
+EMBEDDING_BATCH_WINDOW_SECONDS = 0.01
+# A batch is sent early once it holds this many distinct texts...
+EMBEDDING_BATCH_MAX_INPUTS = 256
+# ...or this many (estimated) tokens; well under the provider's per-request limit.
+EMBEDDING_BATCH_TOKEN_BUDGET = 100_000
+
+def _estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token) for batch budgeting."""
+    return len(text) // 4 + 1
+
+class _EmbeddingBatcher:
+    """
+    Coalesces concurrent generate_embedding calls on one event loop into
+    batched embedding requests. Identical texts waiting in the same batch share
+    one input, and each caller's future receives its own copy of the result.
+    """
+
+    def __init__(self):
+        self._pending: Dict[str, List[asyncio.Future]] = {}
+        self._pending_tokens = 0
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._sending: Set[asyncio.Task] = set()
+        self.requests_sent = 0
+        self.texts_sent = 0
+
+    def submit(self, text: str) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        tokens = _estimate_tokens(text)
+        if text not in self._pending and self._pending and (
+            len(self._pending) >= EMBEDDING_BATCH_MAX_INPUTS or self._pending_tokens + tokens > EMBEDDING_BATCH_TOKEN_BUDGET
+        ):
+            self._flush()
+
+        waiters = self._pending.setdefault(text, [])
+        if not waiters:
+            self._pending_tokens += tokens
+        waiters.append(future)
+        if self._flush_handle is None:
+            self._flush_handle = loop.call_later(EMBEDDING_BATCH_WINDOW_SECONDS, self._flush)
+        return future
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending, self._pending_tokens = self._pending, {}, 0
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._send(batch))
+            self._sending.add(task)
+            task.add_done_callback(self._sending.discard)
+
+    async def _send(self, batch: Dict[str, List[asyncio.Future]]) -> None:
+        from agent_core import embedding_cache
+        texts = list(batch)
+        try:
+            # Texts another process already embedded come from the persistent cache tier.
+            cache = embedding_cache.get_cache()
+            model = _embedding_model()
+            keys = {text: embedding_cache.cache_key(model, text) for text in texts}
+            results = await cache.get_many(list(keys.values()))
+            to_embed = [text for text in texts if keys[text] not in results]
+            if to_embed:
+                self.requests_sent += 1
+                self.texts_sent += len(to_embed)
+                embeddings = await _generate_embeddings_for_provider(to_embed)
+                if len(embeddings) != len(to_embed):
+                    raise ValueError(f"expected {len(to_embed)} embeddings, got {len(embeddings)}")
+                fresh = {keys[text]: embedding_cache.as_stored(embedding) for text, embedding in zip(to_embed, embeddings)}
+                await cache.put_many(model, fresh)
+                results.update(fresh)
+        except Exception as e:
+            for waiters in batch.values():
+                for future in waiters:
+                    if not future.done():
+                        future.set_exception(e)
+            return
+
+        logger.debug(f"LLM CLIENT: Embedded {len(to_embed)} of {len(texts)} texts for {sum(map(len, batch.values()))} callers in one request.")
+        for text in texts:
+            for future in batch[text]:
+                if not future.done():
+                    future.set_result(list(results[keys[text]]))
+
+# One batcher per event loop; Celery tasks each run their own loop via asyncio.run.
+_batchers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _EmbeddingBatcher]" = weakref.WeakKeyDictionary()
+
+def _embedding_model() -> str:
+    """Identifies the provider's embedding model in embedding cache keys."""
+    from integrations.openai import EMBEDDING_MODEL
+    return f"openai:{EMBEDDING_MODEL}"
+
+def _get_batcher() -> _EmbeddingBatcher:
+    loop = asyncio.get_running_loop()
+    batcher = _batchers.get(loop)
+    if batcher is None:
+        batcher = _batchers[loop] = _EmbeddingBatcher()
+    return batcher
+
 async def generate_embedding(text: str) -> List[float]:
     """
     Generates embeddings for text using the configured LLM provider.
     Returns a zero vector if the API is not available or text is empty.
+    Concurrent calls are micro-batched into one provider request (see
+    _EmbeddingBatcher), so gathering many calls costs one HTTP round trip, and
+    text embedded before is served from the embedding cache instead.
     """
     if not text or not text.strip():
         logger.warning("LLM CLIENT: generate_embedding called with empty text. Returning zero-vector.")
-        return [0.0] * 1536  # OpenAI embedding dimension
+        return [0.0] * EMBEDDING_DIMENSION
     
     settings = get_settings()
     
     try:
         if settings.LLM_PROVIDER == "openai":
-            return await _generate_openai_embedding(text)
+            from agent_core import embedding_cache
+            cached = embedding_cache.get_cache().get(embedding_cache.cache_key(_embedding_model(), text))
+            if cached is not None:
+                return cached
+            return await _get_batcher().submit(text)
         else:
             logger.error(f"LLM CLIENT: Unsupported provider '{settings.LLM_PROVIDER}'")
-            return [0.0] * 1536
+            return [0.0] * EMBEDDING_DIMENSION
     except Exception as e:
         logger.error(f"LLM CLIENT: Failed to generate embedding: {e}")
-        return [0.0] * 1536
+        return [0.0] * EMBEDDING_DIMENSION
+
+async def generate_embeddings(texts: List[str]) -> List[List[float]]:
+    """
+    Embeds many texts at once, aligned with `texts`. The calls are batched
+    together, so this makes one request per EMBEDDING_BATCH_MAX_INPUTS texts.
+    """
+    return list(await asyncio.gather(*(generate_embedding(text) for text in texts)))
 
-async def _generate_openai_embedding(text: str) -> List[float]:
-    """Generates embedding using OpenAI API with proper error handling."""
+async def _generate_embeddings_for_provider(texts: List[str]) -> List[List[float]]:
+    """Sends one batch of texts to the configured provider's embeddings endpoint."""
     try:
-        from integrations.openai import get_text_embedding
-        return await get_text_embedding(text)
+        from integrations.openai import get_text_embeddings
+        return await get_text_embeddings(texts)
     except Exception as e:
         logger.error(f"LLM CLIENT: OpenAI embedding failed: {e}")
-        return [0.0] * 1536
+        return [[0.0] * EMBEDDING_DIMENSION for _ in texts]
 
 async def get_chat_completion(
     prompt: str,
@@ -271,32 +271,18 @@ async def orchestrate_send_message_now(
         first_name = client.full_name.strip().split(' ')[0] if client.full_name else "there"
         personalized_content = content.replace("[Client Name]", first_name)
         
-        # 3. Send SMS with retry logic
-        max_retries = 3
-        retry_delay = 1  # seconds
-        
-        for attempt in range(max_retries):
-            try:
-                was_sent = twilio_outgoing.send_sms(
-                    from_number=user.twilio_phone_number, 
-                    to_number=client.phone, 
-                    body=personalized_content
-                )
-                
-                if was_sent:
-                    logging.info(f"ORCHESTRATOR: SMS sent successfully on attempt {attempt + 1}")
-                    break
-                else:
-                    raise Exception("Twilio returned False for send_sms")
-                    
-            except Exception as e:
-                logging.warning(f"ORCHESTRATOR: SMS send attempt {attempt + 1} failed: {e}")
-                if attempt == max_retries - 1:
-                    logging.error(f"ORCHESTRATOR: All SMS send attempts failed for client {client_id}")
-                    session.rollback()
-                    return None
-                await asyncio.sleep(retry_delay * (2 ** attempt))  # Exponential backoff
-        
+        # 3. Send SMS. send_sms_async owns the retry policy; retrying here would
+        # stack attempts and risk delivering the same text twice.
+        was_sent = await twilio_outgoing.send_sms_async(
+            from_number=user.twilio_phone_number,
+            to_number=client.phone,
+            body=personalized_content
+        )
+        if not was_sent:
+            logging.error(f"ORCHESTRATOR: SMS send failed for client {client_id}")
+            session.rollback()
+            return None
+
         # 4. Create message record with comprehensive metadata
         message_log = Message(
             user_id=user_id,
@@ -314,6 +300,7 @@ async def orchestrate_send_message_now(
             session.add(message_log)
             session.flush()  # Ensure ID is generated
             session.refresh(message_log)
+            crm_service.record_message_in_conversation_state(message_log, session)
             logging.info(f"ORCHESTRATOR: Message record created with ID {message_log.id}")
         except Exception as e:
             logging.error(f"ORCHESTRATOR: Failed to save message record: {e}")
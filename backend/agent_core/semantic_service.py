@@ -5,58 +5,151 @@ import faiss
 import numpy as np
 import logging
 import json
-from typing import List
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone, timedelta
+from typing import List, Optional
 from uuid import UUID
 
 from sqlmodel import Session
 from data.models.client import Client
 from data import crm as crm_service
+from data.vector import has_embedding
 from agent_core.llm_client import generate_embedding
+from common.config import get_settings
+from agent_core.vector_index import ClientVectorIndex, IndexSpec, DIMENSION, _to_index_id
 
 # --- Configuration ---
-DIMENSION = 1536
 SIMILARITY_THRESHOLD = 0.35
+# How often a serving process pulls embedding writes made by other processes (e.g. Celery).
+SYNC_INTERVAL_SECONDS = 60
+# Re-read a little before the watermark so rows committed late are not skipped.
+SYNC_OVERLAP = timedelta(minutes=5)
+# Once this many vectors sit in a shard's in-memory delta, fold them into a new snapshot.
+COMPACTION_THRESHOLD = 1_000
+# Per-user index shards kept loaded; the least recently searched is evicted first.
+MAX_LOADED_SHARDS = 256
 
-# --- In-Memory Vector Index ---
-# This setup is suitable for thousands of clients. For millions, a managed
-# vector DB (like Pinecone, Weaviate, or Postgres w/ pg_vector) would be the next step.
-faiss_index = faiss.IndexFlatIP(DIMENSION)
-faiss_index = faiss.IndexIDMap(faiss_index)
-index_to_client_id_map: List[UUID] = []
+
+def _as_utc(value: datetime) -> datetime:
+    """DB timestamps come back naive; they are written in UTC."""
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+# One shard per user, loaded on first search. Processes that never search (e.g.
+# Celery workers) never load a shard, so their embedding writes skip the
+# incremental update and are picked up by the serving process's sync.
+_loaded_shards: "OrderedDict[UUID, ClientVectorIndex]" = OrderedDict()
+
+
+def _get_snapshot_dir(user_id: UUID) -> Optional[str]:
+    base_dir = get_settings().VECTOR_INDEX_DIR
+    return os.path.join(base_dir, str(user_id)) if base_dir else None
 
 
 # --- Index Management ---
 
 async def initialize_vector_index():
     """
-    Builds the FAISS index from the composite client embeddings on application startup.
-    This logic is moved from the old audience_builder.py.
+    Prepares the client vector index on application startup. Shards are loaded
+    lazily per user, so boot does no work proportional to the number of clients.
     """
-    global index_to_client_id_map
-    faiss_index.reset()
-    index_to_client_id_map = []
+    _loaded_shards.clear()
+    logging.info("SEMANTIC SERVICE: Client vector index ready; user shards load on first search.")
 
-    logging.info("SEMANTIC SERVICE: Initializing client vector index...")
-    # Note: Uses a private CRM function for a system-wide operation.
-    clients = crm_service._get_all_clients_for_system_indexing()
-    
-    clients_with_embedding = [c for c in clients if c.notes_embedding]
-    
-    if not clients_with_embedding:
-        logging.warning("SEMANTIC SERVICE: No clients with embeddings found. Index will be empty.")
+
+def _get_shard(user_id: UUID) -> ClientVectorIndex:
+    """
+    Returns the user's shard, loading it if needed. A shard is memory-mapped from its
+    snapshot when there is one, otherwise built from the user's client embeddings.
+    """
+    shard = _loaded_shards.get(user_id)
+    if shard is not None:
+        _loaded_shards.move_to_end(user_id)
+        if time.monotonic() - shard.last_synced_at > SYNC_INTERVAL_SECONDS:
+            sync_shard(user_id, shard)
+        return shard
+
+    shard = ClientVectorIndex(DIMENSION, spec=IndexSpec.from_settings(get_settings()))
+    snapshot_dir = _get_snapshot_dir(user_id)
+    if snapshot_dir and shard.load(snapshot_dir):
+        logging.info(f"SEMANTIC SERVICE: Memory-mapped shard for user {user_id} with {shard.ntotal} vectors.")
+        sync_shard(user_id, shard)
+    else:
+        shard.watermark = datetime.now(timezone.utc)
+        shard.last_synced_at = time.monotonic()
+        rows = [(client_id, embedding) for client_id, embedding in crm_service.get_client_embeddings(user_id) if has_embedding(embedding)]
+        if rows:
+            shard.add([client_id for client_id, _ in rows], np.vstack([embedding for _, embedding in rows]).astype('float32'))
+        logging.info(f"SEMANTIC SERVICE: Built shard for user {user_id} with {shard.ntotal} vectors.")
+        if snapshot_dir and shard.ntotal:
+            _save_shard(user_id, shard)
+
+    _loaded_shards[user_id] = shard
+    while len(_loaded_shards) > MAX_LOADED_SHARDS:
+        evicted_user_id, evicted_shard = _loaded_shards.popitem(last=False)
+        if evicted_shard.live.ntotal or evicted_shard.tombstones:
+            _save_shard(evicted_user_id, evicted_shard)
+    return shard
+
+
+def sync_shard(user_id: UUID, shard: ClientVectorIndex):
+    """
+    Applies the user's embedding writes made since the shard watermark, typically by
+    other processes, and drops clients deleted elsewhere (an id-only query).
+    """
+    shard.last_synced_at = time.monotonic()
+    # The column is timezone-naive UTC, so compare against a naive value.
+    since = (shard.watermark - SYNC_OVERLAP).replace(tzinfo=None) if shard.watermark else None
+
+    try:
+        for client_id, embedding, updated_at in crm_service.get_client_embeddings_updated_since(user_id, since):
+            if has_embedding(embedding):
+                shard.upsert(client_id, embedding)
+            else:
+                shard.remove(client_id)
+            updated_at = _as_utc(updated_at)
+            if shard.watermark is None or updated_at > shard.watermark:
+                shard.watermark = updated_at
+
+        existing_ids = {_to_index_id(client_id) for client_id in crm_service.get_embedded_client_ids(user_id)}
+        stale_client_ids = [client_id for index_id, client_id in shard.live_client_ids.items() if index_id not in existing_ids]
+        snapshot_ids = np.asarray(shard.snapshot_id_map[:, 0])
+        stale_snapshot_ids = snapshot_ids[~np.isin(snapshot_ids, np.fromiter(existing_ids, dtype=np.int64, count=len(existing_ids)))]
+        stale_client_ids.extend(shard._snapshot_client_id(index_id) for index_id in stale_snapshot_ids.tolist())
+        for client_id in stale_client_ids:
+            shard.remove(client_id)
+    except Exception as e:
+        logging.error(f"SEMANTIC SERVICE: Vector index sync failed for user {user_id}: {e}")
         return
 
-    logging.info(f"SEMANTIC SERVICE: Loading {len(clients_with_embedding)} composite client embeddings into index...")
+    if shard.live.ntotal >= COMPACTION_THRESHOLD:
+        _save_shard(user_id, shard)
 
-    embeddings = np.array([c.notes_embedding for c in clients_with_embedding]).astype('float32')
-    faiss.normalize_L2(embeddings)
-    
-    item_ids = np.arange(len(clients_with_embedding))
 
-    faiss_index.add_with_ids(embeddings, item_ids)
-    index_to_client_id_map = [c.id for c in clients_with_embedding]
-    
-    logging.info(f"SEMANTIC SERVICE: Index built successfully with {faiss_index.ntotal} vectors.")
+def _save_shard(user_id: UUID, shard: ClientVectorIndex):
+    snapshot_dir = _get_snapshot_dir(user_id)
+    if not snapshot_dir:
+        return
+    try:
+        shard.save(snapshot_dir)
+    except Exception as e:
+        logging.error(f"SEMANTIC SERVICE: Could not save vector index snapshot for user {user_id}: {e}")
+
+
+def save_vector_index():
+    """Snapshots every loaded shard with unsaved changes to VECTOR_INDEX_DIR, if configured."""
+    for user_id, shard in list(_loaded_shards.items()):
+        if shard.live.ntotal or shard.tombstones:
+            _save_shard(user_id, shard)
+
+
+def remove_client_from_index(client_id: UUID, user_id: UUID):
+    """Drops a deleted client's vector from the user's shard, if it is loaded here."""
+    shard = _loaded_shards.get(user_id)
+    if shard is not None:
+        shard.remove(client_id)
 
 
 # --- Embedding Generation ---
@@ -100,6 +193,15 @@ async def update_client_embedding(client: Client, session: Session):
     else:
         logging.info(f"SEMANTIC SERVICE: No content for composite embedding for client {client.id}. Clearing.")
         client.notes_embedding = None
+    client.embedding_updated_at = datetime.now(timezone.utc)
+
+    # 4. Keep this process's shard current without waiting for the next sync.
+    shard = _loaded_shards.get(client.user_id)
+    if shard is not None:
+        if has_embedding(client.notes_embedding):
+            shard.upsert(client.id, client.notes_embedding)
+        else:
+            shard.remove(client.id)
 
     session.add(client)
     # The calling function (e.g., in crm.py) will be responsible for the final commit.
@@ -114,10 +216,16 @@ async def find_similar_clients(
 ) -> List[UUID]:
     """
     Finds clients semantically similar to a natural language query for a specific user.
-    This logic is moved from the old audience_builder.py.
+    Only the user's own shard is searched, so the top-k is never crowded out by other
+    tenants' clients and no follow-up query is needed to filter the matches.
     """
-    if faiss_index.ntotal == 0:
-        logging.warning("SEMANTIC SERVICE: Search attempted but index is empty.")
+    if user_id is None:
+        logging.warning("SEMANTIC SERVICE: Search attempted without a user.")
+        return []
+
+    shard = _get_shard(user_id)
+    if shard.ntotal == 0:
+        logging.warning(f"SEMANTIC SERVICE: Search attempted but the index for user {user_id} is empty.")
         return []
 
     logging.info(f"SEMANTIC SERVICE: Searching for clients matching query: '{query_text}'")
@@ -126,26 +234,13 @@ async def find_similar_clients(
     if query_embedding is None:
         return []
     
-    k = min(top_k, faiss_index.ntotal)
-    
     query_vector = np.array([query_embedding]).astype('float32')
     faiss.normalize_L2(query_vector)
     
-    similarities, indices = faiss_index.search(query_vector, k=k)
-    
-    all_matched_client_ids = {
-        index_to_client_id_map[i] for i, sim in zip(indices[0], similarities[0])
-        if i != -1 and sim > SIMILARITY_THRESHOLD
-    }
-    
-    if not all_matched_client_ids:
-        return []
-
-    # Filter the global matches to only those belonging to the current user
-    user_clients = crm_service.get_all_clients(user_id=user_id)
-    user_client_ids = {c.id for c in user_clients}
-    
-    final_matched_ids = list(all_matched_client_ids.intersection(user_client_ids))
+    final_matched_ids = [
+        client_id for client_id, sim in shard.search(query_vector, k=top_k)
+        if sim > SIMILARITY_THRESHOLD
+    ]
 
     logging.info(f"SEMANTIC SERVICE: Found {len(final_matched_ids)} relevant clients for user {user_id}.")
-    return final_matched_ids
\ No newline at end of file
+    return final_matched_ids
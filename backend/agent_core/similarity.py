@@ -0,0 +1,85 @@
+# FILE: backend/agent_core/similarity.py
+#
+# PURPOSE:
+# The one cosine-similarity kernel used by scoring, the feedback penalty and
+# content matching. Vectors are unit-normalized to float32 once, after which a
+# similarity is a plain dot product: `dot` for one pair, `one_to_many` for a
+# query against a matrix and `many_to_many` for a whole batch. `cosine` is the
+# convenience entry point for two raw vectors.
+
+from typing import Any, List, Optional, Sequence
+
+import numpy as np
+
+from data.vector import has_embedding
+
+DTYPE = np.float32
+
+
+def normalize(vector: Any) -> Optional[np.ndarray]:
+    """
+    A unit-length float32 copy of `vector`, or None for a missing, non-flat or
+    all-zero vector (all of which have no meaningful direction).
+    """
+    if not has_embedding(vector):
+        return None
+    array = np.asarray(vector, dtype=DTYPE)
+    if array.ndim != 1:
+        return None
+    norm = np.linalg.norm(array)
+    if not norm or not np.isfinite(norm):
+        return None
+    return array / norm
+
+
+def normalize_rows(vectors: Sequence[Any], dimension: Optional[int] = None) -> np.ndarray:
+    """
+    Stacks vectors into a float32 matrix of unit rows. Rows that are missing,
+    zero or of another width become zero rows, so their similarity to anything
+    is 0.0 and row indexes stay aligned with `vectors`.
+    """
+    units = [normalize(vector) for vector in vectors]
+    if dimension is None:
+        dimension = next((unit.shape[0] for unit in units if unit is not None), 0)
+    matrix = np.zeros((len(units), dimension), dtype=DTYPE)
+    for row, unit in enumerate(units):
+        if unit is not None and unit.shape[0] == dimension:
+            matrix[row] = unit
+    return matrix
+
+
+def dot(unit_a: Optional[np.ndarray], unit_b: Optional[np.ndarray]) -> float:
+    """Similarity of two normalized vectors; 0.0 if either is missing or the widths differ."""
+    if unit_a is None or unit_b is None or unit_a.shape != unit_b.shape:
+        return 0.0
+    return float(unit_a @ unit_b)
+
+
+def one_to_many(unit_query: Optional[np.ndarray], unit_matrix: np.ndarray) -> np.ndarray:
+    """Similarity of one normalized vector to every row of a normalized matrix."""
+    if unit_query is None or unit_matrix.ndim != 2 or unit_matrix.shape[1] != unit_query.shape[0]:
+        return np.zeros(len(unit_matrix), dtype=DTYPE)
+    return unit_matrix @ unit_query
+
+
+def many_to_many(unit_a: np.ndarray, unit_b: np.ndarray) -> np.ndarray:
+    """(len(unit_a) x len(unit_b)) similarities between the rows of two normalized matrices."""
+    if unit_a.shape[1] != unit_b.shape[1]:
+        return np.zeros((len(unit_a), len(unit_b)), dtype=DTYPE)
+    return unit_a @ unit_b.T
+
+
+def cosine(vec1: Any, vec2: Any) -> float:
+    """
+    Cosine similarity of two raw vectors (lists or arrays). 0.0 when either is
+    missing or zero, or when their widths differ.
+    """
+    return dot(normalize(vec1), normalize(vec2))
+
+
+def cosine_one_to_many(vector: Any, vectors: List[Any]) -> np.ndarray:
+    """Cosine similarity of one raw vector to each of many, aligned with `vectors`."""
+    unit_query = normalize(vector)
+    if unit_query is None:
+        return np.zeros(len(vectors), dtype=DTYPE)
+    return one_to_many(unit_query, normalize_rows(vectors, dimension=unit_query.shape[0]))
@@ -0,0 +1,68 @@
+# FILE: backend/agent_core/term_index.py
+#
+# PURPOSE:
+# An Aho-Corasick automaton over a fixed vocabulary of lowercased terms (client
+# keywords and locations). `scan` walks a listing's text once and returns every
+# term that occurs in it as a substring, so matching costs grow with the length
+# of the text rather than with the number of clients and terms. Results are
+# exactly those of `term in text` for each term.
+
+from collections import deque
+from typing import Dict, List, Sequence, Set
+
+
+class TermIndex:
+    """Substring matcher for many terms at once; terms are identified by their index in `terms`."""
+
+    def __init__(self, terms: Sequence[str]):
+        self.terms = list(terms)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._output: List[List[int]] = [[]]
+        # The empty string is a substring of every text, including the empty one.
+        self._always: List[int] = []
+
+        for term_id, term in enumerate(self.terms):
+            if not term:
+                self._always.append(term_id)
+                continue
+            state = 0
+            for char in term:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._output.append([])
+                state = next_state
+            self._output[state].append(term_id)
+
+        # Failure links, breadth first; each state also inherits the output of its failure state.
+        self._fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+                queue.append(next_state)
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def scan(self, text: str) -> Set[int]:
+        """The ids of every term that is a substring of `text`, found in one pass over it."""
+        found = set(self._always)
+        if len(self._goto) == 1:
+            return found
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found.update(output[state])
+        return found
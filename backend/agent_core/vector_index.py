@@ -0,0 +1,299 @@
+# FILE: backend/agent_core/vector_index.py
+#
+# PURPOSE:
+# The FAISS index behind semantic client search. A ClientVectorIndex holds one user's
+# client embeddings as a read-only, memory-mapped snapshot plus a small in-memory
+# delta for recent writes. The snapshot's index type comes from an IndexSpec, so a
+# deployment can trade exact (flat) search for approximate IVF or HNSW search once
+# its shards are large enough for that to pay off.
+
+import faiss
+import numpy as np
+import logging
+import json
+import math
+import os
+from datetime import datetime, timezone
+from typing import List, Dict, Optional, Set, Tuple
+from uuid import UUID, uuid4
+
+from pydantic import BaseModel, ConfigDict
+
+DIMENSION = 1536
+SNAPSHOT_NAME = "client_vectors"
+INDEX_TYPES = ("flat", "ivf_flat", "ivf_pq", "hnsw")
+
+
+def _to_index_id(client_id: UUID) -> int:
+    """FAISS ids are int64; the low 63 bits of a UUID4 are effectively unique."""
+    return client_id.int & 0x7FFF_FFFF_FFFF_FFFF
+
+
+# --- Index Factory ---
+
+class IndexSpec(BaseModel):
+    """
+    Describes the FAISS index a snapshot is built with and how it is searched.
+    Snapshots smaller than min_vectors are always flat: exact search is already fast
+    there, and IVF/PQ need a few thousand vectors to train well.
+    """
+    model_config = ConfigDict(frozen=True)
+
+    index_type: str = "flat"
+    nlist: int = 0  # IVF cells; 0 derives it from the corpus size
+    pq_m: int = 64  # PQ sub-quantizers; must divide the dimension
+    hnsw_m: int = 32  # HNSW graph degree
+    nprobe: int = 16  # IVF cells visited per query
+    ef_search: int = 64  # HNSW candidate list size per query
+    refine_factor: int = 10  # PQ candidates fetched per result, then re-ranked exactly
+    min_vectors: int = 20_000
+
+    @classmethod
+    def from_settings(cls, settings) -> "IndexSpec":
+        index_type = settings.VECTOR_INDEX_TYPE.lower()
+        if index_type not in INDEX_TYPES:
+            logging.error(f"VECTOR INDEX: Unknown VECTOR_INDEX_TYPE '{settings.VECTOR_INDEX_TYPE}'. Falling back to flat.")
+            index_type = "flat"
+        return cls(
+            index_type=index_type,
+            nlist=settings.VECTOR_INDEX_NLIST,
+            pq_m=settings.VECTOR_INDEX_PQ_M,
+            hnsw_m=settings.VECTOR_INDEX_HNSW_M,
+            nprobe=settings.VECTOR_INDEX_NPROBE,
+            ef_search=settings.VECTOR_INDEX_EF_SEARCH,
+            refine_factor=settings.VECTOR_INDEX_REFINE_FACTOR,
+            min_vectors=settings.VECTOR_INDEX_ANN_MIN_VECTORS,
+        )
+
+    def factory_string(self, num_vectors: int) -> str:
+        """The faiss.index_factory description for a snapshot of num_vectors."""
+        if self.index_type == "flat" or num_vectors < self.min_vectors:
+            return "Flat"
+        if self.index_type == "hnsw":
+            return f"HNSW{self.hnsw_m}"
+        # ~4*sqrt(n) cells, keeping at least 39 training points per centroid.
+        nlist = self.nlist or int(4 * math.sqrt(num_vectors))
+        nlist = max(1, min(nlist, num_vectors // 39))
+        if self.index_type == "ivf_pq":
+            return f"IVF{nlist},PQ{self.pq_m}"
+        return f"IVF{nlist},Flat"
+
+    def build(self, dimension: int, vectors: np.ndarray, ids: np.ndarray) -> faiss.Index:
+        """Trains (if needed) and fills an id-mapped inner-product index."""
+        inner = faiss.index_factory(dimension, self.factory_string(len(ids)), faiss.METRIC_INNER_PRODUCT)
+        if isinstance(inner, faiss.IndexIVFPQ):
+            # Polysemous codes only help Hamming-distance filtering, which isn't used; skip training them.
+            inner.do_polysemous_training = False
+        index = faiss.IndexIDMap(inner)
+        if len(ids):
+            if not index.is_trained:
+                index.train(vectors)
+            index.add_with_ids(vectors, ids)
+        return index
+
+    def search_params(self, index: faiss.Index, selector: Optional[faiss.IDSelector]) -> faiss.SearchParameters:
+        """Search parameters matching the type the index was actually built as."""
+        inner = faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap) else index
+        if isinstance(inner, faiss.IndexIVF):
+            return faiss.SearchParametersIVF(sel=selector, nprobe=self.nprobe)
+        if isinstance(inner, faiss.IndexHNSW):
+            return faiss.SearchParametersHNSW(sel=selector, efSearch=self.ef_search)
+        return faiss.SearchParameters(sel=selector)
+
+
+# --- Vector Index ---
+
+class ClientVectorIndex:
+    """
+    Cosine-similarity index over client embeddings.
+
+    The bulk of the vectors live in a read-only snapshot that is memory-mapped from
+    disk, so boot time and resident memory don't grow with the corpus. Writes land in
+    a small in-memory delta index; snapshot vectors that were replaced or deleted are
+    tombstoned and excluded from searches. save() folds the delta into a new snapshot.
+    """
+
+    def __init__(self, dimension: int = DIMENSION, spec: Optional[IndexSpec] = None):
+        self.dimension = dimension
+        self.spec = spec or IndexSpec()
+        self.watermark: Optional[datetime] = None
+        self.last_synced_at = 0.0
+        self.reset()
+
+    def reset(self):
+        """Drops every vector, including the snapshot."""
+        self.live = faiss.IndexIDMap(faiss.IndexFlatIP(self.dimension))
+        self.live_client_ids: Dict[int, UUID] = {}
+        self.tombstones: Set[int] = set()
+        self._search_params: Optional[faiss.SearchParameters] = None
+        self._refine = False
+        self.snapshot: Optional[faiss.Index] = None
+        # Sorted by FAISS id; column 0 is the id, columns 1-2 the client UUID bytes.
+        self.snapshot_id_map = np.empty((0, 3), dtype=np.int64)
+        # Normalized vectors, row-aligned with snapshot_id_map. Used to rebuild on save,
+        # since lossy (PQ) or graph (HNSW) indexes can't hand their vectors back exactly.
+        self.snapshot_vectors = np.empty((0, self.dimension), dtype='float32')
+
+    def use_spec(self, spec: IndexSpec):
+        """Applies new search-time tuning; the snapshot keeps its type until the next save."""
+        self.spec = spec
+        self._search_params = None
+
+    @property
+    def ntotal(self) -> int:
+        snapshot_total = self.snapshot.ntotal if self.snapshot is not None else 0
+        return snapshot_total - len(self.tombstones) + self.live.ntotal
+
+    def _snapshot_position(self, index_id: int) -> Optional[int]:
+        ids = self.snapshot_id_map[:, 0]
+        position = int(np.searchsorted(ids, index_id))
+        if position < len(ids) and ids[position] == index_id:
+            return position
+        return None
+
+    def _snapshot_client_id(self, index_id: int) -> UUID:
+        position = self._snapshot_position(index_id)
+        return UUID(bytes=np.ascontiguousarray(self.snapshot_id_map[position, 1:]).tobytes())
+
+    def add(self, client_ids: List[UUID], embeddings: np.ndarray):
+        """Adds or replaces the vectors for many clients at once."""
+        if not client_ids:
+            return
+        for client_id in client_ids:
+            self.remove(client_id)
+        vectors = np.ascontiguousarray(embeddings, dtype='float32')
+        faiss.normalize_L2(vectors)
+        index_ids = np.array([_to_index_id(client_id) for client_id in client_ids], dtype=np.int64)
+        self.live.add_with_ids(vectors, index_ids)
+        self.live_client_ids.update(zip(index_ids.tolist(), client_ids))
+
+    def upsert(self, client_id: UUID, embedding: List[float]):
+        vector = np.asarray([embedding], dtype='float32')
+        if vector.shape != (1, self.dimension):
+            logging.warning(f"VECTOR INDEX: Skipping embedding of width {vector.shape[-1]} for client {client_id}.")
+            return
+        self.add([client_id], vector)
+
+    def remove(self, client_id: UUID):
+        index_id = _to_index_id(client_id)
+        if self.live_client_ids.pop(index_id, None) is not None:
+            self.live.remove_ids(np.array([index_id], dtype=np.int64))
+        if index_id not in self.tombstones and self._snapshot_position(index_id) is not None:
+            self.tombstones.add(index_id)
+            self._search_params = None
+
+    def search(self, query_vector: np.ndarray, k: int) -> List[Tuple[UUID, float]]:
+        """Returns up to k (client_id, similarity) pairs for a normalized query, best first."""
+        results: List[Tuple[UUID, float]] = []
+        if self.live.ntotal:
+            similarities, ids = self.live.search(query_vector, min(k, self.live.ntotal))
+            results.extend(
+                (self.live_client_ids[i], float(sim)) for i, sim in zip(ids[0].tolist(), similarities[0]) if i != -1
+            )
+        if self.snapshot is not None and self.snapshot.ntotal:
+            if self._search_params is None:
+                selector = None
+                if self.tombstones:
+                    tombstoned = np.fromiter(self.tombstones, dtype=np.int64, count=len(self.tombstones))
+                    selector = faiss.IDSelectorNot(faiss.IDSelectorBatch(tombstoned))
+                self._search_params = self.spec.search_params(self.snapshot, selector)
+            fetch = k * self.spec.refine_factor if self._refine else k
+            similarities, ids = self.snapshot.search(query_vector, min(fetch, self.snapshot.ntotal), params=self._search_params)
+            hits = ids[0][ids[0] != -1]
+            positions = np.searchsorted(self.snapshot_id_map[:, 0], hits)
+            if self._refine and len(hits):
+                # PQ distances are approximate; re-score the candidates against the raw vectors,
+                # reading the mmapped rows in file order.
+                positions = np.sort(positions)
+                similarities = [np.asarray(self.snapshot_vectors[positions]) @ query_vector[0]]
+            for position, sim in zip(positions.tolist(), similarities[0]):
+                client_id = UUID(bytes=np.ascontiguousarray(self.snapshot_id_map[position, 1:]).tobytes())
+                results.append((client_id, float(sim)))
+        results.sort(key=lambda result: result[1], reverse=True)
+        return results[:k]
+
+    def save(self, directory: str):
+        """
+        Writes the snapshot plus delta as a new snapshot built to this index's spec,
+        then swaps the manifest so readers never see a half-written index. Afterwards
+        the index serves from the new snapshot.
+        """
+        id_map_blocks, vector_blocks = [], []
+        if len(self.snapshot_id_map):
+            tombstoned = np.fromiter(self.tombstones, dtype=np.int64, count=len(self.tombstones))
+            keep = ~np.isin(self.snapshot_id_map[:, 0], tombstoned)
+            id_map_blocks.append(np.asarray(self.snapshot_id_map)[keep])
+            vector_blocks.append(np.asarray(self.snapshot_vectors)[keep])
+        if self.live.ntotal:
+            live_ids = faiss.vector_to_array(self.live.id_map)
+            live_id_map = np.empty((len(live_ids), 3), dtype=np.int64)
+            live_id_map[:, 0] = live_ids
+            live_id_map[:, 1:] = np.frombuffer(
+                b"".join(self.live_client_ids[i].bytes for i in live_ids.tolist()), dtype=np.int64
+            ).reshape(-1, 2)
+            id_map_blocks.append(live_id_map)
+            vector_blocks.append(self.live.index.reconstruct_n(0, self.live.ntotal))
+
+        id_map = np.concatenate(id_map_blocks) if id_map_blocks else np.empty((0, 3), dtype=np.int64)
+        vectors = np.concatenate(vector_blocks) if vector_blocks else np.empty((0, self.dimension), dtype='float32')
+        order = np.argsort(id_map[:, 0])
+        id_map, vectors = id_map[order], np.ascontiguousarray(vectors[order])
+        # Vectors were normalized on the way in, so they are indexed as-is.
+        snapshot = self.spec.build(self.dimension, vectors, np.ascontiguousarray(id_map[:, 0]))
+
+        os.makedirs(directory, exist_ok=True)
+        token = uuid4().hex
+        faiss.write_index(snapshot, os.path.join(directory, f"{SNAPSHOT_NAME}.{token}.faiss"))
+        np.save(os.path.join(directory, f"{SNAPSHOT_NAME}.{token}.ids.npy"), id_map)
+        np.save(os.path.join(directory, f"{SNAPSHOT_NAME}.{token}.vectors.npy"), vectors)
+
+        manifest_path = os.path.join(directory, f"{SNAPSHOT_NAME}.json")
+        previous_token = _read_manifest(directory).get("token")
+        manifest = {
+            "token": token,
+            "dimension": self.dimension,
+            "factory": self.spec.factory_string(len(id_map)),
+            "watermark": self.watermark.isoformat() if self.watermark else None,
+        }
+        with open(f"{manifest_path}.tmp", "w") as f:
+            json.dump(manifest, f)
+        os.replace(f"{manifest_path}.tmp", manifest_path)
+
+        if previous_token and previous_token != token:
+            for suffix in ("faiss", "ids.npy", "vectors.npy"):
+                try:
+                    os.remove(os.path.join(directory, f"{SNAPSHOT_NAME}.{previous_token}.{suffix}"))
+                except FileNotFoundError:
+                    pass
+        self.load(directory)
+
+    def load(self, directory: str) -> bool:
+        """Memory-maps the snapshot named by the manifest. Returns False if there is none."""
+        manifest = _read_manifest(directory)
+        if not manifest.get("token") or manifest.get("dimension") != self.dimension:
+            return False
+        token = manifest["token"]
+        try:
+            snapshot = faiss.read_index(os.path.join(directory, f"{SNAPSHOT_NAME}.{token}.faiss"), faiss.IO_FLAG_MMAP)
+            id_map = np.load(os.path.join(directory, f"{SNAPSHOT_NAME}.{token}.ids.npy"), mmap_mode='r')
+            vectors = np.load(os.path.join(directory, f"{SNAPSHOT_NAME}.{token}.vectors.npy"), mmap_mode='r')
+        except Exception as e:
+            logging.error(f"VECTOR INDEX: Could not load snapshot {token}: {e}")
+            return False
+
+        self.reset()
+        self.snapshot = snapshot
+        self.snapshot_id_map = id_map
+        self.snapshot_vectors = vectors
+        self._refine = isinstance(faiss.downcast_index(snapshot.index), faiss.IndexIVFPQ)
+        watermark = datetime.fromisoformat(manifest["watermark"]) if manifest.get("watermark") else None
+        self.watermark = watermark.replace(tzinfo=timezone.utc) if watermark and not watermark.tzinfo else watermark
+        return True
+
+
+def _read_manifest(directory: str) -> dict:
+    try:
+        with open(os.path.join(directory, f"{SNAPSHOT_NAME}.json")) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
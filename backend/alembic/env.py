@@ -31,9 +31,9 @@ if config.config_file_name is not None:
 # autogenerate can see them and compare them against the database.
 from data.models.user import User
 from data.models.client import Client
-from data.models.message import Message, ScheduledMessage
-from data.models.campaign import CampaignBriefing
-from data.models.resource import Resource, ContentResource
+from data.models.message import Message, ScheduledMessage, ConversationState
+from data.models.campaign import CampaignBriefing, CampaignAudienceMember
+from data.models.resource import Resource, ContentResource, ListingEmbedding, EmbeddingCacheEntry
 from data.models.event import MarketEvent, GlobalMlsEvent, PipelineRun # CORRECTED IMPORT
 from data.models.feedback import NegativePreference
 from data.models.faq import Faq
@@ -0,0 +1,71 @@
+"""Add campaign_audience_member table and backfill it from matched_audience
+
+Revision ID: add_campaign_audience_member_table
+Revises: add_conversation_state_table
+Create Date: 2026-10-16 16:40:00.000000
+
+"""
+from typing import Sequence, Union
+import uuid
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_campaign_audience_member_table'
+down_revision: Union[str, Sequence[str], None] = 'add_conversation_state_table'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH_SIZE = 500
+
+
+def _member_rows(campaign_id, matched_audience) -> list:
+    """Same rules as crm._audience_member_rows: skip invalid ids, keep the highest score per client."""
+    scores = {}
+    for audience_member in matched_audience or []:
+        if not isinstance(audience_member, dict):
+            continue
+        try:
+            client_id = uuid.UUID(str(audience_member.get('client_id')))
+        except ValueError:
+            continue
+        try:
+            score = int(audience_member.get('match_score') or 0)
+        except (TypeError, ValueError):
+            score = 0
+        scores[client_id] = max(score, scores.get(client_id, score))
+    return [{'campaign_id': campaign_id, 'client_id': client_id, 'score': score} for client_id, score in scores.items()]
+
+
+def upgrade() -> None:
+    members = op.create_table('campaign_audience_member',
+    sa.Column('campaign_id', sa.Uuid(), nullable=False),
+    sa.Column('client_id', sa.Uuid(), nullable=False),
+    sa.Column('score', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['campaign_id'], ['campaignbriefing.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('campaign_id', 'client_id')
+    )
+    op.create_index('ix_campaign_audience_member_client_campaign', 'campaign_audience_member', ['client_id', 'campaign_id'], unique=False)
+
+    # Backfill from the JSON audiences in primary-key order, BACKFILL_BATCH_SIZE campaigns at a time.
+    campaigns = sa.table('campaignbriefing', sa.column('id', sa.Uuid()), sa.column('matched_audience', sa.JSON()))
+    connection = op.get_bind()
+    last_id = None
+    while True:
+        query = sa.select(campaigns.c.id, campaigns.c.matched_audience)
+        if last_id is not None:
+            query = query.where(campaigns.c.id > last_id)
+        rows = connection.execute(query.order_by(campaigns.c.id).limit(BACKFILL_BATCH_SIZE)).all()
+        if not rows:
+            break
+        member_rows = [member for campaign_id, audience in rows for member in _member_rows(campaign_id, audience)]
+        if member_rows:
+            connection.execute(members.insert(), member_rows)
+        last_id = rows[-1][0]
+
+
+def downgrade() -> None:
+    op.drop_index('ix_campaign_audience_member_client_campaign', table_name='campaign_audience_member')
+    op.drop_table('campaign_audience_member')
@@ -0,0 +1,28 @@
+"""Add embedding_updated_at to client
+
+Revision ID: add_client_embedding_updated_at
+Revises: add_listingembedding_table
+Create Date: 2026-10-16 11:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_client_embedding_updated_at'
+down_revision: Union[str, Sequence[str], None] = 'add_listingembedding_table'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('client', sa.Column('embedding_updated_at', sa.DateTime(), nullable=True))
+    op.create_index(op.f('ix_client_embedding_updated_at'), 'client', ['embedding_updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_client_embedding_updated_at'), table_name='client')
+    op.drop_column('client', 'embedding_updated_at')
@@ -0,0 +1,28 @@
+"""Add client.scoring_profile
+
+Revision ID: add_client_scoring_profile
+Revises: add_marketevent_user_entity_unique
+Create Date: 2026-10-16 18:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_client_scoring_profile'
+down_revision: Union[str, Sequence[str], None] = 'add_marketevent_user_entity_unique'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Profiles are derived by application code; backfill with rebuild_scoring_profiles.py.
+    # Until then the scorer derives missing profiles on the fly.
+    op.add_column('client', sa.Column('scoring_profile', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('client', 'scoring_profile')
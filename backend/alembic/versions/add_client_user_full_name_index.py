@@ -0,0 +1,25 @@
+"""Add (user_id, full_name, id) index to client
+
+Revision ID: add_client_user_full_name_index
+Revises: store_embeddings_as_float32
+Create Date: 2026-10-16 14:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_client_user_full_name_index'
+down_revision: Union[str, Sequence[str], None] = 'store_embeddings_as_float32'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_client_user_full_name', 'client', ['user_id', 'full_name', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_client_user_full_name', table_name='client')
@@ -0,0 +1,27 @@
+"""Add contentresource.embedding
+
+Revision ID: add_content_resource_embedding
+Revises: add_embedding_cache_table
+Create Date: 2026-10-16 19:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_content_resource_embedding'
+down_revision: Union[str, Sequence[str], None] = 'add_embedding_cache_table'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing resources are embedded the first time semantic matching reads them.
+    op.add_column('contentresource', sa.Column('embedding', sa.LargeBinary(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('contentresource', 'embedding')
@@ -0,0 +1,43 @@
+"""Add conversation_state table
+
+Revision ID: add_conversation_state_table
+Revises: add_message_inbox_indexes
+Create Date: 2026-10-16 16:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_conversation_state_table'
+down_revision: Union[str, Sequence[str], None] = 'add_message_inbox_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Backfill afterwards with `python rebuild_conversation_state.py`.
+    op.create_table('conversation_state',
+    sa.Column('client_id', sa.Uuid(), nullable=False),
+    sa.Column('user_id', sa.Uuid(), nullable=False),
+    sa.Column('last_message_id', sa.Uuid(), nullable=True),
+    sa.Column('last_message_at', sa.DateTime(), nullable=True),
+    sa.Column('preview', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('direction', postgresql.ENUM(name='messagedirection', create_type=False), nullable=True),
+    sa.Column('source', postgresql.ENUM(name='messagesource', create_type=False), nullable=True),
+    sa.Column('unread_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['client_id'], ['client.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('client_id')
+    )
+    op.create_index('ix_conversation_state_user_last_message', 'conversation_state', ['user_id', 'last_message_at', 'client_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_conversation_state_user_last_message', table_name='conversation_state')
+    op.drop_table('conversation_state')
@@ -0,0 +1,36 @@
+"""Add embeddingcacheentry table
+
+Revision ID: add_embedding_cache_table
+Revises: add_client_scoring_profile
+Create Date: 2026-10-16 19:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_embedding_cache_table'
+down_revision: Union[str, Sequence[str], None] = 'add_client_scoring_profile'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'embeddingcacheentry',
+        sa.Column('content_hash', sqlmodel.sql.sqltypes.AutoString(length=64), nullable=False),
+        sa.Column('model', sqlmodel.sql.sqltypes.AutoString(length=100), nullable=False),
+        sa.Column('embedding', sa.LargeBinary(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('content_hash'),
+    )
+    op.create_index(op.f('ix_embeddingcacheentry_created_at'), 'embeddingcacheentry', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_embeddingcacheentry_created_at'), table_name='embeddingcacheentry')
+    op.drop_table('embeddingcacheentry')
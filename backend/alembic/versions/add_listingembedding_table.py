@@ -0,0 +1,37 @@
+"""Add listingembedding table
+
+Revision ID: add_listingembedding_table
+Revises: cbe7cd5783fa
+Create Date: 2026-10-16 09:12:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_listingembedding_table'
+down_revision: Union[str, Sequence[str], None] = 'cbe7cd5783fa'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('listingembedding',
+    sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('entity_id', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('remarks_hash', sqlmodel.sql.sqltypes.AutoString(length=64), nullable=False),
+    sa.Column('embedding', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('entity_id', 'remarks_hash', name='uq_listingembedding_entity_remarks')
+    )
+    op.create_index(op.f('ix_listingembedding_entity_id'), 'listingembedding', ['entity_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_listingembedding_entity_id'), table_name='listingembedding')
+    op.drop_table('listingembedding')
@@ -0,0 +1,38 @@
+"""Make MarketEvent unique per user, listing and event type
+
+Revision ID: add_marketevent_user_entity_unique
+Revises: add_campaign_audience_member_table
+Create Date: 2026-10-16 17:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_marketevent_user_entity_unique'
+down_revision: Union[str, Sequence[str], None] = 'add_campaign_audience_member_table'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Keep the oldest of any duplicates the per-event pipeline may have raced into existence.
+    op.execute(sa.text("""
+        DELETE FROM marketevent WHERE id IN (
+            SELECT id FROM (
+                SELECT id, ROW_NUMBER() OVER (
+                    PARTITION BY user_id, entity_id, event_type ORDER BY created_at, id
+                ) AS duplicate_rank
+                FROM marketevent
+            ) ranked
+            WHERE duplicate_rank > 1
+        )
+    """))
+    op.create_unique_constraint('ux_marketevent_user_entity_type', 'marketevent', ['user_id', 'entity_id', 'event_type'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('ux_marketevent_user_entity_type', 'marketevent', type_='unique')
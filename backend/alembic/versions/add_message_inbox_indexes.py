@@ -0,0 +1,27 @@
+"""Add conversation inbox indexes to message
+
+Revision ID: add_message_inbox_indexes
+Revises: add_client_user_full_name_index
+Create Date: 2026-10-16 15:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_message_inbox_indexes'
+down_revision: Union[str, Sequence[str], None] = 'add_client_user_full_name_index'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_message_user_client_created', 'message', ['user_id', 'client_id', 'created_at'], unique=False)
+    op.create_index('ix_message_client_unread', 'message', ['client_id', 'direction', 'status'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_message_client_unread', table_name='message')
+    op.drop_index('ix_message_user_client_created', table_name='message')
@@ -0,0 +1,34 @@
+"""Add scheduledmessage.claimed_at and a due-message index
+
+Revision ID: add_scheduled_message_claims
+Revises: add_content_resource_embedding
+Create Date: 2026-10-16 21:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_scheduled_message_claims'
+down_revision: Union[str, Sequence[str], None] = 'add_content_resource_embedding'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('scheduledmessage', sa.Column('claimed_at', sa.DateTime(), nullable=True))
+    # Messages already queued as ETA tasks count as claimed when they fall due, so
+    # the scheduler re-claims them once the lease passes if the task was lost.
+    op.execute(sa.text("""
+        UPDATE scheduledmessage SET claimed_at = scheduled_at_utc
+        WHERE status = 'PENDING' AND celery_task_id IS NOT NULL AND claimed_at IS NULL
+    """))
+    op.create_index('ix_scheduledmessage_status_scheduled_at', 'scheduledmessage', ['status', 'scheduled_at_utc'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_scheduledmessage_status_scheduled_at', table_name='scheduledmessage')
+    op.drop_column('scheduledmessage', 'claimed_at')
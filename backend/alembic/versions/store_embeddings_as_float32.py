@@ -0,0 +1,68 @@
+"""Store client and negative preference embeddings as packed float32 bytes
+
+Revision ID: store_embeddings_as_float32
+Revises: add_client_embedding_updated_at
+Create Date: 2026-10-16 13:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import numpy as np
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'store_embeddings_as_float32'
+down_revision: Union[str, Sequence[str], None] = 'add_client_embedding_updated_at'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (table, embedding column) pairs converted by this migration.
+EMBEDDING_COLUMNS = [('client', 'notes_embedding'), ('negativepreference', 'dismissed_embedding')]
+BACKFILL_BATCH_SIZE = 500
+VECTOR_DTYPE = np.dtype('<f4')
+
+
+def _to_bytes(embedding):
+    return np.asarray(embedding, dtype=VECTOR_DTYPE).tobytes() if embedding is not None else None
+
+
+def _to_list(embedding):
+    return np.frombuffer(embedding, dtype=VECTOR_DTYPE).tolist() if embedding is not None else None
+
+
+def _convert(table_name: str, column_name: str, source_type, target_type, convert) -> None:
+    """
+    Adds a temporary column of `target_type`, backfills it from `column_name` in
+    primary-key order, BACKFILL_BATCH_SIZE rows per statement batch, then swaps it in.
+    """
+    temp_name = f'{column_name}_new'
+    op.add_column(table_name, sa.Column(temp_name, target_type, nullable=True))
+
+    table = sa.table(table_name, sa.column('id', sa.Uuid()), sa.column(column_name, source_type), sa.column(temp_name, target_type))
+    update = table.update().where(table.c.id == sa.bindparam('row_id')).values({temp_name: sa.bindparam('value')})
+    connection = op.get_bind()
+    last_id = None
+    while True:
+        query = sa.select(table.c.id, table.c[column_name]).where(table.c[column_name].is_not(None))
+        if last_id is not None:
+            query = query.where(table.c.id > last_id)
+        rows = connection.execute(query.order_by(table.c.id).limit(BACKFILL_BATCH_SIZE)).all()
+        if not rows:
+            break
+        connection.execute(update, [{'row_id': row_id, 'value': convert(value)} for row_id, value in rows])
+        last_id = rows[-1][0]
+
+    op.drop_column(table_name, column_name)
+    op.alter_column(table_name, temp_name, new_column_name=column_name)
+
+
+def upgrade() -> None:
+    for table_name, column_name in EMBEDDING_COLUMNS:
+        _convert(table_name, column_name, sa.JSON(), sa.LargeBinary(), _to_bytes)
+
+
+def downgrade() -> None:
+    for table_name, column_name in EMBEDDING_COLUMNS:
+        _convert(table_name, column_name, sa.LargeBinary(), sa.JSON(), _to_list)
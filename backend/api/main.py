@@ -20,7 +20,8 @@ from backend.api.rest.websockets import router as websockets_router
 from backend.api.rest.api_endpoints import api_router
 from backend.api.webhooks.router import webhooks_router
 from backend.common.config import get_settings
-from backend.agent_core import semantic_service
+# Same module object the routers and CRM use, so they all see the index loaded here.
+from agent_core import semantic_service
 from sqlmodel import Session, select
 from backend.data.database import engine
 from backend.data.seed import seed_database
@@ -137,6 +138,7 @@ async def lifespan(app: FastAPI):
     yield # The application is now running
 
     print("--- Application Shutdown ---")
+    semantic_service.save_vector_index()
     # --- ADDED: Cleanly shutdown the listener task and Redis connection ---
     if listener_task and not listener_task.done():
         listener_task.cancel()
@@ -26,6 +26,7 @@ import pytz
 from datetime import datetime, timedelta, date
 
 from agent_core import llm_client
+from agent_core.brain.nudge_engine import _get_resource_embedding
 
 router = APIRouter(
     prefix="/campaigns",
@@ -106,7 +107,11 @@ async def record_dismissal_feedback_task(campaign_id: UUID, user_id: UUID):
             logging.warning(f"FEEDBACK_TASK: No embeddable text found for resource {resource.id}.")
             return
 
-        resource_embedding = await llm_client.generate_embedding(text_to_embed)
+        if resource.resource_type == "property":
+            # Reuse the cached listing embedding so the dismissal is recorded in the same vector the scorer compares against.
+            resource_embedding = await _get_resource_embedding(resource, session)
+        else:
+            resource_embedding = await llm_client.generate_embedding(text_to_embed)
         if not resource_embedding:
             return
 
@@ -199,6 +204,7 @@ async def get_all_campaigns(
                     if existing.status != CampaignStatus.DRAFT:
                         existing.status = CampaignStatus.DRAFT
                     session.add(existing)
+                    crm_service.set_campaign_audience(existing, session)
                     newly_created_content_briefings.append(existing)
                     continue
 
@@ -217,6 +223,7 @@ async def get_all_campaigns(
                     status=CampaignStatus.DRAFT,
                 )
                 crm_service.save_campaign_briefing(new_briefing, session=session)
+                crm_service.set_campaign_audience(new_briefing, session)
                 newly_created_content_briefings.append(new_briefing)
 
             session.commit()
@@ -402,6 +409,7 @@ def update_campaign_audience(
     
     campaign.matched_audience = [mc.model_dump(mode='json') for mc in new_audience]
     session.add(campaign)
+    crm_service.set_campaign_audience(campaign, session)
     session.commit()
     session.refresh(campaign)
     return campaign
@@ -4,7 +4,7 @@
 import logging
 import json # Correctly placed import
 from datetime import datetime
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, status, Depends, Query
 from typing import List, Optional, Dict, Any
 from uuid import UUID
 from pydantic import BaseModel
@@ -17,7 +17,7 @@ from common.config import get_settings
 from data.models.user import User, UserUpdate
 from api.security import get_current_user_from_token
 
-from data.models.client import Client, ClientCreate, ClientUpdate, ClientTagUpdate
+from data.models.client import Client, ClientCreate, ClientUpdate, ClientTagUpdate, ClientSummary
 from data.models.message import ScheduledMessage
 from data import crm as crm_service
 from data.database import engine
@@ -241,9 +241,18 @@ async def update_client_tags_endpoint(client_id: UUID, tag_data: ClientTagUpdate
         raise HTTPException(status_code=404, detail="Client not found.")
     return updated_client
 
-@router.get("", response_model=List[Client])
-async def get_all_clients_endpoint(current_user: User = Depends(get_current_user_from_token)):
-    return crm_service.get_all_clients(user_id=current_user.id)
+@router.get("", response_model=List[ClientSummary])
+async def get_all_clients_endpoint(
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    after: Optional[UUID] = None,
+    current_user: User = Depends(get_current_user_from_token)
+):
+    """
+    Lists the user's clients as summaries, ordered by name. Full records (notes,
+    preferences) come from GET /clients/{client_id}. Page with `limit`, passing the
+    last returned id as `after` for the next page.
+    """
+    return crm_service.get_client_summaries(user_id=current_user.id, limit=limit, after=after)
 
 @router.get("/debug/list-ids")
 async def list_client_ids(current_user: User = Depends(get_current_user_from_token)):
@@ -292,17 +301,11 @@ async def get_nudges_for_client(
     client_nudges = []
 
     with Session(engine) as session:
-        all_draft_campaigns = crm_service.get_new_campaign_briefings_for_user(user_id=current_user.id, session=session)
-
-        for campaign in all_draft_campaigns:
-            is_match = any(
-                str(audience_member.get("client_id")) == str(client_id)
-                for audience_member in campaign.matched_audience
-            )
+        client_campaigns = crm_service.get_draft_campaigns_by_audience_client(
+            user_id=current_user.id, client_id=client_id, session=session
+        )
 
-            if not is_match:
-                continue
-            
+        for _, campaign in client_campaigns:
             nudge_resource = NudgeResource(attributes={})
             if campaign.triggering_resource_id:
                 resource = crm_service.get_resource_by_id(
@@ -13,6 +13,7 @@ from data.models.user import User
 from data.models.resource import ContentResource, ContentResourceCreate, ContentResourceUpdate
 from api.security import get_current_user_from_token
 from data import crm as crm_service
+from agent_core import content_resource_service
 
 router = APIRouter()
 
@@ -51,6 +52,7 @@ async def create_content_resource(
         user_id=current_user.id,
         **resource_data.model_dump()
     )
+    await content_resource_service.embed_content_resource(new_resource)
     
     session.add(new_resource)
     session.commit()
@@ -85,6 +87,8 @@ async def update_content_resource(
     update_data = resource_data.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(resource, field, value)
+    if "title" in update_data or "description" in update_data:
+        await content_resource_service.embed_content_resource(resource)
     
     session.add(resource)
     session.commit()
@@ -434,6 +438,7 @@ async def send_content_to_clients(
                 sender_type='user'
             )
             session.add(message)
+            crm_service.record_message_in_conversation_state(message, session)
         
         # Increment usage count
         resource.usage_count += len(clients)
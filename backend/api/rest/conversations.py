@@ -2,7 +2,7 @@
 # --- CORRECTED: Uses the new RecommendationSlateResponse model to prevent 500 Internal Server Errors.
 
 import logging
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
 from typing import List, Optional
 import uuid
 from sqlmodel import Session, select
@@ -17,9 +17,6 @@ from pydantic import BaseModel
 from data import crm as crm_service
 from agent_core import orchestrator
 from agent_core import audience_builder
-from sqlalchemy import func
-from data.models.client import Client
-from data.models.message import MessageStatus
 from data.database import get_session
 
 
@@ -60,89 +57,66 @@ class ConversationSearchQuery(BaseModel):
 
 @router.get("/", response_model=List[ConversationSummary])
 def get_conversations(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    cursor: Optional[str] = None,
     db: Session = Depends(get_session),
     current_user: User = Depends(get_current_user_from_token)
 ):
     """
     --- REVISED ---
-    Fetches all clients for the user and formats them as conversation summaries.
-    This ensures that clients with no messages yet still appear in the list.
+    Returns the user's conversation inbox, most recent first. Clients with no
+    messages yet still appear in the list (after those with messages). The whole
+    page comes from one query; when `limit` is given and more rows remain, the
+    X-Next-Cursor response header carries the `cursor` for the next page.
     """
     try:
         logging.info(f"API: Fetching conversations for user {current_user.id}")
-        all_clients = db.exec(
-            select(Client).where(Client.user_id == current_user.id)
-        ).all()
-        logging.info(f"API: Found {len(all_clients)} clients for user {current_user.id}")
-
-        summaries = []
-        for client in all_clients:
-            logging.debug(f"API: Processing client {client.id} ({client.full_name})")
-            # Query for the last message
-            last_message = db.exec(
-                select(Message)
-                .where(Message.client_id == client.id)
-                .order_by(Message.created_at.desc())
-            ).first()
-
-            # Query for unread message count
-            # Use first() to retrieve the count in a version-agnostic way
-            unread_count_tuple = db.exec(
-                select(func.count(Message.id))
-                .where(
-                    Message.client_id == client.id,
-                    Message.direction == MessageDirection.INBOUND,
-                    # --- FIX: Use the correct enum member for unread messages ---
-                    Message.status == MessageStatus.RECEIVED
-                )
-            ).first()
-
-            # Handle both tuple and integer return types from first()
-            if unread_count_tuple is None:
-                unread_count = 0
-            elif isinstance(unread_count_tuple, tuple):
-                unread_count = unread_count_tuple[0] if unread_count_tuple else 0
-            else:
-                # first() returned an integer directly
-                unread_count = unread_count_tuple
-            
-            # Check if the client has any messages at all
-            has_messages = last_message is not None
-
-            # Calculate if client is online based on recent inbound message activity
-            is_online = False
-            if last_message and last_message.direction == MessageDirection.INBOUND:
-                # Check if the last inbound message was within the last 5 minutes
-                message_time = last_message.created_at.replace(tzinfo=timezone.utc) if last_message.created_at.tzinfo is None else last_message.created_at
-                current_time = datetime.now(timezone.utc)
-                time_diff = current_time - message_time
-                is_online = time_diff.total_seconds() < 300  # 5 minutes
-
-            summary = ConversationSummary(
-                id=str(client.id), # Use client ID as the summary ID
-                client_id=client.id,
-                client_name=client.full_name,
-                client_phone=client.phone,
-                last_message=last_message.content if last_message else "No messages yet.",
-                last_message_time=(
-                    last_message.created_at.isoformat() 
-                    if last_message 
-                    else (datetime.now(timezone.utc) - timedelta(days=1)).isoformat()
-                ),
-                unread_count=unread_count,
-                is_online=is_online,
-                has_messages=has_messages,
-                last_message_direction=last_message.direction if last_message else None,
-                last_message_source=last_message.source if last_message else None
-            )
-            summaries.append(summary)
-            
-        logging.info(f"API: Returning {len(summaries)} conversation summaries for user {current_user.id}")
-        return summaries
+        inbox, next_cursor = crm_service.get_conversation_inbox(
+            user_id=current_user.id, limit=limit, cursor=cursor, session=db
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
     except Exception as e:
         logging.error(f"API: Error in get_conversations for user {current_user.id}: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Failed to fetch conversations")
 
+    summaries = []
+    for row in inbox:
+        last_message_time = row["last_message_time"]
+        has_messages = last_message_time is not None
+        if has_messages and last_message_time.tzinfo is None:
+            last_message_time = last_message_time.replace(tzinfo=timezone.utc)
+
+        # Calculate if client is online based on recent inbound message activity
+        is_online = False
+        if has_messages and row["last_message_direction"] == MessageDirection.INBOUND:
+            # Check if the last inbound message was within the last 5 minutes
+            is_online = (datetime.now(timezone.utc) - last_message_time).total_seconds() < 300
+
+        summaries.append(ConversationSummary(
+            id=str(row["client_id"]), # Use client ID as the summary ID
+            client_id=row["client_id"],
+            client_name=row["client_name"],
+            client_phone=row["client_phone"],
+            last_message=row["last_message"] if has_messages else "No messages yet.",
+            last_message_time=(
+                last_message_time.isoformat()
+                if has_messages
+                else (datetime.now(timezone.utc) - timedelta(days=1)).isoformat()
+            ),
+            unread_count=row["unread_count"],
+            is_online=is_online,
+            has_messages=has_messages,
+            last_message_direction=row["last_message_direction"],
+            last_message_source=row["last_message_source"]
+        ))
+
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    logging.info(f"API: Returning {len(summaries)} conversation summaries for user {current_user.id}")
+    return summaries
+
 
 @router.get("/messages/", response_model=ConversationDetailResponse)
 async def get_conversation_history_by_client_id(
@@ -374,6 +348,7 @@ async def mark_conversation_as_read(
                 message.status = 'sent'  # Mark as read
             
             session.add_all(unread_messages)
+            crm_service.reset_conversation_unread(client_id, session)
             session.commit()
             
         logging.info(f"API: Marked {len(unread_messages)} messages as read for client {client_id}")
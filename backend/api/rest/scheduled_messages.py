@@ -78,7 +78,7 @@ async def create_scheduled_message(
         if utc_time <= (datetime.now(timezone.utc) - timedelta(seconds=10)):
             raise HTTPException(status_code=400, detail="Scheduled time must be in the future.")
 
-        # 4. Save the record to the database
+        # 4. Save the record to the database; the scheduler queues its send when it is due
         db_message = ScheduledMessage(
             client_id=message_data.client_id,
             user_id=current_user.id,
@@ -87,19 +87,11 @@ async def create_scheduled_message(
             timezone=target_tz_str, # Store the timezone that was used
             status=MessageStatus.PENDING,
         )
-        session.add(db_message)
-        session.flush()  # Use flush to get the new message ID before committing
-
-        # 5. Create the Celery task and link it to the message
-        from celery_tasks import send_scheduled_message_task
-        task = send_scheduled_message_task.apply_async((str(db_message.id),), eta=utc_time)
-        db_message.celery_task_id = task.id
-        
         session.add(db_message)
         session.commit()
         session.refresh(db_message)
         
-        logging.info(f"API: Successfully scheduled message {db_message.id} with task {task.id}")
+        logging.info(f"API: Successfully scheduled message {db_message.id} for {utc_time.isoformat()}")
         return db_message
 
     except HTTPException:
@@ -117,11 +109,13 @@ async def create_bulk_scheduled_messages(
 ):
     """
     Schedules a message for multiple clients, now using the single timezone from the payload.
+    All rows are written with one bulk insert and no Celery task is queued per
+    message; the scheduled-message dispatcher sends them once they are due.
     """
     if not data.client_ids:
         raise HTTPException(status_code=400, detail="client_ids list cannot be empty.")
 
-    clients = crm_service.get_clients_by_ids(client_ids=data.client_ids, user_id=current_user.id)
+    clients = crm_service.get_clients_by_ids(client_ids=data.client_ids, user_id=current_user.id, session=session)
     if len(clients) != len(data.client_ids):
         raise HTTPException(status_code=403, detail="One or more clients not found or do not belong to the user.")
 
@@ -141,8 +135,8 @@ async def create_bulk_scheduled_messages(
     if utc_time <= (datetime.now(timezone.utc) - timedelta(seconds=10)):
         raise HTTPException(status_code=400, detail="Scheduled time must be in the future.")
 
-    for client in clients:
-        db_message = ScheduledMessage(
+    crm_service.create_scheduled_messages([
+        ScheduledMessage(
             client_id=client.id,
             user_id=current_user.id,
             content=data.content,
@@ -150,14 +144,8 @@ async def create_bulk_scheduled_messages(
             timezone=target_tz_str,
             status=MessageStatus.PENDING,
         )
-        session.add(db_message)
-        session.flush()
-
-        from celery_tasks import send_scheduled_message_task
-        task = send_scheduled_message_task.apply_async((str(db_message.id),), eta=utc_time)
-        db_message.celery_task_id = task.id
-        session.add(db_message)
-
+        for client in clients
+    ], session)
     session.commit()
     return {"detail": f"Successfully scheduled messages for {len(clients)} clients."}
 
@@ -180,16 +168,13 @@ async def update_scheduled_message(
     if db_message.status != MessageStatus.PENDING:
         raise HTTPException(status_code=400, detail="Can only edit messages that are pending.")
 
-    if db_message.celery_task_id:
-        from celery_worker import celery_app
-        celery_app.control.revoke(db_message.celery_task_id)
-
     update_dict = message_data.model_dump(exclude_unset=True)
     db_message.content = update_dict.get("content", db_message.content)
 
-    from celery_tasks import send_scheduled_message_task
-    new_task = send_scheduled_message_task.apply_async((str(db_message.id),), eta=db_message.scheduled_at_utc)
-    db_message.celery_task_id = new_task.id
+    # The claiming task is not revoked: it may be a batch task shared with other
+    # messages. It sees it no longer holds this message's claim and skips it,
+    # and the scheduler claims the message again when it is due.
+    crm_service.release_scheduled_message_claim(db_message)
 
     session.add(db_message)
     session.commit()
@@ -214,10 +199,8 @@ async def cancel_scheduled_message(
     if db_message.status != MessageStatus.PENDING:
         raise HTTPException(status_code=400, detail="Message is not pending and cannot be cancelled.")
     
-    if db_message.celery_task_id:
-        from celery_worker import celery_app
-        celery_app.control.revoke(db_message.celery_task_id)
-
+    # As with edits, the claiming task is left running and skips the message
+    # because it is no longer pending.
     db_message.status = MessageStatus.CANCELLED
     session.add(db_message)
     session.commit()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Load test for campaign sends against FakeTwilioSender, so no messages leave the
+machine. Times the previous serial loop (one blocking send_sms per recipient)
+against integrations.sms_dispatcher.dispatch at several worker counts, and
+checks that the dispatcher never exceeds the per-number rate it was given.
+
+    python benchmark_campaign_send.py --recipients 500 --latency-ms 150 --rate 50
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+
+from integrations import sms_dispatcher
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recipients", type=int, default=500)
+    parser.add_argument("--latency-ms", type=float, default=150.0, help="simulated Twilio API latency per message")
+    parser.add_argument("--failure-rate", type=float, default=0.01)
+    parser.add_argument("--rate", type=float, default=1000.0, help="messages per second allowed for the sending number")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    args = parser.parse_args()
+
+    jobs = [sms_dispatcher.SmsJob(uuid.uuid4(), f"+1555{index:07d}", f"Hi Client {index}, new listings this week.")
+            for index in range(args.recipients)]
+    from_number = "+15550000000"
+
+    print(f"{args.recipients} recipients, {args.latency_ms:.0f} ms per send, {args.rate:g} msg/s allowed\n")
+    print(f"{'mode':<24}{'seconds':>10}{'msg/s':>10}{'sent':>8}{'peak in flight':>16}")
+
+    fake = sms_dispatcher.FakeTwilioSender(args.latency_ms / 1000, args.failure_rate, seed=1)
+    start_time = time.perf_counter()
+    sent = sum(fake(from_number, job.to_number, job.body) for job in jobs)
+    elapsed = time.perf_counter() - start_time
+    print(f"{'serial loop':<24}{elapsed:>10.2f}{len(jobs) / elapsed:>10.1f}{sent:>8}{fake.max_in_flight:>16}")
+
+    for concurrency in args.concurrency:
+        fake = sms_dispatcher.FakeTwilioSender(args.latency_ms / 1000, args.failure_rate, seed=1)
+        # A fresh number per run so earlier runs don't drain its bucket.
+        number = f"+1555000{concurrency:04d}"
+        start_time = time.perf_counter()
+        results = asyncio.run(sms_dispatcher.dispatch(number, jobs, send=fake, concurrency=concurrency, messages_per_second=args.rate))
+        elapsed = time.perf_counter() - start_time
+        sent = sum(result.sent for result in results)
+        print(f"{f'dispatch x{concurrency}':<24}{elapsed:>10.2f}{len(jobs) / elapsed:>10.1f}{sent:>8}{fake.max_in_flight:>16}")
+        # The bucket starts full, so up to `rate` messages may go out before throttling begins.
+        allowed = args.rate * elapsed + max(1.0, args.rate)
+        if len(jobs) > allowed:
+            print(f"  rate exceeded: {len(jobs)} sends in {elapsed:.2f}s at {args.rate:g} msg/s")
+
+
+if __name__ == "__main__":
+    main()
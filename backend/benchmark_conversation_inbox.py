@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Benchmark script for the conversation inbox query. Seeds a throwaway SQLite
+database (or --database-url) with one user whose client count grows from 100 to
+20,000, then times the old per-client inbox (one latest-message query and one
+unread count per client, 2N+1 round trips) against crm.get_conversation_inbox
+(conversation_state reads), both for the full inbox and for the first page.
+The state table is backfilled with crm.rebuild_conversation_state after seeding,
+which is timed too.
+
+    python benchmark_conversation_inbox.py --sizes 100 1000 5000 20000 --messages-per-client 5
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func, insert
+from sqlmodel import SQLModel, Session, create_engine, select
+
+from data import crm as crm_service
+from data.models.client import Client
+from data.models.message import Message, MessageDirection, MessageStatus, MessageSource, MessageSenderType
+from data.models.user import User
+
+
+def seed(engine, num_clients: int, messages_per_client: int, seed_value: int) -> uuid.UUID:
+    """Creates one user with `num_clients` clients, some of them without any messages."""
+    rng = random.Random(seed_value)
+    user_id = uuid.uuid4()
+    now = datetime.now(timezone.utc)
+    with Session(engine) as session:
+        session.add(User(id=user_id, full_name="Benchmark Realtor", phone_number=f"+1555{rng.randint(0, 9_999_999):07d}"))
+        session.commit()
+
+        client_rows, message_rows = [], []
+        for index in range(num_clients):
+            client_id = uuid.uuid4()
+            client_rows.append({"id": client_id, "user_id": user_id, "full_name": f"Client {index:05d}", "ai_tags": [], "user_tags": [], "preferences": {}})
+            if rng.random() < 0.1:
+                continue
+            for _ in range(messages_per_client):
+                inbound = rng.random() < 0.5
+                message_rows.append({
+                    "id": uuid.uuid4(), "user_id": user_id, "client_id": client_id,
+                    "content": "Benchmark message " * rng.randint(1, 8),
+                    "direction": MessageDirection.INBOUND if inbound else MessageDirection.OUTBOUND,
+                    "status": (MessageStatus.RECEIVED if rng.random() < 0.5 else MessageStatus.SENT) if inbound else MessageStatus.SENT,
+                    "source": MessageSource.MANUAL, "sender_type": MessageSenderType.USER,
+                    "created_at": now - timedelta(minutes=rng.randint(0, 60 * 24 * 90)),
+                })
+        session.execute(insert(Client), client_rows)
+        for start in range(0, len(message_rows), 10_000):
+            session.execute(insert(Message), message_rows[start:start + 10_000])
+        session.commit()
+    return user_id
+
+
+def rebuild_ms(engine, user_id: uuid.UUID) -> float:
+    start_time = time.perf_counter()
+    with Session(engine) as session:
+        crm_service.rebuild_conversation_state(user_id=user_id, session=session)
+        session.commit()
+    return (time.perf_counter() - start_time) * 1000
+
+
+def legacy_inbox(session: Session, user_id: uuid.UUID) -> int:
+    """The per-client inbox the API used to build: 2N+1 queries."""
+    clients = session.exec(select(Client).where(Client.user_id == user_id)).all()
+    for client in clients:
+        session.exec(select(Message).where(Message.client_id == client.id).order_by(Message.created_at.desc())).first()
+        session.exec(select(func.count(Message.id)).where(
+            Message.client_id == client.id,
+            Message.direction == MessageDirection.INBOUND,
+            Message.status == MessageStatus.RECEIVED,
+        )).first()
+    return len(clients)
+
+
+def time_ms(fn, repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start_time)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 5000, 20000])
+    parser.add_argument("--messages-per-client", type=int, default=5)
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--database-url", help="Defaults to a temporary SQLite file.")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--skip-legacy", action="store_true", help="Skip the 2N+1 baseline (slow at large sizes).")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        database_url = args.database_url or f"sqlite:///{os.path.join(tmp_dir, 'inbox_benchmark.db')}"
+        engine = create_engine(database_url)
+        SQLModel.metadata.create_all(engine)
+
+        print(f"{'clients':>8}{'messages':>10}{'rebuild ms':>12}{'legacy 2N+1 ms':>16}{'inbox ms':>10}{'first page ms':>15}")
+        for size in args.sizes:
+            user_id = seed(engine, size, args.messages_per_client, args.seed + size)
+            backfill_ms = rebuild_ms(engine, user_id)
+            with Session(engine) as session:
+                message_count = session.exec(select(func.count(Message.id)).where(Message.user_id == user_id)).one()
+                legacy_ms = float("nan") if args.skip_legacy else time_ms(lambda: legacy_inbox(session, user_id), args.repeats)
+                inbox_ms = time_ms(lambda: crm_service.get_conversation_inbox(user_id, session=session), args.repeats)
+                page_ms = time_ms(lambda: crm_service.get_conversation_inbox(user_id, limit=args.page_size, session=session), args.repeats)
+            print(f"{size:>8}{message_count:>10}{backfill_ms:>12.1f}{legacy_ms:>16.1f}{inbox_ms:>10.1f}{page_ms:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
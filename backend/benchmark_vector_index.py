@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark script comparing the vector index types available to semantic_service.
+Builds every VECTOR_INDEX_TYPE snapshot on the same synthetic 1536-d corpus and
+reports build time, query latency and recall@k against exact (flat) search,
+sweeping nprobe / efSearch / the PQ refine factor. Use it to pick VECTOR_INDEX_*
+settings for a deployment size.
+
+    python benchmark_vector_index.py --num-vectors 200000 --num-queries 500
+"""
+
+import argparse
+import tempfile
+import time
+import uuid
+
+import faiss
+import numpy as np
+
+from agent_core.vector_index import ClientVectorIndex, IndexSpec, DIMENSION
+
+
+def make_corpus(num_vectors: int, num_queries: int, num_clusters: int, seed: int):
+    """Clustered, normalized vectors; real embeddings are far from uniformly random."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((num_clusters, DIMENSION)).astype('float32')
+
+    def sample(count: int) -> np.ndarray:
+        labels = rng.integers(0, num_clusters, count)
+        vectors = centers[labels] + 0.6 * rng.standard_normal((count, DIMENSION)).astype('float32')
+        faiss.normalize_L2(vectors)
+        return vectors
+
+    return sample(num_vectors), sample(num_queries)
+
+
+def run_queries(index: ClientVectorIndex, queries: np.ndarray, k: int) -> tuple[list, float]:
+    """Runs queries one at a time, the way find_similar_clients does. Returns ids and ms/query."""
+    found = []
+    start_time = time.perf_counter()
+    for query in queries:
+        found.append([client_id for client_id, _ in index.search(query[None, :], k)])
+    return found, (time.perf_counter() - start_time) * 1000 / len(queries)
+
+
+def recall_at_k(found: list, truth: list) -> float:
+    hits = sum(len(set(row_found) & set(row_truth)) for row_found, row_truth in zip(found, truth))
+    return hits / sum(len(row_truth) for row_truth in truth)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--num-vectors", type=int, default=100_000)
+    parser.add_argument("--num-queries", type=int, default=200)
+    parser.add_argument("--num-clusters", type=int, default=500)
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--pq-m", type=int, default=64)
+    parser.add_argument("--hnsw-m", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    print(f"Generating {args.num_vectors} x {DIMENSION} corpus and {args.num_queries} queries...")
+    vectors, queries = make_corpus(args.num_vectors, args.num_queries, args.num_clusters, args.seed)
+    client_ids = [uuid.uuid4() for _ in range(args.num_vectors)]
+
+    sweeps = {
+        "flat": [{}],
+        "ivf_flat": [{"nprobe": n} for n in (4, 8, 16, 32, 64)],
+        "ivf_pq": [{"nprobe": n, "refine_factor": r} for n in (16, 32, 64) for r in (1, 4, 10)],
+        "hnsw": [{"ef_search": ef} for ef in (16, 32, 64, 128, 256)],
+    }
+
+    truth = None
+    print(f"\n{'index':<22}{'setting':<28}{'build s':>10}{'ms/query':>12}{f'recall@{args.k}':>12}")
+    for index_type, settings in sweeps.items():
+        spec = IndexSpec(index_type=index_type, pq_m=args.pq_m, hnsw_m=args.hnsw_m, min_vectors=0)
+        index = ClientVectorIndex(DIMENSION, spec=spec)
+        index.add(client_ids, vectors)
+        with tempfile.TemporaryDirectory() as snapshot_dir:
+            # Build and search the memory-mapped snapshot exactly as a served shard would.
+            start_time = time.perf_counter()
+            index.save(snapshot_dir)
+            build_seconds = time.perf_counter() - start_time
+
+            for setting in settings:
+                index.use_spec(spec.model_copy(update=setting))
+                found, ms_per_query = run_queries(index, queries, args.k)
+                if truth is None:
+                    truth = found  # flat runs first and is exact
+                label = ", ".join(f"{key}={value}" for key, value in setting.items()) or "exact"
+                print(f"{spec.factory_string(len(client_ids)):<22}{label:<28}{build_seconds:>10.1f}{ms_per_query:>12.3f}{recall_at_k(found, truth):>12.3f}")
+            index.reset()
+
+
+if __name__ == "__main__":
+    main()
@@ -7,7 +7,7 @@ import uuid
 import os
 import json # ADDED: For creating the Redis message payload
 from datetime import datetime, timezone, timedelta
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 from uuid import UUID
 from sqlmodel import Session, select
 from data.models.event import MarketEvent
@@ -55,7 +55,7 @@ from data.models.message import (Message, MessageStatus, MessageDirection,
 from data.models.client import Client
 from data.models.event import PipelineRun, GlobalMlsEvent
 from data import crm as crm_service
-from integrations import twilio_outgoing
+from integrations import twilio_outgoing, sms_dispatcher
 from workflow.pipeline import run_main_opportunity_pipeline, process_global_events_for_user
 from agent_core.brain import nudge_engine
 
@@ -151,6 +151,12 @@ def send_scheduled_message_task(self, message_id: str) -> dict:
         if scheduled_message.status != MessageStatus.PENDING:
             logger.warning(f"CELERY: Scheduled message {message_id} is not pending (status: {scheduled_message.status})")
             return {"status": "skipped", "reason": "not_pending"}
+
+        # The scheduler re-claims messages whose task it presumes lost, and edits
+        # release the claim; only the task currently holding the claim may send.
+        if self.request.id and scheduled_message.celery_task_id != self.request.id:
+            logger.warning(f"CELERY: Scheduled message {message_id} is claimed by another task. Skipping.")
+            return {"status": "skipped", "reason": "claimed_by_another_task"}
         
         # 2. Validate user and client
         from data.models import User
@@ -176,49 +182,25 @@ def send_scheduled_message_task(self, message_id: str) -> dict:
         first_name = client.full_name.strip().split(' ')[0] if client.full_name else "there"
         personalized_content = scheduled_message.content.replace("[Client Name]", first_name)
         
-        # 4. Send SMS with comprehensive retry logic
-        max_sms_retries = 3
-        sms_retry_delay = 2  # seconds
-        
-        sms_sent = False
-        last_sms_error = None
-        
-        for attempt in range(max_sms_retries):
-            try:
-                logger.info(f"CELERY: SMS send attempt {attempt + 1} for message {message_id}")
-                
-                was_sent = twilio_outgoing.send_sms(
-                    from_number=user.twilio_phone_number,
-                    to_number=client.phone,
-                    body=personalized_content
-                )
-                
-                if was_sent:
-                    sms_sent = True
-                    logger.info(f"CELERY: SMS sent successfully on attempt {attempt + 1}")
-                    break
-                else:
-                    raise Exception("Twilio returned False for send_sms")
-                    
-            except Exception as e:
-                last_sms_error = str(e)
-                logger.warning(f"CELERY: SMS send attempt {attempt + 1} failed: {e}")
-                
-                if attempt < max_sms_retries - 1:
-                    import time
-                    time.sleep(sms_retry_delay * (2 ** attempt))  # Exponential backoff
-                else:
-                    logger.error(f"CELERY: All SMS send attempts failed for message {message_id}")
+        # 4. Send SMS. send_sms owns the retry policy and only retries failures
+        # Twilio cannot have seen; retrying here could deliver the text twice.
+        logger.info(f"CELERY: Sending SMS for message {message_id}")
+        sms_sent = twilio_outgoing.send_sms(
+            from_number=user.twilio_phone_number,
+            to_number=client.phone,
+            body=personalized_content
+        )
         
         if not sms_sent:
+            logger.error(f"CELERY: SMS send failed for message {message_id}")
             # Update message status to failed
             scheduled_message.status = MessageStatus.FAILED
-            scheduled_message.error_message = f"SMS delivery failed after {max_sms_retries} attempts: {last_sms_error}"
+            scheduled_message.error_message = "SMS delivery failed"
             session.add(scheduled_message)
             session.commit()
             
             self.update_state(state='FAILURE', meta={'error': 'sms_delivery_failed'})
-            return {"status": "error", "reason": "sms_delivery_failed", "error": last_sms_error}
+            return {"status": "error", "reason": "sms_delivery_failed"}
         
         # 5. Create message record
         try:
@@ -237,6 +219,7 @@ def send_scheduled_message_task(self, message_id: str) -> dict:
             session.add(message_log)
             session.flush()  # Ensure ID is generated
             session.refresh(message_log)
+            crm_service.record_message_in_conversation_state(message_log, session)
             logger.info(f"CELERY: Message record created with ID {message_log.id}")
             
         except Exception as e:
@@ -339,6 +322,184 @@ def health_check_task() -> dict:
         logger.error(f"CELERY: Health check failed: {e}")
         return {"status": "unhealthy", "error": str(e)}
     
+# The scheduler is a time wheel turned by beat: each tick claims the messages
+# due before the next tick and queues their send tasks, with an ETA of at most
+# one tick. Nothing further ahead is in the broker, so broker and worker memory
+# stay flat however many messages are scheduled into the future.
+SCHEDULER_TICK = timedelta(minutes=1)
+# Messages claimed per locked batch; a tick keeps claiming until none are left.
+SCHEDULER_CLAIM_BATCH_SIZE = 500
+# Messages handed to one send_scheduled_messages_batch_task.
+SCHEDULED_SEND_BATCH_SIZE = 100
+# A claim whose task hasn't sent or failed the message within this long is
+# presumed lost (e.g. to a broker visibility timeout) and is claimed again.
+# Well over task_time_limit, so the original task can no longer be running.
+SCHEDULER_CLAIM_LEASE = timedelta(minutes=30)
+
+def _scheduled_send_batches(locked: List[Tuple[UUID, datetime]], now: datetime) -> List[Tuple[Optional[datetime], List[UUID]]]:
+    """
+    Groups locked messages into send batches of messages due at the same second
+    (everything already due in one group), as (eta, message ids) pairs.
+    """
+    groups: Dict[Optional[datetime], List[UUID]] = {}
+    for message_id, scheduled_at in locked:
+        if scheduled_at.tzinfo is None:
+            scheduled_at = scheduled_at.replace(tzinfo=timezone.utc)
+        eta = None
+        if scheduled_at > now:
+            eta = scheduled_at.replace(microsecond=0) + (timedelta(seconds=1) if scheduled_at.microsecond else timedelta())
+        groups.setdefault(eta, []).append(message_id)
+    return [
+        (eta, message_ids[start:start + SCHEDULED_SEND_BATCH_SIZE])
+        for eta, message_ids in groups.items()
+        for start in range(0, len(message_ids), SCHEDULED_SEND_BATCH_SIZE)
+    ]
+
+@celery_app.task
+def dispatch_due_scheduled_messages_task() -> dict:
+    """
+    Scheduler tick: claims the scheduled messages that fall due before the next
+    tick and queues them as send batches. Claims are taken with
+    SELECT ... FOR UPDATE SKIP LOCKED and committed before the tasks are
+    queued, so overlapping ticks or several scheduler processes never claim
+    the same message twice.
+    """
+    now = datetime.now(timezone.utc)
+    lease_expired_before = now - SCHEDULER_CLAIM_LEASE
+    dispatched = 0
+    batches_queued = 0
+    try:
+        with Session(engine) as session:
+            while True:
+                locked = crm_service.lock_due_scheduled_messages(now + SCHEDULER_TICK, lease_expired_before, SCHEDULER_CLAIM_BATCH_SIZE, session)
+                batches = [(str(uuid.uuid4()), eta, message_ids) for eta, message_ids in _scheduled_send_batches(locked, now)]
+                crm_service.assign_scheduled_message_tasks(
+                    {message_id: task_id for task_id, _, message_ids in batches for message_id in message_ids}, session
+                )
+                session.commit()
+                for task_id, eta, message_ids in batches:
+                    send_scheduled_messages_batch_task.apply_async(
+                        ([str(message_id) for message_id in message_ids],), task_id=task_id, eta=eta
+                    )
+                dispatched += len(locked)
+                batches_queued += len(batches)
+                if len(locked) < SCHEDULER_CLAIM_BATCH_SIZE:
+                    break
+        if dispatched:
+            logger.info(f"CELERY: Scheduler queued {dispatched} scheduled messages in {batches_queued} batches.")
+        return {"status": "success", "dispatched": dispatched, "batches": batches_queued}
+    except Exception as e:
+        logger.error(f"CELERY: Scheduler tick failed after {dispatched} messages: {e}", exc_info=True)
+        return {"status": "error", "dispatched": dispatched, "error": str(e)}
+
+async def _send_scheduled_batch(jobs_by_number: Dict[str, List[sms_dispatcher.SmsJob]]) -> Dict[str, List[sms_dispatcher.SmsResult]]:
+    """Sends every sending number's jobs concurrently on this task's event loop."""
+    try:
+        results = await asyncio.gather(*(sms_dispatcher.dispatch(number, jobs) for number, jobs in jobs_by_number.items()))
+        return dict(zip(jobs_by_number, results))
+    finally:
+        await twilio_outgoing.close_transport()
+
+@celery_app.task(bind=True)
+def send_scheduled_messages_batch_task(self, message_ids: List[str]) -> dict:
+    """
+    Sends a batch of due scheduled messages claimed by this task. The messages,
+    their users and their clients are each loaded with one IN query, the SMS
+    go out concurrently through sms_dispatcher, and the Message rows, status
+    updates and last_interaction updates are written in a single commit.
+    """
+    from data.models import User
+    with Session(engine) as session:
+        messages = crm_service.get_claimed_scheduled_messages([UUID(message_id) for message_id in message_ids], self.request.id, session)
+        if not messages:
+            logger.warning(f"CELERY: None of the {len(message_ids)} scheduled messages in batch {self.request.id} are still claimed by it.")
+            return {"status": "skipped", "reason": "not_claimed"}
+
+        users = {user.id: user for user in session.exec(select(User).where(User.id.in_(list({message.user_id for message in messages})))).all()}
+        clients = {client.id: client for client in session.exec(select(Client).where(Client.id.in_(list({message.client_id for message in messages})))).all()}
+
+        pending_by_number: Dict[str, List[ScheduledMessage]] = {}
+        jobs_by_number: Dict[str, List[sms_dispatcher.SmsJob]] = {}
+        for message in messages:
+            user = users.get(message.user_id)
+            client = clients.get(message.client_id)
+            if not user or not user.twilio_phone_number:
+                message.status = MessageStatus.FAILED
+                message.error_message = "User not found or missing Twilio number"
+                continue
+            if not client or client.user_id != message.user_id or not client.phone:
+                message.status = MessageStatus.FAILED
+                message.error_message = "Client not found or missing phone"
+                continue
+            first_name = client.full_name.strip().split(' ')[0] if client.full_name else "there"
+            pending_by_number.setdefault(user.twilio_phone_number, []).append(message)
+            jobs_by_number.setdefault(user.twilio_phone_number, []).append(
+                sms_dispatcher.SmsJob(client.id, client.phone, message.content.replace("[Client Name]", first_name))
+            )
+
+        results = asyncio.run(_send_scheduled_batch(jobs_by_number)) if jobs_by_number else {}
+
+        now = datetime.now(timezone.utc)
+        message_logs = []
+        sent_clients_by_user: Dict[UUID, List[UUID]] = {}
+        for number, pending in pending_by_number.items():
+            for message, result in zip(pending, results[number]):
+                if result.sent:
+                    message.status = MessageStatus.SENT
+                    message.sent_at = now
+                    message_logs.append(Message(
+                        user_id=message.user_id,
+                        client_id=message.client_id,
+                        content=result.body,
+                        direction=MessageDirection.OUTBOUND,
+                        status=MessageStatus.SENT,
+                        source=MessageSource.SCHEDULED,
+                        sender_type=MessageSenderType.USER,
+                        created_at=now,
+                        originally_scheduled_at=message.scheduled_at_utc,
+                    ))
+                    sent_clients_by_user.setdefault(message.user_id, []).append(message.client_id)
+                else:
+                    message.status = MessageStatus.FAILED
+                    message.error_message = "SMS delivery failed"
+
+        sent_ids = [message.id for message in messages if message.status == MessageStatus.SENT]
+        try:
+            session.add_all(messages)
+            crm_service.save_messages(message_logs, session)
+            for user_id, client_ids in sent_clients_by_user.items():
+                crm_service.update_last_interaction_for_clients(client_ids, user_id=user_id, session=session)
+            session.commit()
+        except Exception as e:
+            # The SMS are out: at least record them as sent so the scheduler never re-sends them.
+            logger.error(f"CELERY: Failed to record scheduled batch {self.request.id}: {e}", exc_info=True)
+            session.rollback()
+            if sent_ids:
+                session.exec(
+                    ScheduledMessage.__table__.update()
+                    .where(ScheduledMessage.id.in_(sent_ids))
+                    .values(status=MessageStatus.SENT, sent_at=now, error_message=f"SMS sent but message record failed: {e}")
+                )
+                session.commit()
+            return {"status": "partial_success", "sent": len(sent_ids), "failed": len(messages) - len(sent_ids), "error": str(e)}
+
+    logger.info(f"CELERY: Scheduled batch {self.request.id} sent {len(sent_ids)} of {len(messages)} messages.")
+    return {"status": "success", "sent": len(sent_ids), "failed": len(messages) - len(sent_ids)}
+
+@celery_app.task
+def prune_embedding_cache_task() -> dict:
+    """
+    Keeps the persistent embedding cache within its size limit by dropping the
+    oldest entries.
+    """
+    from agent_core import embedding_cache
+    try:
+        removed = embedding_cache.prune_persistent_cache()
+        return {"status": "success", "removed": removed}
+    except Exception as e:
+        logger.error(f"CELERY: Embedding cache prune failed: {e}")
+        return {"status": "error", "error": str(e)}
+
 # --- [NEW] Task for the Proactive Nudge Pipeline ---
 @celery_app.task(name="tasks.score_event_for_best_match")
 def score_event_for_best_match_task(market_event_id: str):
@@ -374,6 +535,51 @@ def score_event_for_best_match_task(market_event_id: str):
             logger.error(f"CELERY: Proactive pipeline failed for event {market_event_id}: {e}", exc_info=True)
             return {"status": "error", "reason": str(e)}
 
+@celery_app.task(name="tasks.score_events_batch")
+def score_events_batch_task(user_id: str, event_ids: list[str]):
+    """
+    PROACTIVE PIPELINE: Batch version of score_event_for_best_match_task for one
+    user's new MarketEvents. The user's clients are loaded and scored against
+    the whole batch in one pass, then a nudge is created per matched event.
+    """
+    from data.database import engine
+    from agent_core.brain.nudge_engine import find_best_matches_for_events
+    from data.models.user import User
+
+    logger.info(f"CELERY: Proactive pipeline starting for {len(event_ids)} MarketEvents of user {user_id}")
+    with Session(engine) as session:
+        user = session.get(User, UUID(user_id))
+        if not user:
+            logger.error(f"CELERY: User {user_id} not found for event batch.")
+            return {"status": "error", "reason": "user_not_found"}
+
+        events = session.exec(
+            select(MarketEvent).where(
+                MarketEvent.id.in_([UUID(event_id) for event_id in event_ids]),
+                MarketEvent.user_id == user.id
+            )
+        ).all()
+        if len(events) != len(event_ids):
+            logger.error(f"CELERY: {len(event_ids) - len(events)} of {len(event_ids)} MarketEvents not found for user {user_id}.")
+
+        try:
+            # Failures creating one event's nudge are contained to that event,
+            # which find_best_matches_for_events marks "error".
+            scored_events = asyncio.run(find_best_matches_for_events(events, user, session))
+            failed = sum(1 for event in scored_events if event.status == "error")
+            session.commit()
+        except Exception as e:
+            logger.error(f"CELERY: Proactive pipeline failed for event batch of user {user_id}: {e}", exc_info=True)
+            return {"status": "error", "reason": str(e)}
+
+    skipped = len(events) - len(scored_events)
+    if skipped:
+        logger.error(f"CELERY: Resource not found for {skipped} MarketEvents of user {user_id}.")
+    if failed:
+        logger.error(f"CELERY: Nudge creation failed for {failed} MarketEvents of user {user_id}.")
+    logger.info(f"CELERY: Proactive pipeline finished for {len(scored_events)} MarketEvents of user {user_id}")
+    return {"status": "success", "processed": len(scored_events) - failed, "failed": failed, "skipped": skipped}
+
 # --- [NEW] Task for the Client Backfill Pipeline ---
 @celery_app.task(name="tasks.backfill_nudges_for_client")
 def backfill_nudges_for_client_task(client_id: str, lookback_days: int = 14):
@@ -40,6 +40,14 @@ celery_app.conf.beat_schedule = {
         'task': 'celery_tasks.health_check_task',
         'schedule': crontab(minute='*/15'), # Run every 15 minutes
     },
+    'dispatch-due-scheduled-messages-every-minute': {
+        'task': 'celery_tasks.dispatch_due_scheduled_messages_task',
+        'schedule': crontab(),  # Run every minute (celery_tasks.SCHEDULER_TICK)
+    },
+    'prune-embedding-cache-daily': {
+        'task': 'celery_tasks.prune_embedding_cache_task',
+        'schedule': crontab(minute=30, hour=3),  # Run daily at 03:30 UTC
+    },
     'main-opportunity-pipeline-every-2-hours': {
         'task': 'celery_tasks.main_opportunity_pipeline_task',
         'schedule': crontab(minute=0, hour='0,2,4,6,8,10,12,14,16,18,20,22'), # Run every 2 hours at specific times
@@ -23,6 +23,16 @@ class Settings(BaseSettings):
     TWILIO_PHONE_NUMBER: str
     TWILIO_DEFAULT_MESSAGING_SERVICE_SID: Optional[str] = None
     TWILIO_VERIFY_SERVICE_SID: str
+    # Outbound SMS throughput per sending number (a US long code sustains about 1
+    # message per second) and how many sends a campaign keeps in flight at once.
+    SMS_MESSAGES_PER_SECOND_PER_NUMBER: float = 1.0
+    SMS_DISPATCH_CONCURRENCY: int = 8
+    # Keep each number's SMS rate limit in Redis so API and Celery processes share
+    # it. When False (or Redis is down) every process applies the full rate on its
+    # own, so N processes together can send N times SMS_MESSAGES_PER_SECOND_PER_NUMBER.
+    SMS_RATE_LIMIT_SHARED: bool = True
+    # Twilio API requests in flight at once per event loop (pooled keep-alive connections).
+    TWILIO_MAX_CONCURRENT_REQUESTS: int = 16
     DATABASE_URL: str
     # --- FIX: Remove the hardcoded default value. ---
     # This forces Pydantic to rely on the environment variable provided by Render.
@@ -33,6 +43,18 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     RESCAN_LOOKBACK_DAYS: int = 30
     FAQ_AUTO_REPLY_ENABLED: bool = True
+    # Directory for the client vector index snapshot. Unset keeps the index in memory only.
+    VECTOR_INDEX_DIR: Optional[str] = None
+    # Snapshot index type: flat, ivf_flat, ivf_pq or hnsw. Shards below
+    # VECTOR_INDEX_ANN_MIN_VECTORS stay flat. See benchmark_vector_index.py for tuning.
+    VECTOR_INDEX_TYPE: str = "flat"
+    VECTOR_INDEX_NLIST: int = 0
+    VECTOR_INDEX_PQ_M: int = 64
+    VECTOR_INDEX_HNSW_M: int = 32
+    VECTOR_INDEX_NPROBE: int = 16
+    VECTOR_INDEX_EF_SEARCH: int = 64
+    VECTOR_INDEX_REFINE_FACTOR: int = 10
+    VECTOR_INDEX_ANN_MIN_VECTORS: int = 20000
     MLS_PROVIDER: str
     SPARK_API_DEMO_TOKEN: str
     RESO_API_BASE_URL: str
@@ -7,22 +7,25 @@ import uuid
 from uuid import UUID
 import json 
 from sqlmodel import Session, select, delete
-from sqlalchemy.orm import selectinload
+from sqlalchemy import and_, or_, func, case, exists, true, bindparam
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import selectinload, defer, load_only
 from .database import engine
 import logging
 from sqlalchemy.orm.attributes import flag_modified 
+from sqlalchemy.exc import IntegrityError
 
 from agent_core import semantic_service
 from .models.feedback import NegativePreference
 
 from agent_core.deduplication.deduplication_engine import find_strong_duplicate
 
-from .models.client import Client, ClientUpdate, ClientCreate
-from .models.event import MarketEvent
+from .models.client import Client, ClientUpdate, ClientCreate, ClientSummary
+from .models.event import MarketEvent, GlobalMlsEvent
 from .models.user import User, UserUpdate
-from .models.resource import Resource, ResourceCreate, ContentResource, ContentResourceCreate, ContentResourceUpdate, ResourceStatus
-from .models.campaign import CampaignBriefing, CampaignUpdate, CampaignStatus
-from .models.message import ScheduledMessage, Message, MessageStatus, MessageDirection, ScheduledMessageCreate
+from .models.resource import Resource, ResourceCreate, ListingEmbedding, EmbeddingCacheEntry, ContentResource, ContentResourceCreate, ContentResourceUpdate, ResourceStatus
+from .models.campaign import CampaignBriefing, CampaignUpdate, CampaignStatus, CampaignAudienceMember
+from .models.message import ScheduledMessage, Message, MessageStatus, MessageDirection, ScheduledMessageCreate, ConversationState
 import uuid
 from agent_core.agents import profiler as profiler_agent
 
@@ -140,6 +143,7 @@ async def create_or_update_client(user_id: uuid.UUID, client_data: ClientCreate)
             new_client = Client(id=uuid.uuid4(), user_id=user_id, **client_dict)
             target_client, is_new = new_client, True
 
+        refresh_client_scoring_profile(target_client, session)
         session.add(target_client)
         session.commit()
         session.refresh(target_client)
@@ -177,18 +181,20 @@ def get_client_by_id(client_id: uuid.UUID, user_id: uuid.UUID, session: Optional
         with Session(engine) as new_session:
             return _get(new_session)
 
-def get_clients_by_ids(client_ids: List[UUID], user_id: UUID) -> List[Client]:
+def get_clients_by_ids(client_ids: List[UUID], user_id: UUID, session: Optional[Session] = None) -> List[Client]:
     """
     Retrieves a list of clients by their unique IDs, ensuring they belong to the user.
     """
     if not client_ids:
         return []
-    with Session(engine) as session:
-        statement = select(Client).where(
-            Client.id.in_(client_ids),
-            Client.user_id == user_id
-        )
+    statement = select(Client).where(
+        Client.id.in_(client_ids),
+        Client.user_id == user_id
+    )
+    if session:
         return session.exec(statement).all()
+    with Session(engine) as new_session:
+        return new_session.exec(statement).all()
 
 def get_client_by_phone(
     phone_number: str,
@@ -214,10 +220,16 @@ def get_client_by_phone(
         with Session(engine) as new_session:
             return _get(new_session)
 
-def get_all_clients(user_id: uuid.UUID, session: Optional[Session] = None) -> List[Client]:
-    """Retrieves all clients from the database for a specific user."""
+def get_all_clients(user_id: uuid.UUID, session: Optional[Session] = None, include_embeddings: bool = False) -> List[Client]:
+    """
+    Retrieves all clients from the database for a specific user. The embedding
+    column is left out of the query unless `include_embeddings` is set, so list
+    views don't pull a 6 KB vector per row they never read.
+    """
     def _get(db_session: Session):
         statement = select(Client).where(Client.user_id == user_id)
+        if not include_embeddings:
+            statement = statement.options(defer(Client.notes_embedding))
         return db_session.exec(statement).all()
     
     if session:
@@ -226,24 +238,69 @@ def get_all_clients(user_id: uuid.UUID, session: Optional[Session] = None) -> Li
         with Session(engine) as new_session:
             return _get(new_session)
 
+# The columns client list views read; notes, preferences and notes_embedding are
+# left in the database. Use with select(*...) for ClientSummary rows, or with
+# load_only(...) where a list still needs Client objects.
+CLIENT_SUMMARY_COLUMNS = (
+    Client.id, Client.user_id, Client.full_name, Client.email, Client.phone,
+    Client.ai_tags, Client.user_tags, Client.last_interaction, Client.timezone,
+)
+
+def _to_client_summary(row) -> ClientSummary:
+    return ClientSummary(
+        id=row.id, user_id=row.user_id, full_name=row.full_name, email=row.email, phone=row.phone,
+        ai_tags=row.ai_tags or [], user_tags=row.user_tags or [],
+        last_interaction=row.last_interaction, timezone=row.timezone,
+    )
+
+def get_client_summaries(
+    user_id: uuid.UUID,
+    limit: Optional[int] = None,
+    after: Optional[UUID] = None,
+    name_query: Optional[str] = None,
+    session: Optional[Session] = None,
+) -> List[ClientSummary]:
+    """
+    Retrieves a user's clients as ClientSummary rows, ordered by (full_name, id).
+    Pass the id of the last row of a page as `after` to get the next page; the
+    boundary is resolved in the same query (keyset pagination, no OFFSET scan).
+    `name_query` restricts the list to a case-insensitive name match.
+    """
+    def _get(db_session: Session):
+        statement = select(*CLIENT_SUMMARY_COLUMNS).where(Client.user_id == user_id)
+        if name_query:
+            statement = statement.where(Client.full_name.ilike(f"%{name_query}%"))
+        if after is not None:
+            boundary_name = select(Client.full_name).where(Client.id == after, Client.user_id == user_id).scalar_subquery()
+            statement = statement.where(or_(
+                Client.full_name > boundary_name,
+                and_(Client.full_name == boundary_name, Client.id > after),
+            ))
+        statement = statement.order_by(Client.full_name, Client.id)
+        if limit is not None:
+            statement = statement.limit(limit)
+        return [_to_client_summary(row) for row in db_session.exec(statement).all()]
+
+    if session:
+        return _get(session)
+    else:
+        with Session(engine) as new_session:
+            return _get(new_session)
+
 def get_client_nudge_summaries(user_id: uuid.UUID, session: Session) -> List[Dict[str, Any]]:
     """
     Generates a summary for each client that has active nudges.
     The summary includes the client's name, total nudge count, and a
     breakdown of nudges by campaign type.
     """
-    clients = get_all_clients(user_id=user_id)
+    clients = get_client_summaries(user_id=user_id, session=session)
     client_map = {str(client.id): {"client_name": client.full_name, "nudges": []} for client in clients}
 
-    # Fetch all draft campaigns (active nudges) for the user at once
-    draft_campaigns = get_new_campaign_briefings_for_user(user_id=user_id, session=session)
-
-    # Distribute the campaigns to the clients they are matched with
-    for campaign in draft_campaigns:
-        for audience_member in campaign.matched_audience:
-            client_id_str = str(audience_member.get("client_id"))
-            if client_id_str in client_map:
-                client_map[client_id_str]["nudges"].append(campaign)
+    # Fetch every (client, draft campaign) pair for the user at once
+    for client_id, campaign in get_draft_campaigns_by_audience_client(user_id=user_id, session=session):
+        client_id_str = str(client_id)
+        if client_id_str in client_map:
+            client_map[client_id_str]["nudges"].append(campaign)
 
     # Process the map to create the final summary list
     summaries = []
@@ -312,6 +369,9 @@ async def update_client(client_id: UUID, update_data: ClientUpdate, user_id: UUI
                 client.preferences.update(extracted_prefs)
                 flag_modified(client, "preferences")
 
+        if notes_were_updated or 'preferences' in update_dict or 'user_tags' in update_dict:
+            refresh_client_scoring_profile(client, session, user_vertical if notes_were_updated else None)
+
         session.commit()
         session.refresh(client)
 
@@ -334,9 +394,11 @@ async def delete_client(client_id: UUID, user_id: UUID) -> bool:
             return False
 
         session.exec(delete(ScheduledMessage).where(ScheduledMessage.client_id == client_id))
+        session.exec(delete(ConversationState).where(ConversationState.client_id == client_id))
         
         session.delete(client)
         session.commit()
+        semantic_service.remove_client_from_index(client_id, user_id)
         
         logging.info(f"CRM: Deleted client {client_id} and all associated data for user {user_id}")
         return True
@@ -346,12 +408,15 @@ def delete_draft_campaigns_for_client(client_id: UUID, user_id: UUID, session: S
     Deletes all campaign briefings for a specific client that are in 'draft' status.
     This is used to clear out old, irrelevant nudges before a client is re-scored.
     """
-    statement = delete(CampaignBriefing).where(
+    draft_filter = (
         CampaignBriefing.client_id == client_id,
         CampaignBriefing.user_id == user_id,
         CampaignBriefing.status == CampaignStatus.DRAFT
     )
-    results = session.exec(statement)
+    session.exec(delete(CampaignAudienceMember).where(
+        CampaignAudienceMember.campaign_id.in_(select(CampaignBriefing.id).where(*draft_filter))
+    ))
+    results = session.exec(delete(CampaignBriefing).where(*draft_filter))
     deleted_count = results.rowcount
     
     if deleted_count > 0:
@@ -381,12 +446,28 @@ def update_last_interaction(client_id: uuid.UUID, user_id: uuid.UUID, session: O
                 new_session.refresh(client)
             return client
 
+def update_last_interaction_for_clients(client_ids: List[uuid.UUID], user_id: uuid.UUID, session: Session) -> int:
+    """
+    Sets last_interaction to now for many of a user's clients with one UPDATE
+    in the caller's transaction. Returns the number of clients updated.
+    """
+    if not client_ids:
+        return 0
+    result = session.exec(
+        Client.__table__.update()
+        .where(Client.id.in_(client_ids), Client.user_id == user_id)
+        .values(last_interaction=datetime.now(timezone.utc).isoformat())
+    )
+    logging.info(f"CRM: Queued last_interaction update for {result.rowcount} clients of user {user_id}")
+    return result.rowcount
+
 async def update_client_preferences(client_id: uuid.UUID, preferences: Dict[str, Any], user_id: uuid.UUID) -> Optional[Client]:
     """Overwrites the 'preferences' and calls semantic_service to regenerate the embedding."""
     with Session(engine) as session:
         client = session.exec(select(Client).where(Client.id == client_id, Client.user_id == user_id)).first()
         if client:
             client.preferences = preferences
+            refresh_client_scoring_profile(client, session)
             session.add(client)
             await semantic_service.update_client_embedding(client, session)
             session.commit()
@@ -400,6 +481,7 @@ async def update_client_tags(client_id: uuid.UUID, tags: List[str], user_id: uui
         client = session.exec(select(Client).where(Client.id == client_id, Client.user_id == user_id)).first()
         if client:
             client.user_tags = tags
+            refresh_client_scoring_profile(client, session)
             session.add(client)
             await semantic_service.update_client_embedding(client, session)
             session.commit()
@@ -413,6 +495,7 @@ async def update_client_notes(client_id: UUID, notes: str, user_id: UUID) -> Opt
         client = session.exec(select(Client).where(Client.id == client_id, Client.user_id == user_id)).first()
         if client:
             client.notes = notes
+            refresh_client_scoring_profile(client, session)
             session.add(client)
             await semantic_service.update_client_embedding(client, session)
             session.commit()
@@ -463,6 +546,7 @@ async def update_client_intel(client_id: UUID, user_id: UUID, tags_to_add: Optio
             profile_was_updated = True
 
         if profile_was_updated:
+            refresh_client_scoring_profile(client, session, user_vertical)
             session.add(client)
             await semantic_service.update_client_embedding(client, session)
 
@@ -498,6 +582,9 @@ def add_negative_preference(client_id: UUID, campaign_id: UUID, resource_embeddi
         dismissed_embedding=resource_embedding
     )
     session.add(new_preference)
+
+    from agent_core.brain import negative_preferences
+    negative_preferences.invalidate_user(user_id)
     logging.info(f"CRM (FEEDBACK): Added negative preference for client {client_id} from campaign {campaign_id}.")
 
 
@@ -511,6 +598,48 @@ def get_negative_preferences(client_id: UUID, session: Session) -> List[List[flo
     results = session.exec(statement).all()
     return results
 
+def get_negative_preferences_for_clients(client_ids: List[UUID], session: Session) -> Dict[UUID, List[List[float]]]:
+    """
+    Bulk version of get_negative_preferences. Retrieves the dismissed embeddings
+    for many clients in a single query, grouped by client ID.
+    """
+    if not client_ids:
+        return {}
+
+    statement = select(NegativePreference.client_id, NegativePreference.dismissed_embedding).where(
+        NegativePreference.client_id.in_(client_ids)
+    )
+    preferences_by_client: Dict[UUID, List[List[float]]] = {}
+    for client_id, dismissed_embedding in session.exec(statement).all():
+        preferences_by_client.setdefault(client_id, []).append(dismissed_embedding)
+    return preferences_by_client
+
+def get_negative_preferences_for_user(user_id: UUID, session: Session) -> List[Tuple[UUID, List[float]]]:
+    """
+    Retrieves every dismissed embedding across a user's clients as
+    (client_id, embedding) rows, ordered by client.
+    """
+    statement = (
+        select(NegativePreference.client_id, NegativePreference.dismissed_embedding)
+        .join(Client, Client.id == NegativePreference.client_id)
+        .where(Client.user_id == user_id)
+        .order_by(NegativePreference.client_id)
+    )
+    return session.exec(statement).all()
+
+def get_negative_preference_version(user_id: UUID, session: Session) -> Tuple[int, Optional[datetime]]:
+    """
+    A cheap fingerprint of a user's negative preferences (row count and newest
+    timestamp) for deciding whether a cached copy is still current.
+    """
+    statement = (
+        select(func.count(NegativePreference.id), func.max(NegativePreference.created_at))
+        .join(Client, Client.id == NegativePreference.client_id)
+        .where(Client.user_id == user_id)
+    )
+    count, newest = session.exec(statement).one()
+    return count, newest
+
 # --- Resource Functions ---
 
 def get_resource_by_id(resource_id: uuid.UUID, user_id: uuid.UUID, session: Optional[Session] = None) -> Optional[Resource]:
@@ -580,6 +709,57 @@ def save_campaign_briefing(briefing: CampaignBriefing, session: Optional[Session
             logging.info(f"CRM: Committed campaign/slate -> {briefing.headline}")
 
 
+def _audience_member_rows(campaign: CampaignBriefing) -> List[Dict[str, Any]]:
+    """
+    Turns a campaign's matched_audience JSON into campaign_audience_member rows,
+    one per client. Entries without a valid client_id are skipped; a client listed
+    twice keeps its highest score.
+    """
+    scores: Dict[UUID, int] = {}
+    for audience_member in campaign.matched_audience or []:
+        if not isinstance(audience_member, dict):
+            audience_member = audience_member.model_dump(mode='json')
+        try:
+            client_id = UUID(str(audience_member.get("client_id")))
+        except ValueError:
+            continue
+        score = int(audience_member.get("match_score") or 0)
+        scores[client_id] = max(score, scores.get(client_id, score))
+    return [{"campaign_id": campaign.id, "client_id": client_id, "score": score} for client_id, score in scores.items()]
+
+
+def set_campaign_audience(campaign: CampaignBriefing, session: Session) -> int:
+    """
+    Replaces the campaign_audience_member rows of a campaign with the clients in
+    its matched_audience. Call it whenever matched_audience is written; the caller
+    commits. Returns the number of members stored.
+    """
+    session.add(campaign)
+    session.flush()
+    session.exec(delete(CampaignAudienceMember).where(CampaignAudienceMember.campaign_id == campaign.id))
+    rows = _audience_member_rows(campaign)
+    if rows:
+        session.execute(CampaignAudienceMember.__table__.insert(), rows)
+    return len(rows)
+
+
+def get_draft_campaigns_by_audience_client(user_id: uuid.UUID, session: Session, client_id: Optional[uuid.UUID] = None) -> List[Tuple[UUID, CampaignBriefing]]:
+    """
+    Returns (client_id, campaign) for every draft campaign of the user and each
+    client in its audience, newest campaigns first. Pass client_id to get a single
+    client's nudges, which is one probe of the audience member client index.
+    """
+    statement = (
+        select(CampaignAudienceMember.client_id, CampaignBriefing)
+        .join(CampaignBriefing, CampaignBriefing.id == CampaignAudienceMember.campaign_id)
+        .where(CampaignBriefing.user_id == user_id, CampaignBriefing.status == CampaignStatus.DRAFT)
+        .order_by(CampaignBriefing.created_at.desc())
+    )
+    if client_id is not None:
+        statement = statement.where(CampaignAudienceMember.client_id == client_id)
+    return session.exec(statement).all()
+
+
 def get_new_campaign_briefings_for_user(user_id: uuid.UUID, session: Optional[Session] = None) -> List[CampaignBriefing]:
     """
     Fetches all campaign briefings for a user that are in a 'DRAFT' state.
@@ -629,6 +809,58 @@ def get_campaign_briefing_by_resource_id(resource_id: UUID, session: Session) ->
     statement = select(CampaignBriefing).where(CampaignBriefing.triggering_resource_id == resource_id)
     return session.exec(statement).first()
     
+# Rows per INSERT statement when fanning global events out to users.
+MARKET_EVENT_INSERT_BATCH_SIZE = 1000
+
+def create_market_events_for_global_events(user_ids: List[UUID], global_events: List[GlobalMlsEvent], session: Session) -> List[Tuple[UUID, UUID]]:
+    """
+    Fans global MLS events out to users as 'new_listing' MarketEvents in bulk.
+    One query finds the (user, listing) pairs that don't have a MarketEvent yet,
+    then the rows go in with multi-row INSERT ... ON CONFLICT DO NOTHING RETURNING,
+    so concurrent runs can't create duplicates. Returns (market_event_id, user_id)
+    for the rows actually inserted; the caller commits.
+    """
+    events_by_id = {event.id: event for event in global_events}
+    if not user_ids or not events_by_id:
+        return []
+
+    missing_pairs = session.exec(
+        select(User.id, GlobalMlsEvent.id)
+        .join(GlobalMlsEvent, true())
+        .where(
+            User.id.in_(user_ids),
+            GlobalMlsEvent.id.in_(events_by_id.keys()),
+            ~exists().where(
+                MarketEvent.user_id == User.id,
+                MarketEvent.entity_id == GlobalMlsEvent.listing_key
+            )
+        )
+    ).all()
+
+    now = datetime.utcnow()
+    rows = []
+    for user_id, global_event_id in missing_pairs:
+        global_event = events_by_id[global_event_id]
+        rows.append({
+            "id": uuid.uuid4(), "user_id": user_id, "event_type": "new_listing",
+            "entity_id": global_event.listing_key, "entity_type": "property",
+            "payload": global_event.raw_payload, "market_area": "default",
+            "status": "unprocessed", "created_at": now,
+        })
+
+    inserted = []
+    for start in range(0, len(rows), MARKET_EVENT_INSERT_BATCH_SIZE):
+        statement = (
+            _dialect_insert(session, MarketEvent)
+            .values(rows[start:start + MARKET_EVENT_INSERT_BATCH_SIZE])
+            .on_conflict_do_nothing(index_elements=["user_id", "entity_id", "event_type"])
+            .returning(MarketEvent.id, MarketEvent.user_id)
+        )
+        inserted.extend(tuple(row) for row in session.execute(statement).all())
+
+    logging.info(f"CRM: Fanned {len(global_events)} global events out to {len(user_ids)} users: {len(inserted)} new MarketEvents.")
+    return inserted
+
 def get_active_events_in_range(lookback_days: int, session: Session) -> List[MarketEvent]:
     """
     Retrieves all market events within a given lookback period that are linked
@@ -689,6 +921,8 @@ def update_campaign_briefing(campaign_id: uuid.UUID, update_data: CampaignUpdate
         for key, value in update_dict.items():
             setattr(briefing, key, value)
         session.add(briefing)
+        if "matched_audience" in update_dict:
+            set_campaign_audience(briefing, session)
         session.commit()
         session.refresh(briefing)
         return briefing
@@ -760,7 +994,8 @@ def update_slate_status(slate_id: uuid.UUID, new_status: CampaignStatus, user_id
 
 def save_message(message: Message, session: Optional[Session] = None) -> Message:
     """
-    Saves a single inbound or outbound message to the universal log with transaction safety.
+    Saves a single inbound or outbound message to the universal log with transaction safety,
+    updating the client's conversation_state in the same transaction.
     Returns the saved message object.
     """
     def _save(db_session: Session) -> Message:
@@ -768,6 +1003,7 @@ def save_message(message: Message, session: Optional[Session] = None) -> Message
             db_session.add(message)
             db_session.flush()
             db_session.refresh(message)
+            record_message_in_conversation_state(message, db_session)
             logging.info(f"CRM: Message saved successfully - ID: {message.id}, Client: {message.client_id}, Direction: {message.direction}")
             return message  # FIX: Return the saved message object
         except Exception as e:
@@ -790,6 +1026,20 @@ def save_message(message: Message, session: Optional[Session] = None) -> Message
                 raise
 
 
+def save_messages(messages: List[Message], session: Session) -> List[Message]:
+    """
+    Logs many messages in the caller's transaction: one batched INSERT for the
+    rows and one upsert folding them into conversation_state.
+    """
+    if not messages:
+        return []
+    session.add_all(messages)
+    session.flush()
+    record_messages_in_conversation_state(messages, session)
+    logging.info(f"CRM: Saved {len(messages)} messages in bulk")
+    return messages
+
+
 def get_conversation_history(client_id: uuid.UUID, user_id: uuid.UUID) -> List[Message]:
     """
     Retrieves all messages for a given client, ensuring it belongs to the user.
@@ -830,63 +1080,235 @@ def get_recent_messages(client_id: uuid.UUID, user_id: uuid.UUID, limit: int = 1
         return recent_messages[::-1]
 
 
+# --- Conversation State Functions ---
+
+# How much of the latest message conversation_state keeps for the inbox.
+CONVERSATION_PREVIEW_LENGTH = 500
+
+def _dialect_insert(session: Session, table):
+    """An INSERT construct supporting ON CONFLICT for the session's database (Postgres, or SQLite in tests)."""
+    dialect = postgresql if session.get_bind().dialect.name == "postgresql" else sqlite
+    return dialect.insert(table)
+
+def record_message_in_conversation_state(message: Message, session: Session) -> None:
+    """
+    Folds a new message into its client's conversation_state row within the caller's
+    transaction. A single upsert, so concurrent writers can't lose an update: the
+    latest-message fields only move forward in time and unread inbound messages
+    increment unread_count.
+    """
+    record_messages_in_conversation_state([message], session)
+
+def record_messages_in_conversation_state(messages: List[Message], session: Session) -> None:
+    """
+    record_message_in_conversation_state for many messages as one multi-row
+    upsert. Messages are first folded per client, since a row may only be
+    upserted once per statement.
+    """
+    rows: Dict[UUID, Dict[str, Any]] = {}
+    for message in messages:
+        is_unread = message.direction == MessageDirection.INBOUND and message.status == MessageStatus.RECEIVED
+        row = rows.get(message.client_id)
+        unread_count = (row["unread_count"] if row else 0) + (1 if is_unread else 0)
+        if row is None or message.created_at >= row["last_message_at"]:
+            row = rows[message.client_id] = {
+                "client_id": message.client_id,
+                "user_id": message.user_id,
+                "last_message_id": message.id,
+                "last_message_at": message.created_at,
+                "preview": message.content[:CONVERSATION_PREVIEW_LENGTH],
+                "direction": message.direction,
+                "source": message.source,
+            }
+        row["unread_count"] = unread_count
+    if not rows:
+        return
+
+    table = ConversationState.__table__
+    statement = _dialect_insert(session, table).values(list(rows.values()))
+    is_newer = statement.excluded.last_message_at >= table.c.last_message_at
+    latest_fields = ("last_message_id", "last_message_at", "preview", "direction", "source")
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.c.client_id],
+        set_={
+            **{field: case((is_newer, statement.excluded[field]), else_=table.c[field]) for field in latest_fields},
+            "unread_count": table.c.unread_count + statement.excluded.unread_count,
+        },
+    )
+    session.exec(statement)
+
+def reset_conversation_unread(client_id: UUID, session: Session) -> None:
+    """Zeroes a conversation's unread count; call in the transaction that marks its messages read."""
+    session.exec(
+        ConversationState.__table__.update()
+        .where(ConversationState.client_id == client_id)
+        .values(unread_count=0)
+    )
+
+def rebuild_conversation_state(user_id: Optional[UUID] = None, session: Optional[Session] = None) -> int:
+    """
+    Recomputes conversation_state from the message log for one user, or for every
+    user when `user_id` is None, replacing the existing rows in one transaction.
+    Backfills the table and repairs drift. Returns the number of rows written.
+    """
+    is_unread = and_(Message.direction == MessageDirection.INBOUND, Message.status == MessageStatus.RECEIVED)
+    ranked = select(
+        Message.client_id,
+        Message.user_id,
+        Message.id.label("last_message_id"),
+        Message.created_at.label("last_message_at"),
+        func.substr(Message.content, 1, CONVERSATION_PREVIEW_LENGTH).label("preview"),
+        Message.direction,
+        Message.source,
+        func.row_number().over(
+            partition_by=Message.client_id,
+            order_by=(Message.created_at.desc(), Message.id.desc()),
+        ).label("position"),
+        func.sum(case((is_unread, 1), else_=0)).over(partition_by=Message.client_id).label("unread_count"),
+    )
+    if user_id is not None:
+        ranked = ranked.where(Message.user_id == user_id)
+    ranked = ranked.subquery()
+    columns = ["client_id", "user_id", "last_message_id", "last_message_at", "preview", "direction", "source", "unread_count"]
+    latest = select(*(ranked.c[column] for column in columns)).where(ranked.c.position == 1)
+
+    def _rebuild(db_session: Session) -> int:
+        clear = delete(ConversationState)
+        if user_id is not None:
+            clear = clear.where(ConversationState.user_id == user_id)
+        db_session.exec(clear)
+        result = db_session.exec(ConversationState.__table__.insert().from_select(columns, latest))
+        logging.info(f"CRM: Rebuilt {result.rowcount} conversation_state rows" + (f" for user {user_id}" if user_id else ""))
+        return result.rowcount
+
+    if session:
+        return _rebuild(session)
+    else:
+        with Session(engine) as new_session:
+            count = _rebuild(new_session)
+            new_session.commit()
+            return count
+
+def _encode_inbox_cursor(last_message_time: Optional[datetime], client_id: UUID) -> str:
+    return f"{last_message_time.isoformat() if last_message_time else ''}|{client_id}"
+
+def _decode_inbox_cursor(cursor: str) -> Tuple[Optional[datetime], UUID]:
+    """Raises ValueError for a malformed cursor."""
+    time_part, _, id_part = cursor.partition("|")
+    return (datetime.fromisoformat(time_part) if time_part else None), UUID(id_part)
+
+def get_conversation_inbox(
+    user_id: uuid.UUID,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    session: Optional[Session] = None,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Builds the conversation inbox for a user from conversation_state: an index range
+    scan over (user_id, last_message_at) for clients with messages, most recent
+    first, followed by the clients with no messages yet (ordered by id).
+
+    Returns (rows, next_cursor). Pass `next_cursor` back as `cursor` to fetch the
+    page after `limit` rows; it is None once the inbox is exhausted. Raises
+    ValueError for a malformed cursor.
+    """
+    after_time, after_id = _decode_inbox_cursor(cursor) if cursor else (None, None)
+    in_silent_phase = after_id is not None and after_time is None
+
+    def _get(db_session: Session) -> List[Dict[str, Any]]:
+        rows = []
+        if not in_silent_phase:
+            statement = (
+                select(
+                    Client.id, Client.full_name, Client.phone,
+                    ConversationState.preview, ConversationState.last_message_at,
+                    ConversationState.direction, ConversationState.source, ConversationState.unread_count,
+                )
+                .join(Client, Client.id == ConversationState.client_id)
+                .where(ConversationState.user_id == user_id)
+            )
+            if after_time is not None:
+                statement = statement.where(or_(
+                    ConversationState.last_message_at < after_time,
+                    and_(ConversationState.last_message_at == after_time, ConversationState.client_id < after_id),
+                ))
+            statement = statement.order_by(ConversationState.last_message_at.desc(), ConversationState.client_id.desc())
+            if limit is not None:
+                statement = statement.limit(limit)
+            rows.extend(db_session.exec(statement).all())
+
+        remaining = None if limit is None else limit - len(rows)
+        if remaining is None or remaining > 0:
+            has_state = exists().where(ConversationState.client_id == Client.id)
+            statement = select(Client.id, Client.full_name, Client.phone).where(Client.user_id == user_id, ~has_state)
+            if in_silent_phase:
+                statement = statement.where(Client.id > after_id)
+            statement = statement.order_by(Client.id)
+            if remaining is not None:
+                statement = statement.limit(remaining)
+            rows.extend((client_id, full_name, phone, None, None, None, None, 0)
+                        for client_id, full_name, phone in db_session.exec(statement).all())
+        return rows
+
+    if session:
+        results = _get(session)
+    else:
+        with Session(engine) as new_session:
+            results = _get(new_session)
+
+    rows = [
+        {
+            "client_id": client_id,
+            "client_name": full_name,
+            "client_phone": phone,
+            "last_message": preview,
+            "last_message_time": last_message_at,
+            "last_message_direction": direction,
+            "last_message_source": source,
+            "unread_count": unread_count,
+        }
+        for client_id, full_name, phone, preview, last_message_at, direction, source, unread_count in results
+    ]
+    next_cursor = None
+    if limit is not None and len(rows) == limit:
+        next_cursor = _encode_inbox_cursor(rows[-1]["last_message_time"], rows[-1]["client_id"])
+    return rows, next_cursor
+
 def get_conversation_summaries(user_id: uuid.UUID) -> List[Dict[str, Any]]:
     """Generates a list of conversation summaries for a specific user."""
     summaries = []
-    with Session(engine) as session:
-        clients = session.exec(select(Client).where(Client.user_id == user_id)).all()
-        for client in clients:
-            # Get the last message for this client
-            last_message_statement = select(Message).where(Message.client_id == client.id).order_by(Message.created_at.desc()).limit(1)
-            last_message = session.exec(last_message_statement).first()
-            
-            # Get unread count (messages from client that haven't been read)
-            unread_statement = select(Message).where(
-                Message.client_id == client.id,
-                Message.direction == 'inbound',
-                Message.status == 'received'  # Assuming unread messages have 'received' status
-            )
-            unread_messages = session.exec(unread_statement).all()
-            unread_count = len(unread_messages)
-            
-            # Determine if client is online (simple heuristic: active in last 5 minutes)
-            is_online = False
-            if last_message and last_message.direction == 'inbound':
-                # Ensure both datetimes are timezone-aware
-                message_time = last_message.created_at.replace(tzinfo=timezone.utc) if last_message.created_at.tzinfo is None else last_message.created_at
-                current_time = datetime.now(timezone.utc)
-                time_diff = current_time - message_time
-                is_online = time_diff.total_seconds() < 300  # 5 minutes
-            
-            # Get message preview
-            if last_message:
-                message_preview = last_message.content[:50] + "..." if len(last_message.content) > 50 else last_message.content
-                # Ensure timestamp is timezone-aware UTC
-                if last_message.created_at.tzinfo is None:
-                    last_message_time = last_message.created_at.replace(tzinfo=timezone.utc)
-                else:
-                    last_message_time = last_message.created_at
-            else:
-                message_preview = "No messages yet"
-                last_message_time = datetime.now(timezone.utc)
-            
-            # Only include clients who have messages (like iMessage behavior)
-            if last_message:
-                summary = {
-                    "id": f"conv-{client.id}",
-                    "client_id": client.id,
-                    "client_name": client.full_name,
-                    "client_phone": client.phone,
-                    "last_message": message_preview,
-                    "last_message_time": last_message_time.isoformat(),
-                    "unread_count": unread_count,
-                    "is_online": is_online,
-                    "has_messages": last_message is not None,
-                    "last_message_direction": last_message.direction if last_message else None,
-                    "last_message_source": last_message.source if last_message else None
-                }
-                summaries.append(summary)
-    
+    inbox, _ = get_conversation_inbox(user_id=user_id)
+    for row in inbox:
+        # Only include clients who have messages (like iMessage behavior)
+        if row["last_message_time"] is None:
+            continue
+
+        # Ensure timestamp is timezone-aware UTC
+        last_message_time = row["last_message_time"]
+        if last_message_time.tzinfo is None:
+            last_message_time = last_message_time.replace(tzinfo=timezone.utc)
+
+        # Determine if client is online (simple heuristic: active in last 5 minutes)
+        is_online = (
+            row["last_message_direction"] == MessageDirection.INBOUND
+            and (datetime.now(timezone.utc) - last_message_time).total_seconds() < 300
+        )
+
+        content = row["last_message"]
+        summaries.append({
+            "id": f"conv-{row['client_id']}",
+            "client_id": row["client_id"],
+            "client_name": row["client_name"],
+            "client_phone": row["client_phone"],
+            "last_message": content[:50] + "..." if len(content) > 50 else content,
+            "last_message_time": last_message_time.isoformat(),
+            "unread_count": row["unread_count"],
+            "is_online": is_online,
+            "has_messages": True,
+            "last_message_direction": row["last_message_direction"],
+            "last_message_source": row["last_message_source"]
+        })
+
     # Sort by: 1) Has messages, 2) Last message time, 3) Client name
     summaries.sort(key=lambda x: (
         not x['has_messages'],  # Clients with messages first
@@ -907,6 +1329,7 @@ def get_conversation_summaries_for_clients(client_ids: List[UUID], user_id: UUID
         # Ensure the requested clients belong to the user for security.
         clients = session.exec(
             select(Client).where(Client.user_id == user_id, Client.id.in_(client_ids))
+            .options(load_only(*CLIENT_SUMMARY_COLUMNS))
         ).all()
         
         for client in clients:
@@ -926,16 +1349,11 @@ def get_conversation_summaries_for_clients(client_ids: List[UUID], user_id: UUID
     summaries.sort(key=lambda x: x['last_message_time'], reverse=True)
     return summaries
 
-def find_clients_by_name_keyword(query: str, user_id: UUID) -> List[Client]:
+def find_clients_by_name_keyword(query: str, user_id: UUID) -> List[ClientSummary]:
     """
     Finds clients by a case-insensitive match on their full name.
     """
-    with Session(engine) as session:
-        statement = select(Client).where(
-            Client.user_id == user_id,
-            Client.full_name.ilike(f"%{query}%")
-        )
-        return session.exec(statement).all()
+    return get_client_summaries(user_id=user_id, name_query=query)
 
 
 # --- Scheduled Message Functions ---
@@ -956,6 +1374,72 @@ def create_scheduled_message(message_data: ScheduledMessageCreate, user_id: UUID
         session.refresh(new_message)
         return new_message
 
+def create_scheduled_messages(messages: List[ScheduledMessage], session: Session) -> int:
+    """
+    Inserts many scheduled messages with one batched multi-row INSERT in the
+    caller's transaction. No send tasks are queued: the scheduler claims each
+    row once it is due. Returns the number inserted.
+    """
+    if not messages:
+        return 0
+    rows = [message.model_dump() for message in messages]
+    session.execute(ScheduledMessage.__table__.insert(), rows)
+    logging.info(f"CRM: Inserted {len(rows)} scheduled messages in bulk")
+    return len(rows)
+
+def _claimable_scheduled_messages(lease_expired_before: datetime):
+    """Pending messages no task owns: never claimed, or claimed by a task presumed lost."""
+    return and_(
+        ScheduledMessage.status == MessageStatus.PENDING,
+        or_(ScheduledMessage.celery_task_id.is_(None), ScheduledMessage.claimed_at < lease_expired_before),
+    )
+
+def lock_due_scheduled_messages(
+    due_before: datetime, lease_expired_before: datetime, limit: int, session: Session
+) -> List[Tuple[UUID, datetime]]:
+    """
+    Locks up to `limit` claimable scheduled messages due before `due_before`,
+    oldest first, with FOR UPDATE SKIP LOCKED so concurrent schedulers lock
+    disjoint batches. Returns (message id, due time) pairs; claim them with
+    assign_scheduled_message_tasks before the caller commits.
+    """
+    return session.exec(
+        select(ScheduledMessage.id, ScheduledMessage.scheduled_at_utc)
+        .where(_claimable_scheduled_messages(lease_expired_before), ScheduledMessage.scheduled_at_utc < due_before)
+        .order_by(ScheduledMessage.scheduled_at_utc)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    ).all()
+
+def assign_scheduled_message_tasks(task_ids: Dict[UUID, str], session: Session) -> None:
+    """Claims scheduled messages for send tasks (message id -> task id) in the caller's transaction."""
+    if not task_ids:
+        return
+    table = ScheduledMessage.__table__
+    session.execute(
+        table.update()
+        .where(table.c.id == bindparam("message_id"))
+        .values(celery_task_id=bindparam("task_id"), claimed_at=datetime.now(timezone.utc)),
+        [{"message_id": message_id, "task_id": task_id} for message_id, task_id in task_ids.items()],
+    )
+
+def get_claimed_scheduled_messages(message_ids: List[UUID], task_id: str, session: Session) -> List[ScheduledMessage]:
+    """The given scheduled messages that are still pending and claimed by `task_id`."""
+    if not message_ids:
+        return []
+    return session.exec(
+        select(ScheduledMessage).where(
+            ScheduledMessage.id.in_(message_ids),
+            ScheduledMessage.status == MessageStatus.PENDING,
+            ScheduledMessage.celery_task_id == task_id,
+        )
+    ).all()
+
+def release_scheduled_message_claim(message: ScheduledMessage) -> None:
+    """Hands a message back to the scheduler, e.g. after an edit; its old task will skip it."""
+    message.celery_task_id = None
+    message.claimed_at = None
+
 def get_scheduled_message_by_id(message_id: uuid.UUID) -> Optional[ScheduledMessage]:
     with Session(engine) as session:
         return session.get(ScheduledMessage, message_id)
@@ -1083,6 +1567,39 @@ def _get_all_clients_for_system_indexing() -> List[Client]:
         statement = select(Client)
         return session.exec(statement).all()
 
+def get_client_embeddings(user_id: UUID) -> List[Tuple[UUID, Optional[List[float]]]]:
+    """
+    Returns (client_id, notes_embedding) for all of a user's clients, without loading
+    the rest of each row. Used to build the user's vector index shard.
+    """
+    with Session(engine) as session:
+        statement = select(Client.id, Client.notes_embedding).where(Client.user_id == user_id)
+        return session.exec(statement).all()
+
+def get_client_embeddings_updated_since(user_id: UUID, since: Optional[datetime]) -> List[Tuple[UUID, Optional[List[float]], datetime]]:
+    """
+    Returns (client_id, notes_embedding, embedding_updated_at) for a user's clients whose
+    embedding was written after `since`. Used to catch a vector index shard up with
+    writes made by other processes.
+    """
+    with Session(engine) as session:
+        statement = select(Client.id, Client.notes_embedding, Client.embedding_updated_at).where(
+            Client.user_id == user_id,
+            Client.embedding_updated_at.is_not(None)
+        )
+        if since is not None:
+            statement = statement.where(Client.embedding_updated_at > since)
+        return session.exec(statement.order_by(Client.embedding_updated_at)).all()
+
+def get_embedded_client_ids(user_id: UUID) -> List[UUID]:
+    """
+    Retrieves the IDs (only) of a user's clients that have an embedding. Lets the
+    vector index drop clients deleted by other processes without loading rows.
+    """
+    with Session(engine) as session:
+        statement = select(Client.id).where(Client.user_id == user_id, Client.notes_embedding.is_not(None))
+        return session.exec(statement).all()
+
 # --- Community Functions ---
 
 def enrich_clients_for_community_view(clients: List[Client]) -> List[Dict[str, Any]]:
@@ -1139,10 +1656,7 @@ def get_community_overview(user_id: uuid.UUID) -> List[Dict[str, Any]]:
     Retrieves all clients for a user and calculates health metrics for each.
     """
     logging.info(f"CRM: Calculating community overview for user_id: {user_id}")
-    
-    with Session(engine) as session:
-        clients = session.exec(select(Client).where(Client.user_id == user_id)).all()
-        return enrich_clients_for_community_view(clients)
+    return enrich_clients_for_community_view(get_client_summaries(user_id=user_id))
 
 
 def clear_active_recommendations(client_id: UUID, user_id: UUID) -> bool:
@@ -1198,6 +1712,58 @@ def clear_active_recommendations(client_id: UUID, user_id: UUID) -> bool:
         return False
 
 
+def refresh_client_scoring_profile(client: Client, session: Session, vertical: Optional[str] = None) -> None:
+    """
+    Re-derives the client's stored scoring profile from their tags, preferences
+    and notes with their user's vertical. Call whenever any of those change.
+    Pass `vertical` when the caller already has the user loaded.
+    """
+    from agent_core.brain.verticals import VERTICAL_CONFIGS
+
+    if vertical is None:
+        user = session.get(User, client.user_id)
+        vertical = user.vertical if user else None
+    vertical_config = VERTICAL_CONFIGS.get(vertical, {})
+    profile_builder = vertical_config.get("profile_builder")
+    client.scoring_profile = profile_builder(client, vertical_config) if profile_builder else None
+
+def rebuild_client_scoring_profiles(user_id: Optional[UUID] = None, batch_size: int = 500) -> int:
+    """
+    Recomputes the stored scoring profile of every client of one user, or of
+    every user when `user_id` is None. Backfills clients written before profiles
+    existed and refreshes them after the derivation changes. Returns the number
+    of clients updated.
+    """
+    updated = 0
+    with Session(engine) as session:
+        user_statement = select(User.id, User.vertical)
+        if user_id is not None:
+            user_statement = user_statement.where(User.id == user_id)
+        for current_user_id, vertical in session.exec(user_statement).all():
+            last_client_id = None
+            while True:
+                statement = (
+                    select(Client)
+                    .where(Client.user_id == current_user_id)
+                    .options(defer(Client.notes_embedding))
+                    .order_by(Client.id)
+                    .limit(batch_size)
+                )
+                if last_client_id is not None:
+                    statement = statement.where(Client.id > last_client_id)
+                clients = session.exec(statement).all()
+                if not clients:
+                    break
+                for client in clients:
+                    refresh_client_scoring_profile(client, session, vertical)
+                    session.add(client)
+                session.commit()
+                updated += len(clients)
+                last_client_id = clients[-1].id
+                session.expunge_all()
+    logging.info(f"CRM: Rebuilt scoring profiles for {updated} clients" + (f" of user {user_id}" if user_id else ""))
+    return updated
+
 def add_client_notes(client_id: UUID, notes_to_add: str, user_id: UUID) -> Optional[Client]:
     """
     Appends new notes to a client's existing notes field.
@@ -1213,6 +1779,7 @@ def add_client_notes(client_id: UUID, notes_to_add: str, user_id: UUID) -> Optio
             else:
                 client.notes = notes_to_add
             
+            refresh_client_scoring_profile(client, session)
             session.add(client)
             session.commit()
             session.refresh(client)
@@ -1252,6 +1819,7 @@ def update_client_tags_and_notes(
                 else:
                     client.notes = notes_to_add
             
+            refresh_client_scoring_profile(client, session)
             session.add(client)
             session.commit()
             session.refresh(client)
@@ -1274,24 +1842,162 @@ def get_resource_by_entity_id(entity_id: str, session: Session) -> Optional[Reso
     return session.exec(statement).first()
 
 
+def get_resources_by_entity_ids(entity_ids: List[str], session: Session) -> Dict[str, Resource]:
+    """
+    Bulk version of get_resource_by_entity_id. Loads the resources for many
+    external entity IDs in a single query, keyed by entity ID.
+    """
+    entity_id_strs = {str(entity_id) for entity_id in entity_ids if entity_id}
+    if not entity_id_strs:
+        return {}
+
+    resources_by_entity_id: Dict[str, Resource] = {}
+    for resource in session.exec(select(Resource).where(Resource.entity_id.in_(entity_id_strs))).all():
+        resources_by_entity_id.setdefault(resource.entity_id, resource)
+    return resources_by_entity_id
+
+
+def get_listing_embedding(entity_id: str, remarks_hash: str, session: Optional[Session] = None) -> Optional[List[float]]:
+    """
+    Returns the cached embedding for a listing's remarks, or None on a cache miss.
+    The hash makes the entry self-invalidating: edited remarks simply miss.
+    """
+    def _get(db_session: Session) -> Optional[List[float]]:
+        statement = select(ListingEmbedding.embedding).where(
+            ListingEmbedding.entity_id == str(entity_id),
+            ListingEmbedding.remarks_hash == remarks_hash
+        )
+        return db_session.exec(statement).first()
+
+    if session:
+        return _get(session)
+    else:
+        with Session(engine) as new_session:
+            return _get(new_session)
+
+
+def save_listing_embedding(entity_id: str, remarks_hash: str, embedding: List[float]) -> None:
+    """
+    Persists a listing embedding in its own transaction, so caching never commits
+    or expires objects in the caller's session. A concurrent writer that got there
+    first is not an error; the cached value is identical.
+    """
+    try:
+        with Session(engine) as session:
+            session.add(ListingEmbedding(entity_id=str(entity_id), remarks_hash=remarks_hash, embedding=embedding))
+            session.commit()
+    except IntegrityError:
+        logging.info(f"CRM: Listing embedding for entity {entity_id} was already cached.")
+    except Exception as e:
+        logging.warning(f"CRM: Could not cache listing embedding for entity {entity_id}: {e}")
+
+
+def get_cached_embeddings(content_hashes: List[str]) -> Dict[str, Any]:
+    """
+    Looks up several content-addressed embeddings with one query. Returns
+    {content_hash: embedding} for the hashes that are stored; a database error
+    is treated as a miss for all of them.
+    """
+    if not content_hashes:
+        return {}
+    try:
+        with Session(engine) as session:
+            statement = select(EmbeddingCacheEntry.content_hash, EmbeddingCacheEntry.embedding).where(
+                EmbeddingCacheEntry.content_hash.in_(set(content_hashes))
+            )
+            return {content_hash: embedding for content_hash, embedding in session.exec(statement).all()}
+    except Exception as e:
+        logging.warning(f"CRM: Could not read {len(content_hashes)} cached embeddings: {e}")
+        return {}
+
+
+def save_cached_embeddings(entries: List[Dict[str, Any]]) -> None:
+    """
+    Stores content-addressed embeddings ({content_hash, model, embedding} dicts)
+    with one insert in its own transaction. Hashes already stored are skipped:
+    the same hash always means the same vector.
+    """
+    if not entries:
+        return
+    try:
+        with Session(engine) as session:
+            now = datetime.now(timezone.utc)
+            statement = _dialect_insert(session, EmbeddingCacheEntry).values(
+                [{**entry, "created_at": now} for entry in entries]
+            ).on_conflict_do_nothing(index_elements=["content_hash"])
+            session.exec(statement)
+            session.commit()
+    except Exception as e:
+        logging.warning(f"CRM: Could not cache {len(entries)} embeddings: {e}")
+
+
+def prune_embedding_cache(max_entries: int) -> int:
+    """
+    Keeps the persistent embedding cache to `max_entries` rows by deleting the
+    oldest ones. Returns the number of rows removed.
+    """
+    with Session(engine) as session:
+        total = session.exec(select(func.count()).select_from(EmbeddingCacheEntry)).one()
+        excess = total - max_entries
+        if excess <= 0:
+            return 0
+        oldest = select(EmbeddingCacheEntry.content_hash).order_by(EmbeddingCacheEntry.created_at).limit(excess)
+        session.exec(delete(EmbeddingCacheEntry).where(EmbeddingCacheEntry.content_hash.in_(oldest)))
+        session.commit()
+        logging.info(f"CRM: Pruned {excess} entries from the embedding cache.")
+        return excess
+
+
 def does_nudge_exist_for_client_and_resource(client_id: uuid.UUID, resource_id: uuid.UUID, session: Session, event_type: str) -> bool:
     """
     Checks if a nudge (CampaignBriefing) of a specific type already exists
     for a given client and triggering resource.
     This is crucial for preventing duplicate nudge notifications.
     """
-    statement = select(CampaignBriefing).where(
+    statement = select(exists().where(
+        CampaignAudienceMember.client_id == client_id,
+        CampaignBriefing.id == CampaignAudienceMember.campaign_id,
         CampaignBriefing.triggering_resource_id == resource_id,
         CampaignBriefing.campaign_type == event_type
+    ))
+    return bool(session.exec(statement).one())
+
+def get_client_ids_with_nudge_for_resource(resource_id: uuid.UUID, event_type: str, session: Session) -> set[str]:
+    """
+    Bulk version of does_nudge_exist_for_client_and_resource. Returns the
+    stringified IDs of every client already in the audience of a nudge of
+    this type for the given resource, using a single query.
+    """
+    statement = (
+        select(CampaignAudienceMember.client_id)
+        .join(CampaignBriefing, CampaignBriefing.id == CampaignAudienceMember.campaign_id)
+        .where(
+            CampaignBriefing.triggering_resource_id == resource_id,
+            CampaignBriefing.campaign_type == event_type
+        )
+        .distinct()
     )
-    
-    briefings = session.exec(statement).all()
-    
-    for briefing in briefings:
-        for audience_member in briefing.matched_audience:
-            if audience_member.get("client_id") == str(client_id):
-                return True
-    return False
+    return {str(client_id) for client_id in session.exec(statement).all()}
+
+def get_client_ids_with_nudge_for_resources(resource_ids: List[uuid.UUID], session: Session) -> Dict[Tuple[uuid.UUID, str], set[str]]:
+    """
+    Bulk version of get_client_ids_with_nudge_for_resource for many resources
+    at once. Returns the nudged client IDs keyed by (resource_id, campaign_type).
+    """
+    if not resource_ids:
+        return {}
+
+    statement = (
+        select(CampaignBriefing.triggering_resource_id, CampaignBriefing.campaign_type, CampaignAudienceMember.client_id)
+        .select_from(CampaignAudienceMember)
+        .join(CampaignBriefing, CampaignBriefing.id == CampaignAudienceMember.campaign_id)
+        .where(CampaignBriefing.triggering_resource_id.in_(resource_ids))
+        .distinct()
+    )
+    nudged_by_resource: Dict[Tuple[uuid.UUID, str], set[str]] = {}
+    for resource_id, campaign_type, client_id in session.exec(statement).all():
+        nudged_by_resource.setdefault((resource_id, campaign_type), set()).add(str(client_id))
+    return nudged_by_resource
 
 def get_clients_in_batches(user_id: uuid.UUID, session: Session, batch_size: int = 500, page: int = 1) -> List[Client]:
     """
@@ -1311,7 +2017,7 @@ async def process_new_contact_for_existing_events(client: Client, user_id: UUID)
     Immediately score new contact against all existing events and create campaigns.
     This provides instant nudges without waiting for the next pipeline run.
     """
-    from agent_core.brain.nudge_engine import _get_client_score_for_event, _create_campaign_from_event
+    from agent_core.brain.nudge_engine import _get_client_score_for_event, _create_campaign_from_event, _get_resource_embedding
     from agent_core.brain.verticals import VERTICAL_CONFIGS
     from data.models.user import User
     from data.models.event import MarketEvent
@@ -1351,12 +2057,7 @@ async def process_new_contact_for_existing_events(client: Client, user_id: UUID)
                 continue
             
             try:
-                resource_embedding = None
-                if resource.resource_type == "property":
-                    remarks = resource.attributes.get('PublicRemarks')
-                    if remarks:
-                        from agent_core import llm_client
-                        resource_embedding = await llm_client.generate_embedding(remarks)
+                resource_embedding = await _get_resource_embedding(resource, session)
                 
                 score, reasons = _get_client_score_for_event(client, event, resource_embedding, vertical_config)
                 
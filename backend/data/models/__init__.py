@@ -5,9 +5,9 @@
 
 from .user import User
 from .client import Client
-from .message import Message, ScheduledMessage
-from .campaign import CampaignBriefing
-from .resource import Resource, ContentResource
+from .message import Message, ScheduledMessage, ConversationState
+from .campaign import CampaignBriefing, CampaignAudienceMember
+from .resource import Resource, ContentResource, ListingEmbedding, EmbeddingCacheEntry
 from .event import MarketEvent, PipelineRun
 from .faq import Faq
 from .feedback import NegativePreference
@@ -17,9 +17,13 @@ __all__ = [
     "Client",
     "Message",
     "ScheduledMessage",
+    "ConversationState",
     "CampaignBriefing",
+    "CampaignAudienceMember",
     "Resource",
     "ContentResource",
+    "ListingEmbedding",
+    "EmbeddingCacheEntry",
     "MarketEvent",
     "PipelineRun",
     "Faq",
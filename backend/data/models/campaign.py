@@ -5,6 +5,7 @@ from uuid import UUID, uuid4
 from datetime import datetime, timezone
 from enum import Enum
 from pydantic import BaseModel
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field, Relationship, Column, JSON
 
 if TYPE_CHECKING:
@@ -65,6 +66,23 @@ class CampaignBriefing(SQLModel, table=True):
     scheduled_messages: List["ScheduledMessage"] = Relationship(back_populates="parent_plan")
     triggering_resource: Optional["Resource"] = Relationship()
 
+class CampaignAudienceMember(SQLModel, table=True):
+    """
+    One row per client in a campaign's matched_audience. The JSON column stays the
+    display copy (names, reasons); this table is what "does this client already
+    have a nudge" and "nudges for this client" query, through indexes instead of
+    scanning audience JSON. Kept in sync by crm.set_campaign_audience.
+    """
+    __tablename__ = "campaign_audience_member"
+    __table_args__ = (
+        Index('ix_campaign_audience_member_client_campaign', 'client_id', 'campaign_id'),
+    )
+
+    campaign_id: UUID = Field(foreign_key="campaignbriefing.id", primary_key=True, ondelete="CASCADE")
+    # No foreign key: audiences may still name clients that were deleted since.
+    client_id: UUID = Field(primary_key=True)
+    score: int = Field(default=0)
+
 class CampaignUpdate(SQLModel):
     """Model for updating campaign briefings."""
     campaign_type: Optional[str] = None
@@ -3,9 +3,12 @@
 
 from typing import List, Dict, Any, Optional, TYPE_CHECKING
 from uuid import UUID, uuid4
-from sqlalchemy import Column, Text
+from datetime import datetime
+from sqlalchemy import Column, Index, Text
 from sqlmodel import SQLModel, Field, Relationship, JSON
 
+from ..vector import Float32Vector
+
 if TYPE_CHECKING:
     from .message import ScheduledMessage, Message
     from .user import User
@@ -13,6 +16,11 @@ if TYPE_CHECKING:
     from .feedback import NegativePreference
 
 class Client(SQLModel, table=True):
+    # Serves the name-ordered keyset pagination of client list views.
+    __table_args__ = (
+        Index('ix_client_user_full_name', 'user_id', 'full_name', 'id'),
+    )
+
     id: Optional[UUID] = Field(default_factory=uuid4, primary_key=True)
     user_id: UUID = Field(foreign_key="user.id", index=True)
     full_name: str
@@ -24,13 +32,20 @@ class Client(SQLModel, table=True):
     
     # --- NEW: Field to store the vector embedding of the client's notes. ---
     # This vector represents the "concept profile" for semantic matching.
-    # Stored as JSON in the database.
-    notes_embedding: Optional[List[float]] = Field(default=None, sa_column=Column(JSON))
+    # Stored as packed float32 bytes and read back as a numpy array; never serialized
+    # into API responses. List queries defer it (see crm.get_all_clients).
+    notes_embedding: Optional[List[float]] = Field(default=None, sa_column=Column(Float32Vector), exclude=True)
+    # When notes_embedding was last written; lets the vector index sync only what changed.
+    embedding_updated_at: Optional[datetime] = Field(default=None, index=True)
     
     ai_tags: List[str] = Field(default_factory=list, sa_column=Column(JSON))
     user_tags: List[str] = Field(default_factory=list, sa_column=Column(JSON))
     
     preferences: Dict[str, Any] = Field(default_factory=dict, sa_column=Column(JSON))
+    # Budget, minimum beds/baths, role and lowercased locations/keywords, derived from
+    # notes, preferences and tags whenever they change (crm.refresh_client_scoring_profile)
+    # so the scorer never parses text per event.
+    scoring_profile: Optional[Dict[str, Any]] = Field(default=None, sa_column=Column(JSON), exclude=True)
     last_interaction: Optional[str] = Field(default=None)
     timezone: Optional[str] = Field(default=None)
     
@@ -43,6 +58,21 @@ class Client(SQLModel, table=True):
 
 
 
+class ClientSummary(SQLModel):
+    """
+    Read model for client list views. Carries only the light columns, so lists
+    never load notes, preferences or the notes embedding.
+    """
+    id: UUID
+    user_id: UUID
+    full_name: str
+    email: Optional[str] = None
+    phone: Optional[str] = None
+    ai_tags: List[str] = []
+    user_tags: List[str] = []
+    last_interaction: Optional[str] = None
+    timezone: Optional[str] = None
+
 class ClientCreate(SQLModel):
     full_name: str
     email: Optional[str] = None
@@ -30,6 +30,8 @@ class MarketEvent(SQLModel, table=True):
     __table_args__ = (
         Index('ix_marketevent_user_created', 'user_id', 'created_at'),
         Index('ix_marketevent_user_type', 'user_id', 'event_type'),
+        # One event of each type per user and listing; the pipeline's fan-out inserts rely on it.
+        UniqueConstraint('user_id', 'entity_id', 'event_type', name='ux_marketevent_user_entity_type'),
     )
 
 class PipelineRun(SQLModel, table=True):
@@ -4,9 +4,11 @@
 from typing import List, Optional, TYPE_CHECKING
 from uuid import UUID, uuid4
 from datetime import datetime, timezone
-from sqlalchemy import Column, JSON
+from sqlalchemy import Column
 from sqlmodel import SQLModel, Field, Relationship
 
+from ..vector import Float32Vector
+
 if TYPE_CHECKING:
     from .client import Client
 
@@ -19,8 +21,9 @@ class NegativePreference(SQLModel, table=True):
     id: Optional[UUID] = Field(default_factory=uuid4, primary_key=True)
     client_id: UUID = Field(foreign_key="client.id", index=True)
 
-    # The vector embedding of the opportunity/resource that was dismissed.
-    dismissed_embedding: List[float] = Field(sa_column=Column(JSON))
+    # The vector embedding of the opportunity/resource that was dismissed,
+    # stored as packed float32 bytes and read back as a numpy array.
+    dismissed_embedding: List[float] = Field(sa_column=Column(Float32Vector), exclude=True)
     
     # The ID of the campaign/nudge that was dismissed.
     source_campaign_id: Optional[UUID] = Field(default=None, index=True)
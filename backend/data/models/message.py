@@ -5,6 +5,7 @@ from typing import Optional, TYPE_CHECKING, List
 from uuid import UUID, uuid4
 from datetime import datetime, timezone
 from enum import Enum
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field, Relationship
 from pydantic import BaseModel
 
@@ -36,6 +37,12 @@ class MessageSenderType(str, Enum):
     SYSTEM = "system"
 
 class Message(SQLModel, table=True):
+    # Serve the conversation inbox: latest message per client and unread counts.
+    __table_args__ = (
+        Index('ix_message_user_client_created', 'user_id', 'client_id', 'created_at'),
+        Index('ix_message_client_unread', 'client_id', 'direction', 'status'),
+    )
+
     id: Optional[UUID] = Field(default_factory=uuid4, primary_key=True)
     user_id: UUID = Field(foreign_key="user.id", index=True)
     client_id: UUID = Field(foreign_key="client.id", index=True)
@@ -55,8 +62,34 @@ class Message(SQLModel, table=True):
             datetime: lambda v: v.isoformat() + 'Z' if v.tzinfo is None else v.isoformat()
         }
 
+class ConversationState(SQLModel, table=True):
+    """
+    One row per client conversation holding what the inbox shows: the latest
+    message and the unread inbound count. Maintained in the same transaction as
+    every message write (crm.record_message_in_conversation_state) so inbox reads
+    are an index range scan instead of an aggregate over the message table.
+    Rebuild from the message log with `python rebuild_conversation_state.py`.
+    """
+    __tablename__ = "conversation_state"
+    __table_args__ = (
+        Index('ix_conversation_state_user_last_message', 'user_id', 'last_message_at', 'client_id'),
+    )
+
+    client_id: UUID = Field(foreign_key="client.id", primary_key=True)
+    user_id: UUID = Field(foreign_key="user.id")
+    last_message_id: Optional[UUID] = Field(default=None)
+    last_message_at: Optional[datetime] = Field(default=None)
+    preview: Optional[str] = Field(default=None)
+    direction: Optional[MessageDirection] = Field(default=None)
+    source: Optional[MessageSource] = Field(default=None)
+    unread_count: int = Field(default=0)
+
 class ScheduledMessage(SQLModel, table=True):
     __tablename__ = "scheduledmessage"  # Explicitly define the table name
+    # Serve the scheduler's claim of due pending messages, oldest first.
+    __table_args__ = (
+        Index('ix_scheduledmessage_status_scheduled_at', 'status', 'scheduled_at_utc'),
+    )
 
     id: Optional[UUID] = Field(default_factory=uuid4, primary_key=True)
     user_id: UUID = Field(foreign_key="user.id", index=True)
@@ -69,6 +102,9 @@ class ScheduledMessage(SQLModel, table=True):
     sent_at: Optional[datetime] = Field(default=None)
     error_message: Optional[str] = Field(default=None)
     celery_task_id: Optional[str] = Field(default=None, index=True) # Added to manage the Celery task
+    # When the scheduler handed this message to celery_task_id; a claim older than
+    # the scheduler's lease is treated as lost and the message is claimed again.
+    claimed_at: Optional[datetime] = Field(default=None)
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     playbook_touchpoint_id: Optional[str] = Field(default=None, index=True)
     is_recurring: bool = Field(default=False, index=True)
@@ -6,6 +6,9 @@ from typing import List, Optional, TYPE_CHECKING, Dict, Any
 from uuid import UUID, uuid4
 from datetime import datetime, timezone
 from sqlmodel import SQLModel, Field, Relationship, Column, JSON
+from sqlalchemy import UniqueConstraint
+
+from ..vector import Float32Vector
 
 if TYPE_CHECKING:
     from .user import User
@@ -36,6 +39,31 @@ class Resource(SQLModel, table=True):
     user: Optional["User"] = Relationship(back_populates="resources")
     campaigns: List["CampaignBriefing"] = Relationship(back_populates="triggering_resource")
 
+class ListingEmbedding(SQLModel, table=True):
+    """
+    (Data Model) Caches the embedding of a listing's PublicRemarks.
+    Keyed on the listing's entity_id plus a hash of the remarks text, so a listing is
+    embedded once and re-embedded only when its remarks actually change.
+    """
+    __table_args__ = (UniqueConstraint("entity_id", "remarks_hash", name="uq_listingembedding_entity_remarks"),)
+
+    id: Optional[UUID] = Field(default_factory=uuid4, primary_key=True)
+    entity_id: str = Field(index=True)
+    remarks_hash: str = Field(max_length=64)  # sha256 hex digest of the embedded text
+    embedding: List[float] = Field(sa_column=Column(JSON))
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+class EmbeddingCacheEntry(SQLModel, table=True):
+    """
+    (Data Model) The persistent tier of the embedding cache (agent_core/embedding_cache.py).
+    Content-addressed: keyed on sha256(model, text), so any caller embedding the same
+    text with the same model reuses the stored vector.
+    """
+    content_hash: str = Field(primary_key=True, max_length=64)  # sha256 hex digest of model + text
+    model: str = Field(max_length=100)
+    embedding: List[float] = Field(sa_column=Column(Float32Vector, nullable=False))
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc), index=True)
+
 class ResourceCreate(SQLModel):
     """Defines the structure for creating a new resource."""
     user_id: UUID
@@ -57,6 +85,9 @@ class ContentResource(SQLModel, table=True):
     content_type: str = Field(default="article")  # article, video, document, etc.
     status: ResourceStatus = Field(default=ResourceStatus.ACTIVE, index=True)
     usage_count: int = Field(default=0, index=True)  # Track how often it's used
+    # Embedding of the title and description, written whenever either changes
+    # (content_resource_service.embed_content_resource) so matching never re-embeds.
+    embedding: Optional[List[float]] = Field(default=None, sa_column=Column(Float32Vector), exclude=True)
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc), index=True)
     updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc), index=True)
 
@@ -240,6 +240,8 @@ async def seed_database():
         logger.info("Generating initial embeddings for all seeded clients...")
         # --- FIXED: Import crm_service only when needed ---
         from . import crm as crm_service
+        crm_service.set_campaign_audience(realtor_nudge, session)
+        crm_service.set_campaign_audience(therapist_nudge, session)
         for client in realty_clients + therapy_clients:
             try:
                 await crm_service.regenerate_embedding_for_client(client, session=session)
@@ -0,0 +1,37 @@
+# File Path: backend/data/vector.py
+# Purpose: Column type for embedding vectors stored as packed float32 bytes.
+
+from typing import Any, Optional
+
+import numpy as np
+from sqlalchemy import LargeBinary
+from sqlalchemy.types import TypeDecorator
+
+# Little-endian float32, fixed so the stored bytes don't depend on the host.
+VECTOR_DTYPE = np.dtype('<f4')
+
+
+class Float32Vector(TypeDecorator):
+    """
+    Stores an embedding as raw float32 bytes (bytea on Postgres) instead of a JSON
+    array: 6 KB instead of ~20 KB per 1536-d vector, and no JSON parsing on read.
+    Accepts any sequence of floats on write; reads come back as a read-only numpy
+    array viewing the fetched buffer (np.frombuffer, no copy).
+    """
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value: Any, dialect) -> Optional[bytes]:
+        if value is None:
+            return None
+        return np.asarray(value, dtype=VECTOR_DTYPE).tobytes()
+
+    def process_result_value(self, value: Optional[bytes], dialect) -> Optional[np.ndarray]:
+        if value is None:
+            return None
+        return np.frombuffer(value, dtype=VECTOR_DTYPE)
+
+
+def has_embedding(embedding: Any) -> bool:
+    """True for a non-empty vector, whether it is a fresh list or an array read back from the database."""
+    return isinstance(embedding, (list, np.ndarray)) and len(embedding) > 0
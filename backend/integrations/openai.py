@@ -11,6 +11,8 @@ from common.config import get_settings
 
 logger = logging.getLogger(__name__)
 
+EMBEDDING_MODEL = "text-embedding-3-small"
+
 @lru_cache()
 def get_async_client() -> AsyncOpenAI:
     """
@@ -35,7 +37,7 @@ async def get_text_embedding(text: str) -> List[float]:
     try:
         client = get_async_client()
         response = await client.embeddings.create(
-            model="text-embedding-3-small",
+            model=EMBEDDING_MODEL,
             input=text
         )
         return response.data[0].embedding
@@ -43,6 +45,22 @@ async def get_text_embedding(text: str) -> List[float]:
         logger.error(f"OPENAI INTEGRATION: Error getting text embedding: {e}", exc_info=True)
         return [0.0] * 1536
 
+async def get_text_embeddings(texts: List[str]) -> List[List[float]]:
+    """
+    Embeds several texts with one OpenAI API request. Results are returned in
+    the order of `texts`; on an API error every text gets a zero vector.
+    """
+    try:
+        client = get_async_client()
+        response = await client.embeddings.create(
+            model=EMBEDDING_MODEL,
+            input=texts
+        )
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+    except (OpenAIError, ValueError) as e:
+        logger.error(f"OPENAI INTEGRATION: Error getting {len(texts)} text embeddings: {e}", exc_info=True)
+        return [[0.0] * 1536 for _ in texts]
+
 async def get_chat_completion(
     messages: list,
     model: str = "gpt-4o-mini",
@@ -0,0 +1,247 @@
+# FILE: backend/integrations/sms_dispatcher.py
+#
+# PURPOSE:
+# Sends many SMS messages from one number without blocking the event loop.
+# At most SMS_DISPATCH_CONCURRENCY sends run at a time (twilio_outgoing.send_sms_async
+# by default; blocking senders run on worker threads), and each sending number
+# draws from a token bucket so a campaign stays within the number's Twilio
+# throughput instead of overflowing its queue. The bucket lives in Redis, so
+# campaign sends in API processes and scheduled sends in Celery workers share
+# one budget per number; if Redis can't be reached a process falls back to its
+# own in-memory bucket (see SMS_RATE_LIMIT_SHARED). FakeTwilioSender stands in
+# for Twilio in tests and load runs.
+
+import asyncio
+import logging
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional, Union
+
+import redis
+import redis.asyncio as aioredis
+
+from common.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# (from_number, to_number, body) -> sent; the signature of twilio_outgoing.send_sms
+# and, awaited, of send_sms_async.
+SmsSender = Union[Callable[[str, str, str], bool], Callable[[str, str, str], Awaitable[bool]]]
+
+
+@dataclass
+class SmsJob:
+    client_id: uuid.UUID
+    to_number: str
+    body: str
+
+
+@dataclass
+class SmsResult:
+    client_id: uuid.UUID
+    to_number: str
+    body: str
+    sent: bool
+
+
+class TokenBucket:
+    """
+    Refills `rate` tokens per second up to `capacity`. `reserve` takes a token
+    and returns how long the caller must wait for it; the balance may go
+    negative, which queues later callers behind earlier ones in arrival order.
+    Thread safe and not tied to an event loop, so one bucket per number is
+    shared by every send in the process. SharedTokenBucket extends the budget
+    across processes and falls back to this one.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._clock = clock
+        self._tokens = self.capacity
+        self._updated_at = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+
+_buckets: Dict[str, TokenBucket] = {}
+_buckets_lock = threading.Lock()
+
+
+def get_bucket(from_number: str, rate: float) -> TokenBucket:
+    """The process-wide bucket for a sending number, recreated if its rate changed."""
+    with _buckets_lock:
+        bucket = _buckets.get(from_number)
+        if bucket is None or bucket.rate != rate:
+            bucket = _buckets[from_number] = TokenBucket(rate)
+        return bucket
+
+
+# Refills and takes one token atomically. Uses the Redis server's clock so the
+# processes sharing a bucket need not agree on time. Returns the wait in seconds
+# as a string, since Redis truncates Lua numbers to integers.
+_RESERVE_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+local tokens = tonumber(state[1]) or capacity
+local updated_at = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated_at) * rate) - 1
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated_at', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil((capacity - tokens) / rate) + 60)
+if tokens >= 0 then
+    return '0'
+end
+return tostring(-tokens / rate)
+"""
+
+
+class SharedTokenBucket:
+    """
+    A TokenBucket whose balance is kept in Redis under the sending number, so
+    every process sending from that number draws from the same tokens. Falls
+    back to the process-wide bucket when Redis is unavailable rather than
+    holding up sends.
+    """
+
+    def __init__(self, redis_client: Optional["aioredis.Redis"], from_number: str, rate: float):
+        self.rate = rate
+        self.capacity = max(1.0, rate)
+        self._redis = redis_client
+        self._key = f"sms_rate_limit:{from_number}"
+        self._fallback = get_bucket(from_number, rate)
+        self._script = redis_client.register_script(_RESERVE_SCRIPT) if redis_client is not None else None
+
+    async def reserve(self) -> float:
+        if self._script is not None:
+            try:
+                return float(await self._script(keys=[self._key], args=[self.rate, self.capacity]))
+            except (redis.RedisError, OSError) as e:
+                logger.warning(f"SMS DISPATCHER: Shared rate limit unavailable for {self._key}, limiting this process only: {e}")
+                self._script = None
+        return self._fallback.reserve()
+
+
+def _rate_limit_redis() -> Optional["aioredis.Redis"]:
+    """A Redis client for the shared rate limit on the running loop, or None when it is disabled."""
+    settings = get_settings()
+    if not (settings.SMS_RATE_LIMIT_SHARED and settings.REDIS_URL):
+        return None
+    return aioredis.from_url(settings.REDIS_URL, socket_connect_timeout=1, socket_timeout=1)
+
+
+async def dispatch(
+    from_number: str,
+    jobs: List[SmsJob],
+    send: Optional[SmsSender] = None,
+    concurrency: Optional[int] = None,
+    messages_per_second: Optional[float] = None,
+) -> List[SmsResult]:
+    """
+    Sends every job from `from_number` and returns one result per job, in job
+    order. A send that raises counts as not sent. Defaults come from settings
+    and twilio_outgoing.send_sms_async.
+    """
+    if not jobs:
+        return []
+    if send is None:
+        from integrations import twilio_outgoing
+        send = twilio_outgoing.send_sms_async
+    if concurrency is None:
+        concurrency = get_settings().SMS_DISPATCH_CONCURRENCY
+    if messages_per_second is None:
+        messages_per_second = get_settings().SMS_MESSAGES_PER_SECOND_PER_NUMBER
+    concurrency = max(1, min(concurrency, len(jobs)))
+    redis_client = _rate_limit_redis()
+    bucket = SharedTokenBucket(redis_client, from_number, messages_per_second)
+
+    results: List[Optional[SmsResult]] = [None] * len(jobs)
+    next_job = iter(range(len(jobs)))
+    loop = asyncio.get_running_loop()
+    # Blocking senders get a pool sized to the worker count; the loop's default
+    # executor may have fewer threads.
+    executor = None
+    if not asyncio.iscoroutinefunction(send):
+        executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="sms-dispatch")
+
+    async def send_one(job: SmsJob) -> bool:
+        if executor is None:
+            return await send(from_number, job.to_number, job.body)
+        return await loop.run_in_executor(executor, send, from_number, job.to_number, job.body)
+
+    async def worker():
+        for index in next_job:
+            job = jobs[index]
+            delay = await bucket.reserve()
+            if delay:
+                await asyncio.sleep(delay)
+            try:
+                sent = bool(await send_one(job))
+            except Exception as e:
+                logger.error(f"SMS DISPATCHER: Send to {job.to_number} failed: {e}")
+                sent = False
+            results[index] = SmsResult(job.client_id, job.to_number, job.body, sent)
+
+    started_at = time.perf_counter()
+    try:
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=False)
+        if redis_client is not None:
+            await redis_client.aclose()
+    sent_count = sum(result.sent for result in results)
+    logger.info(
+        f"SMS DISPATCHER: Sent {sent_count} of {len(jobs)} messages from {from_number} "
+        f"in {time.perf_counter() - started_at:.2f}s with {concurrency} workers."
+    )
+    return results
+
+
+class FakeTwilioSender:
+    """
+    A send_sms stand-in with Twilio-like latency and an optional failure rate.
+    Records every accepted message and the peak number of concurrent calls.
+    """
+
+    def __init__(self, latency_seconds: float = 0.05, failure_rate: float = 0.0, seed: Optional[int] = None):
+        self.latency_seconds = latency_seconds
+        self.failure_rate = failure_rate
+        self.sent: List[tuple] = []
+        self.calls = 0
+        self.max_in_flight = 0
+        self._in_flight = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def __call__(self, from_number: str, to_number: str, body: str) -> bool:
+        with self._lock:
+            self.calls += 1
+            self._in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self._in_flight)
+            fails = self._random.random() < self.failure_rate
+        try:
+            time.sleep(self.latency_seconds)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+        if fails:
+            return False
+        with self._lock:
+            self.sent.append((from_number, to_number, body))
+        return True
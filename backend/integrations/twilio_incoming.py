@@ -112,7 +112,7 @@ async def process_incoming_sms(from_number: str, to_number: str, body: str):
                 faq_response = await match_faq_with_gemini(body, user_faqs)
                 if faq_response:
                     logging.info(f"TWILIO: FAQ matched, sending auto-response.")
-                    if twilio_outgoing.send_sms(to_number=from_number, body=faq_response[:320], from_number=to_number):
+                    if await twilio_outgoing.send_sms_async(to_number=from_number, body=faq_response[:320], from_number=to_number):
                         outgoing_message = Message(
                             client_id=found_client.id, user_id=user.id, content=faq_response[:320],
                             direction=MessageDirection.OUTBOUND, status=MessageStatus.SENT,
@@ -2,48 +2,138 @@
 # DEFINITIVE FIX: The `send_sms` function is updated to accept a `from_number`
 # parameter, making it multi-tenant aware and capable of sending messages
 # from the user's specific AI Nudge number.
+#
+# Messages are sent with `send_sms_async` over a keep-alive httpx client owned
+# by the running event loop, so a send never blocks the loop. At most
+# TWILIO_MAX_CONCURRENT_REQUESTS requests are in flight per loop. The Messages
+# POST is not idempotent, so only failures that happen before Twilio sees the
+# request (connection errors, pool timeouts) and rate limits (429) are retried
+# with asyncio.sleep backoff; read timeouts and 5xx responses may already have
+# sent the message and are not retried. This is the only retry policy for SMS:
+# callers must not wrap it in their own retry loop. `send_sms` is the blocking
+# wrapper for Celery tasks.
 
+import asyncio
 import logging
-from twilio.rest import Client
-from twilio.base.exceptions import TwilioRestException
+import weakref
+from typing import Optional
+
+import httpx
+
 from common.config import get_settings
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
-try:
-    twilio_client = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN)
-    logger.info("Twilio client initialized successfully.")
-except Exception as e:
-    twilio_client = None
-    logger.warning(f"Twilio credentials not found. SMS sending will be disabled. Error: {e}")
+TWILIO_API_BASE_URL = "https://api.twilio.com/2010-04-01"
+SEND_MAX_ATTEMPTS = 3
+SEND_BACKOFF_SECONDS = 0.5
+SEND_TIMEOUT_SECONDS = 10.0
+RETRYABLE_STATUS_CODES = {429}
+# Failures raised before the request is written, so Twilio cannot have sent it.
+RETRYABLE_TRANSPORT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
 
-# --- MODIFIED: Added 'from_number' parameter ---
-def send_sms(from_number: str, to_number: str, body: str) -> bool:
+if not (settings.TWILIO_ACCOUNT_SID and settings.TWILIO_AUTH_TOKEN):
+    logger.warning("Twilio credentials not found. SMS sending will be disabled.")
+
+
+class _AsyncTransport:
+    """A pooled HTTP client and a concurrency bound, both belonging to one event loop."""
+
+    def __init__(self, max_concurrency: int):
+        limits = httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency)
+        self.client = httpx.AsyncClient(
+            base_url=TWILIO_API_BASE_URL,
+            auth=(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN),
+            limits=limits,
+            timeout=SEND_TIMEOUT_SECONDS,
+        )
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+
+
+# One transport per event loop: httpx connections can't be shared across loops.
+_transports: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _AsyncTransport]" = weakref.WeakKeyDictionary()
+
+
+def _get_transport() -> _AsyncTransport:
+    loop = asyncio.get_running_loop()
+    transport = _transports.get(loop)
+    if transport is None:
+        transport = _transports[loop] = _AsyncTransport(settings.TWILIO_MAX_CONCURRENT_REQUESTS)
+    return transport
+
+
+async def close_transport() -> None:
+    """Closes the running loop's connection pool; call before the loop shuts down."""
+    transport = _transports.pop(asyncio.get_running_loop(), None)
+    if transport is not None:
+        await transport.client.aclose()
+
+
+def _retry_delay(attempt: int, response: Optional[httpx.Response]) -> float:
+    """Exponential backoff, or the Retry-After the API asked for when it is longer."""
+    delay = SEND_BACKOFF_SECONDS * (2 ** attempt)
+    if response is not None:
+        try:
+            delay = max(delay, float(response.headers.get("Retry-After", 0)))
+        except ValueError:
+            pass
+    return delay
+
+
+async def send_sms_async(from_number: str, to_number: str, body: str) -> bool:
     """
     Sends an SMS message using the Twilio API from a specific number.
     """
-    if not twilio_client:
+    if not (settings.TWILIO_ACCOUNT_SID and settings.TWILIO_AUTH_TOKEN):
         logger.error("Cannot send SMS: Twilio client is not configured.")
         return False
-        
-    # --- ADDED: Validation for the from_number ---
+
     if not from_number:
         logger.error(f"Cannot send SMS to {to_number}: A 'from_number' was not provided.")
         return False
 
-    try:
-        logger.info(f"Sending SMS from {from_number} to {to_number} via Twilio...")
-        message = twilio_client.messages.create(
-            to=to_number,
-            from_=from_number, # <-- Use the provided from_number
-            body=body
-        )
-        logger.info(f"SMS sent successfully. Message SID: {message.sid}")
-        return True
-    except TwilioRestException as e:
-        logger.error(f"Failed to send SMS to {to_number} from {from_number}. Twilio error: {e}")
-        return False
-    except Exception as e:
-        logger.error(f"An unexpected error occurred while sending SMS: {e}")
-        return False
\ No newline at end of file
+    transport = _get_transport()
+    url = f"/Accounts/{settings.TWILIO_ACCOUNT_SID}/Messages.json"
+    for attempt in range(SEND_MAX_ATTEMPTS):
+        response = None
+        try:
+            async with transport.semaphore:
+                logger.info(f"Sending SMS from {from_number} to {to_number} via Twilio...")
+                response = await transport.client.post(url, data={"To": to_number, "From": from_number, "Body": body})
+            if response.status_code < 300:
+                logger.info(f"SMS sent successfully. Message SID: {response.json().get('sid')}")
+                return True
+            if response.status_code not in RETRYABLE_STATUS_CODES:
+                logger.error(f"Failed to send SMS to {to_number} from {from_number}. Twilio error: {response.status_code} {response.text}")
+                return False
+            logger.warning(f"Twilio returned {response.status_code} sending to {to_number} (attempt {attempt + 1}).")
+        except RETRYABLE_TRANSPORT_ERRORS as e:
+            logger.warning(f"Could not reach Twilio sending SMS to {to_number} (attempt {attempt + 1}): {e}")
+        except httpx.HTTPError as e:
+            # The request may have reached Twilio, so a retry could send the SMS twice.
+            logger.error(f"SMS to {to_number} from {from_number} has unknown delivery status after a network error: {e}")
+            return False
+        except Exception as e:
+            logger.error(f"An unexpected error occurred while sending SMS: {e}")
+            return False
+
+        if attempt < SEND_MAX_ATTEMPTS - 1:
+            await asyncio.sleep(_retry_delay(attempt, response))
+
+    logger.error(f"Failed to send SMS to {to_number} from {from_number} after {SEND_MAX_ATTEMPTS} attempts.")
+    return False
+
+
+def send_sms(from_number: str, to_number: str, body: str) -> bool:
+    """
+    Blocking send_sms_async for synchronous callers such as Celery tasks. Must not
+    be called on a thread that is running an event loop; await send_sms_async there.
+    """
+    async def _send() -> bool:
+        try:
+            return await send_sms_async(from_number, to_number, body)
+        finally:
+            await close_transport()
+
+    return asyncio.run(_send())
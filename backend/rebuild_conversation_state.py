@@ -0,0 +1,30 @@
+# FILE: rebuild_conversation_state.py
+"""
+Rebuilds the conversation_state table (the inbox read model) from the message log.
+Run once after the add_conversation_state_table migration to backfill it, or any
+time to repair drift.
+
+    python rebuild_conversation_state.py                 # every user
+    python rebuild_conversation_state.py --user-id <uuid>
+"""
+import argparse
+import logging
+import uuid
+
+from data import crm as crm_service
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--user-id", type=uuid.UUID, help="Only rebuild this user's conversations.")
+    args = parser.parse_args()
+
+    count = crm_service.rebuild_conversation_state(user_id=args.user_id)
+    logging.info(f"Rebuilt {count} conversation_state rows.")
+
+
+if __name__ == "__main__":
+    main()
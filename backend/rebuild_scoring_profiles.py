@@ -0,0 +1,31 @@
+# FILE: rebuild_scoring_profiles.py
+"""
+Recomputes the stored client scoring profiles (role, budget, minimum beds/baths,
+locations and keywords) from client tags, preferences and notes. Run once after
+the add_client_scoring_profile migration to backfill them, and again whenever the
+profile derivation changes (SCORING_PROFILE_VERSION is bumped).
+
+    python rebuild_scoring_profiles.py                 # every user
+    python rebuild_scoring_profiles.py --user-id <uuid>
+"""
+import argparse
+import logging
+import uuid
+
+from data import crm as crm_service
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--user-id", type=uuid.UUID, help="Only rebuild this user's clients.")
+    args = parser.parse_args()
+
+    count = crm_service.rebuild_client_scoring_profiles(user_id=args.user_id)
+    logging.info(f"Rebuilt scoring profiles for {count} clients.")
+
+
+if __name__ == "__main__":
+    main()
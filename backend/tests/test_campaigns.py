@@ -3,10 +3,13 @@
 import pytest
 import uuid
 from fastapi.testclient import TestClient
-from unittest.mock import patch
-from sqlmodel import Session
+from unittest.mock import patch, AsyncMock, MagicMock
+from sqlmodel import Session, select
 from data.models import User, Client, CampaignBriefing, Resource
 from data.models.campaign import CampaignStatus
+from data.models.message import Message, MessageStatus, ConversationState
+from integrations import sms_dispatcher
+from workflow import outbound as outbound_workflow
 
 def test_draft_instant_nudge_succeeds(authenticated_client: TestClient):
     """
@@ -94,6 +97,43 @@ def test_update_campaign_audience_succeeds(authenticated_client: TestClient, tes
     assert any(client["client_id"] == str(test_client.id) for client in data["matched_audience"])
     assert any(client["client_id"] == str(client2.id) for client in data["matched_audience"])
 
+def test_campaign_audience_members_track_matched_audience(authenticated_client: TestClient, test_campaign: CampaignBriefing, test_client: Client, session: Session):
+    """
+    Tests that audience updates keep campaign_audience_member in sync, so nudge
+    existence checks and per-client nudge lookups see the new audience.
+    """
+    from data import crm as crm_service
+    from data.models import CampaignAudienceMember
+
+    resource_id = uuid.uuid4()
+    test_campaign.triggering_resource_id = resource_id
+    test_campaign.matched_audience = [
+        {"client_id": str(test_client.id), "client_name": "Test Client", "match_score": 40},
+        {"client_id": str(test_client.id), "client_name": "Test Client", "match_score": 70},
+        {"client_id": "not-a-uuid", "client_name": "Broken"},
+    ]
+    assert crm_service.set_campaign_audience(test_campaign, session) == 1
+    session.commit()
+
+    member = session.get(CampaignAudienceMember, (test_campaign.id, test_client.id))
+    assert member.score == 70
+    assert crm_service.does_nudge_exist_for_client_and_resource(test_client.id, resource_id, session, "market_opportunity")
+    assert not crm_service.does_nudge_exist_for_client_and_resource(test_client.id, resource_id, session, "price_drop")
+    assert crm_service.get_client_ids_with_nudge_for_resource(resource_id, "market_opportunity", session) == {str(test_client.id)}
+
+    client2 = Client(id=uuid.uuid4(), user_id=test_campaign.user_id, full_name="Test Client 2", phone_number="+15551234568")
+    session.add(client2)
+    session.commit()
+    response = authenticated_client.put(f"/api/campaigns/{test_campaign.id}/audience", json={"client_ids": [str(client2.id)]})
+    assert response.status_code == 200
+
+    session.expire_all()
+    assert not crm_service.does_nudge_exist_for_client_and_resource(test_client.id, resource_id, session, "market_opportunity")
+    assert crm_service.get_client_ids_with_nudge_for_resource(resource_id, "market_opportunity", session) == {str(client2.id)}
+    nudges = authenticated_client.get(f"/api/clients/{client2.id}/nudges").json()
+    assert [nudge["campaign_id"] for nudge in nudges] == [str(test_campaign.id)]
+    assert authenticated_client.get(f"/api/clients/{test_client.id}/nudges").json() == []
+
 def test_update_campaign_audience_fails_briefing_not_found(authenticated_client: TestClient):
     """
     Tests that updating audience for non-existent briefing fails.
@@ -450,6 +490,97 @@ def test_trigger_send_campaign_succeeds(authenticated_client: TestClient, test_c
         # Assert that the mocked function was called once with the correct arguments
         mock_send.assert_called_once_with(test_campaign.id, test_user.id)
 
+@pytest.mark.asyncio
+async def test_dispatch_bounds_concurrency_and_keeps_job_order():
+    """
+    Tests that the SMS dispatcher runs at most `concurrency` sends at once and
+    returns one result per job, in order, counting raised errors as failures.
+    """
+    fake = sms_dispatcher.FakeTwilioSender(latency_seconds=0.01)
+
+    def flaky_send(from_number, to_number, body):
+        if to_number.endswith("3"):
+            raise RuntimeError("network down")
+        return fake(from_number, to_number, body)
+
+    jobs = [sms_dispatcher.SmsJob(uuid.uuid4(), f"+1555000000{index}", f"Hi {index}") for index in range(10)]
+    results = await sms_dispatcher.dispatch("+15550001111", jobs, send=flaky_send, concurrency=4, messages_per_second=1000)
+
+    assert [result.client_id for result in results] == [job.client_id for job in jobs]
+    assert [result.sent for result in results] == [index != 3 for index in range(10)]
+    assert 1 < fake.max_in_flight <= 4
+
+def test_token_bucket_spaces_sends_at_the_number_rate():
+    """Tests that reservations beyond the burst wait 1/rate seconds apiece."""
+    now = [0.0]
+    bucket = sms_dispatcher.TokenBucket(rate=2, clock=lambda: now[0])
+    assert [bucket.reserve() for _ in range(4)] == [0.0, 0.0, 0.5, 1.0]
+    now[0] = 10.0
+    assert bucket.reserve() == 0.0
+
+@pytest.mark.asyncio
+async def test_shared_token_bucket_uses_redis_and_falls_back_to_the_process_bucket():
+    """
+    Tests that the shared bucket takes its wait from the Redis script, and once
+    Redis fails limits with the process-wide bucket for that number instead.
+    """
+    import redis
+
+    redis_client = MagicMock()
+    script = AsyncMock(side_effect=[b"0", b"0.75", redis.ConnectionError("down")])
+    redis_client.register_script.return_value = script
+    bucket = sms_dispatcher.SharedTokenBucket(redis_client, "+15550009999", rate=1000)
+
+    assert [await bucket.reserve(), await bucket.reserve()] == [0.0, 0.75]
+    assert script.await_args.kwargs == {"keys": ["sms_rate_limit:+15550009999"], "args": [1000, 1000]}
+    with patch.object(sms_dispatcher.get_bucket("+15550009999", 1000), "reserve", return_value=0.25) as local_reserve:
+        assert [await bucket.reserve(), await bucket.reserve()] == [0.25, 0.25]
+    assert script.await_count == 3
+    assert local_reserve.call_count == 2
+
+@pytest.mark.asyncio
+async def test_send_campaign_to_audience_records_results_in_bulk(session: Session, test_user: User):
+    """
+    Tests a campaign send end to end against the fake Twilio sender: every
+    recipient gets a personalized message, only delivered sends are logged as
+    messages, failures are reported in the result, and only reached clients have
+    last_interaction updated.
+    """
+    test_user.twilio_phone_number = "+15550001111"
+    reachable = Client(id=uuid.uuid4(), user_id=test_user.id, full_name="Ada Lovelace", phone="+15550002222")
+    unreachable = Client(id=uuid.uuid4(), user_id=test_user.id, full_name="Alan Turing", phone="+15550003333")
+    no_phone = Client(id=uuid.uuid4(), user_id=test_user.id, full_name="Grace Hopper")
+    campaign = CampaignBriefing(
+        user_id=test_user.id, campaign_type="market_opportunity", headline="New listing",
+        key_intel={}, original_draft="Hi [Client Name], take a look!",
+        matched_audience=[{"client_id": str(client.id)} for client in (reachable, unreachable, no_phone)],
+    )
+    session.add_all([test_user, reachable, unreachable, no_phone, campaign])
+    session.commit()
+
+    fake = sms_dispatcher.FakeTwilioSender(latency_seconds=0)
+    send = lambda from_number, to_number, body: to_number != unreachable.phone and fake(from_number, to_number, body)
+    real_dispatch = sms_dispatcher.dispatch
+
+    async def dispatch_with_fake(from_number, jobs):
+        return await real_dispatch(from_number, jobs, send=send, concurrency=2, messages_per_second=1000)
+
+    with patch("workflow.outbound.engine", session.get_bind()), \
+         patch("workflow.outbound.sms_dispatcher.dispatch", side_effect=dispatch_with_fake):
+        result = await outbound_workflow.send_campaign_to_audience(campaign.id, test_user.id)
+
+    assert fake.sent == [("+15550001111", reachable.phone, "Hi Ada, take a look!")]
+    assert result["sent"] == 1
+    assert set(result["failed_client_ids"]) == {unreachable.id, no_phone.id}
+    session.expire_all()
+    messages = {message.client_id: message for message in session.exec(select(Message)).all()}
+    assert set(messages) == {reachable.id}
+    assert messages[reachable.id].status == MessageStatus.SENT
+    assert session.get(ConversationState, unreachable.id) is None
+    assert session.get(Client, reachable.id).last_interaction is not None
+    assert session.get(Client, unreachable.id).last_interaction is None
+    assert session.get(ConversationState, reachable.id).preview == "Hi Ada, take a look!"
+
 def test_trigger_send_campaign_fails_not_found(authenticated_client: TestClient):
     """
     Tests that triggering send for non-existent campaign fails.
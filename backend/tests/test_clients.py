@@ -94,6 +94,29 @@ def test_create_client_fails_invalid_data(authenticated_client: TestClient, test
     assert data["full_name"] == ""
     assert data["phone"] == "invalid-phone"
 
+def test_get_clients_returns_summaries_in_keyset_pages(authenticated_client: TestClient, session: Session, test_user: User):
+    """Tests that the client list omits heavy columns and pages by (full_name, id)."""
+    names = ["Delta", "alpha", "Charlie", "Bravo", "Charlie"]
+    for name in names:
+        session.add(Client(user_id=test_user.id, full_name=name, notes="Long notes", preferences={"budget_max": 500000}))
+    session.commit()
+
+    seen, after = [], None
+    while True:
+        params = {"limit": 2, **({"after": after} if after else {})}
+        response = authenticated_client.get("/api/clients", params=params)
+        assert response.status_code == 200
+        page = response.json()
+        if not page:
+            break
+        assert all("notes" not in row and "preferences" not in row and "notes_embedding" not in row for row in page)
+        seen.extend(page)
+        after = page[-1]["id"]
+
+    assert len(seen) == len(names)
+    assert len({row["id"] for row in seen}) == len(names)
+    assert [row["full_name"] for row in seen] == sorted(names)
+
 def test_get_clients_fails_unauthenticated(client: TestClient):
     """Tests that unauthenticated access to clients is rejected."""
     response = client.get("/api/clients")
@@ -4,19 +4,21 @@
 # This file tests the content resource service functionality including fuzzy similarity
 # matching, content recommendations for users, client matching algorithms, and content
 # resource management. It validates the AI-powered content recommendation system that
-# suggests relevant content based on client profiles and preferences.
+# suggests relevant content based on client profiles and preferences, and that semantic
+# matching scores every resource against stored client and resource embeddings at once.
 # 
-# When was it updated: 2025-01-27
+# When was it updated: 2026-10-16
 
 import pytest
 import uuid
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
 from datetime import datetime, timezone
 
 from agent_core.content_resource_service import (
     calculate_fuzzy_similarity,
     get_content_recommendations_for_user,
-    find_matching_clients_generic
+    find_matching_clients_generic,
+    match_resources_to_clients
 )
 from data.models.resource import ContentResource, Resource, ResourceType, ResourceStatus
 from data.models.client import Client
@@ -266,4 +268,26 @@ class TestContentResourceService:
 
         # Assert
         assert isinstance(result, list)
-        # Should match based on budget preferences 
\ No newline at end of file
+        # Should match based on budget preferences 
+    @pytest.mark.asyncio
+    @patch('agent_core.content_resource_service.generate_embeddings', new_callable=AsyncMock)
+    async def test_semantic_matching_uses_stored_embeddings(self, mock_generate_embeddings, mock_user: User):
+        """Stored client and resource embeddings are reused; only clients without one are embedded"""
+        resources = [
+            ContentResource(id=uuid.uuid4(), user_id=mock_user.id, title="Staging Tips", url="https://example.com/a",
+                            embedding=[1.0, 0.0, 0.0]),
+            ContentResource(id=uuid.uuid4(), user_id=mock_user.id, title="Mortgage Rates", url="https://example.com/b",
+                            embedding=[0.0, 1.0, 0.0]),
+        ]
+        stager = Client(id=uuid.uuid4(), user_id=mock_user.id, full_name="Stager", notes_embedding=[0.9, 0.1, 0.0])
+        borrower = Client(id=uuid.uuid4(), user_id=mock_user.id, full_name="Borrower", notes_embedding=[0.0, 1.0, 0.2])
+        newcomer = Client(id=uuid.uuid4(), user_id=mock_user.id, full_name="Newcomer", user_tags=["staging"])
+        mock_generate_embeddings.return_value = [[1.0, 0.0, 0.1]]
+
+        matches = await match_resources_to_clients(resources, [stager, borrower, newcomer])
+
+        mock_generate_embeddings.assert_awaited_once_with(["Newcomer staging "])
+        assert [[client.full_name for client, _ in resource_matches] for resource_matches in matches] == [
+            ["Stager", "Newcomer"], ["Borrower"],
+        ]
+        assert all(similarity >= 0.7 for resource_matches in matches for _, similarity in resource_matches)
@@ -133,4 +133,95 @@ def test_get_conversation_history_fails_for_nonexistent_client(
     assert response.status_code == 200
     data = response.json()
     assert "messages" in data
-    assert len(data["messages"]) == 0
\ No newline at end of file
+    assert len(data["messages"]) == 0
+def test_get_conversations_builds_inbox_in_cursor_pages(authenticated_client: TestClient, test_user, session):
+    """
+    Tests that the inbox lists the latest message and unread count per client, most
+    recent first with message-less clients last, and that cursor pages cover it exactly.
+    """
+    from datetime import timedelta
+    from data.models.client import Client
+    from data import crm
+
+    now = datetime.now(timezone.utc)
+    recent, older, silent = (
+        Client(id=uuid.uuid4(), user_id=test_user.id, full_name=name) for name in ("Recent", "Older", "Silent")
+    )
+    session.add_all([recent, older, silent])
+
+    def message(client, content, direction, status, minutes_ago):
+        return Message(
+            user_id=test_user.id, client_id=client.id, content=content, direction=direction, status=status,
+            source=MessageSource.MANUAL, sender_type="user", created_at=now - timedelta(minutes=minutes_ago),
+        )
+
+    # Written out of order: conversation_state must keep the newest message regardless.
+    for new_message in [
+        message(recent, "First", MessageDirection.INBOUND, MessageStatus.RECEIVED, 30),
+        message(recent, "Latest", MessageDirection.INBOUND, MessageStatus.RECEIVED, 1),
+        message(recent, "Second", MessageDirection.INBOUND, MessageStatus.RECEIVED, 20),
+        message(older, "Old reply", MessageDirection.INBOUND, MessageStatus.SENT, 90),
+        message(older, "Old outbound", MessageDirection.OUTBOUND, MessageStatus.SENT, 60),
+    ]:
+        crm.save_message(new_message, session=session)
+    session.commit()
+
+    response = authenticated_client.get("/api/conversations/")
+    assert response.status_code == 200
+    inbox = response.json()
+    assert [row["client_name"] for row in inbox] == ["Recent", "Older", "Silent"]
+    assert [row["last_message"] for row in inbox] == ["Latest", "Old outbound", "No messages yet."]
+    assert [row["unread_count"] for row in inbox] == [3, 0, 0]
+    assert [row["has_messages"] for row in inbox] == [True, True, False]
+    assert inbox[0]["is_online"] is True
+
+    pages, cursor = [], None
+    while True:
+        params = {"limit": 1, **({"cursor": cursor} if cursor else {})}
+        response = authenticated_client.get("/api/conversations/", params=params)
+        assert response.status_code == 200
+        pages.extend(row["client_id"] for row in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert pages == [row["client_id"] for row in inbox]
+
+    assert authenticated_client.get("/api/conversations/", params={"cursor": "not-a-cursor"}).status_code == 400
+
+
+def test_conversation_state_rebuild_and_mark_read(authenticated_client: TestClient, test_user, test_client_id, session):
+    """
+    Tests that rebuilding conversation_state from the message log reproduces the state
+    maintained on write, and that marking a conversation read zeroes its unread count.
+    """
+    from datetime import timedelta
+    from sqlmodel import select
+    from data.models.message import ConversationState
+    from data import crm
+
+    now = datetime.now(timezone.utc)
+    for minutes_ago, direction, status in [(5, MessageDirection.INBOUND, MessageStatus.RECEIVED),
+                                           (3, MessageDirection.OUTBOUND, MessageStatus.SENT),
+                                           (2, MessageDirection.INBOUND, MessageStatus.RECEIVED)]:
+        crm.save_message(Message(
+            user_id=test_user.id, client_id=test_client_id, content=f"Message {minutes_ago}", direction=direction,
+            status=status, source=MessageSource.MANUAL, sender_type="user", created_at=now - timedelta(minutes=minutes_ago),
+        ), session=session)
+    session.commit()
+
+    def current_state():
+        session.expire_all()
+        state = session.exec(select(ConversationState).where(ConversationState.client_id == test_client_id)).one()
+        return state.last_message_id, state.preview, state.direction, state.unread_count
+
+    maintained = current_state()
+    assert maintained[1:] == ("Message 2", MessageDirection.INBOUND, 2)
+
+    assert crm.rebuild_conversation_state(user_id=test_user.id, session=session) == 1
+    session.commit()
+    assert current_state() == maintained
+
+    response = authenticated_client.post(f"/api/conversations/{test_client_id}/mark-read")
+    assert response.status_code == 200
+    assert response.json()["messages_marked"] == 2
+    assert current_state()[3] == 0
@@ -2,6 +2,8 @@
 
 import pytest
 import uuid
+from types import SimpleNamespace
+from urllib.parse import parse_qsl
 from fastapi.testclient import TestClient
 from unittest.mock import patch
 from sqlmodel import Session
@@ -85,4 +87,77 @@ def test_delete_scheduled_message_succeeds(authenticated_client: TestClient, sch
     
     db_msg = session.get(ScheduledMessage, scheduled_message.id)
     assert db_msg is not None
-    assert db_msg.status == MessageStatus.CANCELLED
\ No newline at end of file
+    assert db_msg.status == MessageStatus.CANCELLED
+@pytest.fixture
+def twilio_transport():
+    """
+    Routes send_sms_async on the running loop through an httpx MockTransport.
+    Tests append (status, headers) responses, or (exception, None) to raise, to
+    `replies` and read `requests`.
+    """
+    import httpx
+    from integrations import twilio_outgoing
+
+    replies, requests = [], []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        status, headers = replies.pop(0)
+        if isinstance(status, Exception):
+            raise status
+        return httpx.Response(status, headers=headers, json={"sid": "SM123"} if status < 300 else {"code": 20003})
+
+    async def install():
+        settings = SimpleNamespace(TWILIO_ACCOUNT_SID="AC123", TWILIO_AUTH_TOKEN="token", TWILIO_MAX_CONCURRENT_REQUESTS=4)
+        with patch("integrations.twilio_outgoing.settings", settings):
+            transport = twilio_outgoing._get_transport()
+        await transport.client.aclose()
+        transport.client = httpx.AsyncClient(base_url=twilio_outgoing.TWILIO_API_BASE_URL, transport=httpx.MockTransport(handler))
+        return settings
+
+    with patch("integrations.twilio_outgoing.SEND_BACKOFF_SECONDS", 0):
+        yield SimpleNamespace(install=install, replies=replies, requests=requests)
+
+@pytest.mark.asyncio
+async def test_send_sms_async_retries_rate_limits_without_blocking(twilio_transport):
+    import httpx
+    from integrations import twilio_outgoing
+    settings = await twilio_transport.install()
+    twilio_transport.replies.extend([(429, {"Retry-After": "0"}), (httpx.ConnectError("refused"), None), (201, {})])
+
+    with patch("integrations.twilio_outgoing.settings", settings):
+        assert await twilio_outgoing.send_sms_async("+15550001111", "+15550002222", "Hello!") is True
+
+    assert len(twilio_transport.requests) == 3
+    request = twilio_transport.requests[-1]
+    assert request.url.path == "/2010-04-01/Accounts/AC123/Messages.json"
+    assert dict(parse_qsl(request.content.decode())) == {"To": "+15550002222", "From": "+15550001111", "Body": "Hello!"}
+    await twilio_outgoing.close_transport()
+
+@pytest.mark.asyncio
+async def test_send_sms_async_does_not_retry_client_errors(twilio_transport):
+    from integrations import twilio_outgoing
+    settings = await twilio_transport.install()
+    twilio_transport.replies.append((400, {}))
+
+    with patch("integrations.twilio_outgoing.settings", settings):
+        assert await twilio_outgoing.send_sms_async("+15550001111", "not-a-number", "Hello!") is False
+
+    assert len(twilio_transport.requests) == 1
+    await twilio_outgoing.close_transport()
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("reply", [(503, {}), "read_timeout"])
+async def test_send_sms_async_does_not_retry_when_twilio_may_have_sent(twilio_transport, reply):
+    import httpx
+    from integrations import twilio_outgoing
+    settings = await twilio_transport.install()
+    if reply == "read_timeout":
+        reply = (httpx.ReadTimeout("no response"), None)
+    twilio_transport.replies.extend([reply, (201, {})])
+
+    with patch("integrations.twilio_outgoing.settings", settings):
+        assert await twilio_outgoing.send_sms_async("+15550001111", "+15550002222", "Hello!") is False
+
+    assert len(twilio_transport.requests) == 1
+    await twilio_outgoing.close_transport()
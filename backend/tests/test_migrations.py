@@ -243,7 +243,7 @@ sqlalchemy.url = sqlite:///{temp_db_path}
         
         # Verify expected JSON fields exist
         expected_user_json_fields = ['onboarding_state', 'market_focus', 'ai_style_guide', 'strategy', 'specialties']
-        expected_client_json_fields = ['notes_embedding', 'ai_tags', 'user_tags', 'preferences']
+        expected_client_json_fields = ['ai_tags', 'user_tags', 'preferences']
         
         user_json_field_names = [col['name'] for col in user_json_cols]
         client_json_field_names = [col['name'] for col in client_json_cols]
@@ -254,6 +254,10 @@ sqlalchemy.url = sqlite:///{temp_db_path}
         for field in expected_client_json_fields:
             assert field in client_json_field_names, f"Client table missing JSON field: {field}"
 
+        # Embeddings are packed float32 bytes, not JSON arrays.
+        notes_embedding_type = next(col['type'] for col in client_columns if col['name'] == 'notes_embedding')
+        assert 'json' not in str(notes_embedding_type).lower()
+
     @pytest.mark.skipif(not Path("alembic/versions").exists(), reason="Migration files not found in CI")
     def test_migration_rollback_safety(self):
         """Test that migrations can be safely rolled back"""
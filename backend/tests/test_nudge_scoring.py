@@ -0,0 +1,529 @@
+# File: backend/tests/test_nudge_scoring.py
+#
+# What does this file test:
+# This file tests the batch scoring path of the nudge engine. It validates that the
+# vectorized RealEstateClientMatrix produces exactly the same (score, reasons) as the
+# per-client score_real_estate_event scorer across randomized clients and events,
+# including malformed preferences and float32 embeddings read back from the
+# database, that find_best_match_for_event builds its audience from the batch
+# scores, that find_best_matches_for_events scores an event batch against one
+# client load, that scoring from a stored client scoring profile matches parsing
+# the client live, that candidate_rows keeps every client an event can score and
+# scoring only those rows matches the full scorer, that the keyword/location term
+# index finds exactly the terms a substring check finds, that the shared float32
+# similarity kernels agree with a float64 cosine, that the per-user
+# negative-preference matrix agrees with the pairwise penalty check and is
+# invalidated on write, and that listing embeddings are served from the
+# (entity_id, remarks hash) cache instead of re-calling the embedding API.
+#
+# When was it updated: 2026-10-16
+
+import asyncio
+import json
+import pytest
+import random
+import uuid
+from unittest.mock import patch, AsyncMock, MagicMock
+
+import numpy as np
+from sqlmodel import Session, select
+
+from agent_core import similarity
+from agent_core.brain import nudge_engine, negative_preferences
+from agent_core.brain.negative_preferences import NegativePreferenceMatrix, FEEDBACK_PENALTY_THRESHOLD
+from agent_core.brain.nudge_engine_utils import calculate_cosine_similarity
+from agent_core.term_index import TermIndex
+from agent_core.brain.verticals.real_estate import (
+    REAL_ESTATE_CONFIG, RealEstateClientMatrix, build_scoring_profile, score_real_estate_event
+)
+from data.models.client import Client
+from data.models.event import MarketEvent
+from data.models.resource import Resource
+from data.models.user import User
+from data.models.feedback import NegativePreference
+from data import crm
+
+DIMENSION = 16
+LOCATIONS = ["Green Valley", "St. George", "Bloomington", "Hurricane", "Ivins", ""]
+KEYWORDS = ["Pool", "casita", "RV parking", "fixer", "View", "solar"]
+EVENT_TYPES = ["new_listing", "price_drop", "sold_listing", "expired_listing", "coming_soon", "withdrawn_listing"]
+
+
+def _random_embedding(rng: random.Random):
+    choice = rng.random()
+    if choice < 0.2:
+        return None
+    if choice < 0.25:
+        return [0.0] * DIMENSION
+    return [rng.uniform(-1, 1) for _ in range(DIMENSION)]
+
+
+def _random_client(rng: random.Random) -> Client:
+    tags = rng.choice([[], ["investor"], ["prospective-seller"], ["vip"], ["investor", "prospective-seller"]])
+    prefs = {}
+    if rng.random() < 0.7:
+        prefs["budget_max"] = rng.choice([400000, "550000", 750000.0, "", None, "lots"])
+    if rng.random() < 0.6:
+        prefs["min_bedrooms"] = rng.choice([0, 2, 3, "4", 5, "3.5", "many"])
+    if rng.random() < 0.4:
+        prefs["min_bathrooms"] = rng.choice([1, 2, "3", 0])
+    if rng.random() < 0.7:
+        prefs["locations"] = rng.sample(LOCATIONS, rng.randint(0, 3))
+    if rng.random() < 0.6:
+        prefs["keywords"] = rng.sample(KEYWORDS, rng.randint(0, 3))
+    notes = rng.choice([None, "", "Looking for a home. Max budget: $620000", "price 480000 firm", "Loves hiking."])
+    return Client(
+        id=uuid.uuid4(), user_id=uuid.uuid4(), full_name=f"Client {rng.randint(1, 9999)}",
+        user_tags=tags, preferences=prefs, notes=notes, notes_embedding=_random_embedding(rng),
+    )
+
+
+def _random_event(rng: random.Random) -> MarketEvent:
+    payload = {
+        "ListPrice": rng.choice([350000, 500000, "610000", 900000, None]),
+        "BedroomsTotal": rng.choice([2, 3, 4, "5", None]),
+        "BathroomsTotalInteger": rng.choice([1, 2, 3, None]),
+        "PublicRemarks": rng.choice(["", "Gorgeous view with a POOL and casita.", "Fixer upper, needs love.", "Solar panels and RV parking."]),
+        "SubdivisionName": rng.choice(["Green Valley Estates", "Bloomington Hills", ""]),
+        "City": rng.choice(["St. George", "Hurricane", "Ivins", ""]),
+    }
+    return MarketEvent(
+        id=uuid.uuid4(), user_id=uuid.uuid4(), event_type=rng.choice(EVENT_TYPES),
+        entity_id="LK-1", payload=payload, market_area="default",
+    )
+
+
+def test_client_matrix_matches_per_client_scorer():
+    """The vectorized scorer must return exactly what the per-client scorer returns."""
+    rng = random.Random(1234)
+    clients = [_random_client(rng) for _ in range(300)]
+    matrix = RealEstateClientMatrix(clients, REAL_ESTATE_CONFIG)
+
+    for _ in range(40):
+        event = _random_event(rng)
+        resource_embedding = _random_embedding(rng)
+        try:
+            expected = [score_real_estate_event(c, event, resource_embedding, REAL_ESTATE_CONFIG) for c in clients]
+        except Exception as e:
+            # Malformed listings that crash the per-client scorer must crash the batch scorer too.
+            with pytest.raises(type(e)):
+                matrix.score_event(event, resource_embedding)
+            continue
+        assert matrix.score_event(event, resource_embedding) == expected
+
+
+def test_client_matrix_score_events_matches_per_event_scoring():
+    """Scoring a batch through one matrix product must match scoring each event on its own."""
+    rng = random.Random(4321)
+    clients = [_random_client(rng) for _ in range(200)]
+    matrix = RealEstateClientMatrix(clients, REAL_ESTATE_CONFIG)
+
+    events, resource_embeddings = [], []
+    while len(events) < 25:
+        event, resource_embedding = _random_event(rng), _random_embedding(rng)
+        try:
+            [score_real_estate_event(c, event, resource_embedding, REAL_ESTATE_CONFIG) for c in clients]
+        except Exception:
+            continue
+        events.append(event)
+        resource_embeddings.append(resource_embedding)
+
+    expected = [matrix.score_event(event, embedding) for event, embedding in zip(events, resource_embeddings)]
+    assert matrix.score_events(events, resource_embeddings) == expected
+
+
+def test_similarities_near_a_cut_off_are_rescored_per_client():
+    """
+    Similarities within _SIMILARITY_GUARD of the 0.45 threshold or of a rounding
+    boundary are handed back for per-client scoring; ones just outside it are not.
+    """
+    from agent_core.brain.verticals.real_estate import _SIMILARITY_GUARD
+    assert _SIMILARITY_GUARD == 1e-5
+    clients = [
+        Client(id=uuid.uuid4(), user_id=uuid.uuid4(), full_name=f"Client {index}", user_tags=[], preferences={},
+               notes_embedding=[1.0] * DIMENSION)
+        for index in range(4)
+    ]
+    matrix = RealEstateClientMatrix(clients, REAL_ESTATE_CONFIG)
+    similarity = np.array([
+        0.45 + 0.5 * _SIMILARITY_GUARD,  # on the threshold
+        0.4537,                          # clear of every cut-off
+        0.46 + 0.5 * _SIMILARITY_GUARD,  # on a rounding boundary of the scaled score
+        0.46 + 3 * _SIMILARITY_GUARD,    # just outside the guard
+    ])
+    rows_mask = np.ones(len(clients), dtype=bool)
+
+    rows, kept, near = matrix._similarities(rows_mask, [1.0] * DIMENSION, batch_similarity=similarity)
+
+    assert near.tolist() == [0, 2]
+    assert rows.tolist() == [1, 3]
+    assert kept.tolist() == [similarity[1], similarity[3]]
+
+
+def test_candidate_rows_keep_every_scoring_client():
+    """Clients outside candidate_rows score 0, and scoring just the candidates matches the full scorer."""
+    rng = random.Random(2468)
+    clients = [_random_client(rng) for _ in range(300)]
+    matrix = RealEstateClientMatrix(clients, REAL_ESTATE_CONFIG)
+
+    events, resource_embeddings, rows_by_event = [], [], []
+    while len(events) < 30:
+        event, resource_embedding = _random_event(rng), _random_embedding(rng)
+        try:
+            expected = matrix.score_event(event, resource_embedding)
+        except Exception:
+            continue
+        rows = matrix.candidate_rows(event)
+        assert rows.tolist() == sorted(set(rows.tolist()))
+        excluded = set(range(len(clients))) - set(rows.tolist())
+        assert all(expected[row][0] == 0 for row in excluded)
+        assert matrix.score_event(event, resource_embedding, rows=rows) == [expected[row] for row in rows]
+        events.append(event)
+        resource_embeddings.append(resource_embedding)
+        rows_by_event.append(rows)
+
+    expected = [matrix.score_event(e, emb, rows=rows) for e, emb, rows in zip(events, resource_embeddings, rows_by_event)]
+    assert matrix.score_events(events, resource_embeddings, rows_by_event=rows_by_event) == expected
+
+
+def test_candidate_rows_drop_clients_over_budget():
+    """A high-priced listing only reaches clients who can afford it (or set no budget)."""
+    clients = [
+        Client(id=uuid.uuid4(), user_id=uuid.uuid4(), full_name=f"Buyer {budget}", user_tags=[],
+               preferences={"budget_max": budget} if budget else {})
+        for budget in (300000, 900000, 2500000, None)
+    ] + [Client(id=uuid.uuid4(), user_id=uuid.uuid4(), full_name="Short on beds", user_tags=[],
+                preferences={"budget_max": 5000000, "min_bedrooms": 6})]
+    matrix = RealEstateClientMatrix(clients, REAL_ESTATE_CONFIG)
+    event = MarketEvent(id=uuid.uuid4(), user_id=uuid.uuid4(), event_type="new_listing", entity_id="LK-9",
+                        market_area="default", payload={"ListPrice": 1200000, "BedroomsTotal": 4})
+    assert matrix.candidate_rows(event).tolist() == [2, 3]
+
+
+def test_stored_scoring_profile_matches_live_parsing():
+    """Scoring from a stored (JSON round-tripped) profile must equal parsing the client live."""
+    rng = random.Random(777)
+    clients = [_random_client(rng) for _ in range(150)]
+    for client in clients:
+        profile = build_scoring_profile(client, REAL_ESTATE_CONFIG)
+        client.scoring_profile = json.loads(json.dumps(profile)) if profile else None
+
+    for _ in range(30):
+        event = _random_event(rng)
+        resource_embedding = _random_embedding(rng)
+        for client in clients:
+            try:
+                expected = _score_live(client, event, resource_embedding)
+            except Exception as e:
+                with pytest.raises(type(e)):
+                    score_real_estate_event(client, event, resource_embedding, REAL_ESTATE_CONFIG)
+                continue
+            assert score_real_estate_event(client, event, resource_embedding, REAL_ESTATE_CONFIG) == expected
+
+
+def _score_live(client: Client, event: MarketEvent, resource_embedding):
+    with patch('agent_core.brain.verticals.real_estate._scoring_profile', return_value=None):
+        return score_real_estate_event(client, event, resource_embedding, REAL_ESTATE_CONFIG)
+
+
+def test_refresh_client_scoring_profile_parses_notes_once(session: Session, test_user: User):
+    """The stored profile carries the budget parsed from notes and follows the user's vertical."""
+    test_user.vertical = "real_estate"
+    client = Client(user_id=test_user.id, full_name="Notes Buyer", user_tags=["vip"],
+                    notes="Pre-approved. Max budget: $640000", preferences={"locations": ["Ivins"], "min_bedrooms": "3"})
+    crm.refresh_client_scoring_profile(client, session)
+    assert client.scoring_profile["role"] == "buyer"
+    assert client.scoring_profile["max_budget"] == 640000
+    assert client.scoring_profile["min_beds"] == 3
+    assert client.scoring_profile["locations"] == ["ivins"]
+
+    test_user.vertical = "therapy"
+    crm.refresh_client_scoring_profile(client, session)
+    assert client.scoring_profile is None
+
+
+def test_stale_scoring_profile_is_rebuilt():
+    """A profile stored by an older derivation is ignored and derived again from the client."""
+    from agent_core.brain.verticals.real_estate import SCORING_PROFILE_VERSION, _scoring_profile
+    client = Client(id=uuid.uuid4(), user_id=uuid.uuid4(), full_name="Stale Buyer", user_tags=["buyer"],
+                    notes="Max budget: $640,000", preferences={})
+    stale = build_scoring_profile(client, REAL_ESTATE_CONFIG)
+    stale.update(version=1, max_budget=None)
+    client.scoring_profile = stale
+
+    profile = _scoring_profile(client, REAL_ESTATE_CONFIG)
+    assert profile["version"] == SCORING_PROFILE_VERSION == 2
+    assert profile["max_budget"] == 640000
+
+
+def test_similarity_kernels_agree_with_float64_reference():
+    """The float32 kernels match a float64 cosine and each other, and treat missing or zero vectors as 0.0."""
+    rng = np.random.default_rng(5)
+    clients = rng.standard_normal((50, DIMENSION)).astype(np.float32)
+    events = rng.standard_normal((8, DIMENSION)).tolist()
+    reference = np.array([[np.dot(c, e) / (np.linalg.norm(c) * np.linalg.norm(e)) for e in events] for c in clients])
+
+    unit_clients, unit_events = similarity.normalize_rows(clients), similarity.normalize_rows(events)
+    assert np.allclose(similarity.many_to_many(unit_clients, unit_events), reference, atol=1e-5)
+    assert np.allclose(similarity.one_to_many(unit_events[0], unit_clients), reference[:, 0], atol=1e-5)
+    assert np.allclose(similarity.cosine_one_to_many(events[0], list(clients)), reference[:, 0], atol=1e-5)
+    assert abs(similarity.cosine(clients[3], events[2]) - reference[3, 2]) < 1e-5
+
+    assert similarity.cosine(None, events[0]) == 0.0
+    assert similarity.cosine([0.0] * DIMENSION, events[0]) == 0.0
+    assert similarity.cosine([1.0, 2.0], events[0]) == 0.0
+    assert not similarity.normalize_rows([None, [0.0] * DIMENSION, events[0]])[:2].any()
+
+
+def test_term_index_matches_substring_checks():
+    """One scan finds exactly the terms `term in text` finds, including overlapping and empty terms."""
+    rng = random.Random(99)
+    terms = ["", "a", "ab", "bab", "abc", "c", "caa", "bb", "green valley", "valley", "st. george"]
+    index = TermIndex(terms)
+    texts = ["", "green valley estates", "st. george", "x"] + [
+        "".join(rng.choice("abc ") for _ in range(rng.randint(0, 30))) for _ in range(200)
+    ]
+    for text in texts:
+        assert index.scan(text) == {term_id for term_id, term in enumerate(terms) if term in text}
+    assert TermIndex([]).scan("anything") == set()
+
+
+def test_client_matrix_falls_back_for_malformed_rows():
+    """Rows the vectorized path cannot represent are scored by the per-client scorer."""
+    clients = [
+        Client(id=uuid.uuid4(), user_id=uuid.uuid4(), full_name="Odd Locations", user_tags=[], preferences={"locations": None}),
+        Client(id=uuid.uuid4(), user_id=uuid.uuid4(), full_name="Short Vector", user_tags=[], notes_embedding=[0.5] * 3),
+        Client(id=uuid.uuid4(), user_id=uuid.uuid4(), full_name="Regular", user_tags=[], notes_embedding=[0.5] * DIMENSION),
+        Client(id=uuid.uuid4(), user_id=uuid.uuid4(), full_name="Regular Too", user_tags=[], notes_embedding=[0.25] * DIMENSION),
+    ]
+    matrix = RealEstateClientMatrix(clients, REAL_ESTATE_CONFIG)
+    assert matrix.fallback.tolist() == [True, True, False, False]
+    assert matrix.unit_embeddings.shape == (2, DIMENSION)
+
+
+def test_client_matrix_matches_per_client_scorer_with_float32_embeddings():
+    """Embeddings loaded from the database are float32 arrays; both scorers must accept them."""
+    rng = random.Random(4321)
+    clients = [_random_client(rng) for _ in range(200)]
+    for client in clients:
+        if client.notes_embedding is not None:
+            client.notes_embedding = np.frombuffer(np.asarray(client.notes_embedding, dtype='<f4').tobytes(), dtype='<f4')
+    matrix = RealEstateClientMatrix(clients, REAL_ESTATE_CONFIG)
+
+    for _ in range(20):
+        event = _random_event(rng)
+        resource_embedding = _random_embedding(rng)
+        try:
+            expected = [score_real_estate_event(c, event, resource_embedding, REAL_ESTATE_CONFIG) for c in clients]
+        except Exception as e:
+            with pytest.raises(type(e)):
+                matrix.score_event(event, resource_embedding)
+            continue
+        assert matrix.score_event(event, resource_embedding) == expected
+
+
+def test_embeddings_round_trip_as_float32(session: Session):
+    """Embeddings are stored as float32 bytes, read back as arrays, and deferred in list queries."""
+    user = User(id=uuid.uuid4(), full_name="Realtor", email="float32@test.com", phone_number="+15550001111", vertical="real_estate")
+    embedding = [0.1 * i for i in range(DIMENSION)]
+    client = Client(user_id=user.id, full_name="Vector Client", notes_embedding=embedding)
+    session.add(user)
+    session.add(client)
+    session.add(NegativePreference(client_id=client.id, dismissed_embedding=embedding))
+    session.commit()
+    session.expire_all()
+
+    stored = session.exec(select(Client).where(Client.id == client.id)).one()
+    assert stored.notes_embedding.dtype == np.float32
+    assert np.allclose(stored.notes_embedding, embedding)
+    assert "notes_embedding" not in stored.model_dump()
+
+    dismissed = crm.get_negative_preferences_for_clients([client.id], session)[client.id]
+    assert np.allclose(dismissed[0], embedding)
+
+    session.expire_all()
+    listed = crm.get_all_clients(user.id, session=session)
+    assert "notes_embedding" not in listed[0].__dict__
+    loaded = crm.get_all_clients(user.id, session=session, include_embeddings=True)
+    assert np.allclose(loaded[0].__dict__["notes_embedding"], embedding)
+
+
+def test_negative_preference_matrix_matches_pairwise_check():
+    """The batched penalty check must agree with comparing every dismissed embedding one by one."""
+    rng = random.Random(99)
+    client_ids = [uuid.uuid4() for _ in range(40)]
+    rows = []
+    for client_id in client_ids:
+        for _ in range(rng.randint(0, 4)):
+            embedding = _random_embedding(rng)
+            if embedding is not None:
+                rows.append((client_id, np.asarray(embedding, dtype=np.float32)))
+    rows.append((client_ids[0], np.ones(3, dtype=np.float32)))
+    matrix = NegativePreferenceMatrix(rows)
+
+    for _ in range(30):
+        # Resources near a dismissed embedding exercise the threshold.
+        base = rng.choice(rows)[1] if rng.random() < 0.5 else np.zeros(DIMENSION)
+        resource_embedding = [float(x) + rng.uniform(-0.3, 0.3) for x in base] if len(base) == DIMENSION else [1.0, 1.0, 1.0]
+        expected = {
+            client_id for client_id in client_ids
+            if any(calculate_cosine_similarity(resource_embedding, e) > FEEDBACK_PENALTY_THRESHOLD for c, e in rows if c == client_id)
+        }
+        assert matrix.penalized_clients(resource_embedding) == expected
+        assert {c for c in client_ids if matrix.is_penalized(c, resource_embedding)} == expected
+
+
+def test_negative_preference_matrix_is_invalidated_on_write(session: Session, test_user: User):
+    """Adding a negative preference rebuilds the user's cached matrix."""
+    client = Client(user_id=test_user.id, full_name="Picky Client")
+    session.add(client)
+    session.commit()
+    embedding = [0.1 * (i + 1) for i in range(DIMENSION)]
+
+    assert not negative_preferences.get_matrix_for_user(test_user.id, session).penalized_clients(embedding)
+    crm.add_negative_preference(client.id, uuid.uuid4(), embedding, test_user.id, session)
+    session.commit()
+    assert negative_preferences.get_matrix_for_user(test_user.id, session).penalized_clients(embedding) == {client.id}
+
+
+@pytest.mark.asyncio
+@patch('agent_core.brain.nudge_engine._create_campaign_from_event', new_callable=AsyncMock)
+@patch('agent_core.brain.nudge_engine.llm_client')
+@patch('agent_core.brain.nudge_engine.crm_service')
+@patch('agent_core.brain.nudge_engine.negative_preferences')
+async def test_find_best_match_for_event_uses_batch_scores(mock_negative_preferences, mock_crm_service, mock_llm_client, mock_create_campaign):
+    """Already-nudged clients are skipped and the best batch score leads the audience."""
+    user = User(id=uuid.uuid4(), full_name="Realtor", email="realtor@test.com", vertical="real_estate")
+    strong = Client(id=uuid.uuid4(), user_id=user.id, full_name="Strong Match", user_tags=[],
+                    preferences={"locations": ["green valley"], "keywords": ["pool"], "min_bedrooms": 3})
+    weak = Client(id=uuid.uuid4(), user_id=user.id, full_name="Weak Match", user_tags=[], preferences={})
+    nudged = Client(id=uuid.uuid4(), user_id=user.id, full_name="Already Nudged", user_tags=[],
+                    preferences={"locations": ["green valley"], "keywords": ["pool"], "min_bedrooms": 3})
+    event = MarketEvent(id=uuid.uuid4(), user_id=user.id, event_type="new_listing", entity_id="LK-2", market_area="default",
+                        payload={"ListPrice": 500000, "BedroomsTotal": 4, "PublicRemarks": "Big pool",
+                                 "SubdivisionName": "Green Valley Estates", "City": "St. George"})
+    resource = Resource(id=uuid.uuid4(), user_id=user.id, resource_type="property", attributes={"PublicRemarks": "Big pool"})
+
+    mock_crm_service.get_all_clients.return_value = [weak, nudged, strong]
+    mock_crm_service.get_client_ids_with_nudge_for_resource.return_value = {str(nudged.id)}
+    mock_negative_preferences.get_matrix_for_user.return_value = NegativePreferenceMatrix([])
+    mock_crm_service.get_listing_embedding.return_value = None
+    mock_llm_client.generate_embedding = AsyncMock(return_value=[0.0] * DIMENSION)
+
+    await nudge_engine.find_best_match_for_event(event, user, resource, MagicMock())
+
+    mock_llm_client.generate_embedding.assert_awaited_once()
+    audience = mock_create_campaign.await_args.args[3]
+    assert [m.client_id for m in audience] == [strong.id, weak.id]
+    assert mock_create_campaign.await_args.args[5] == strong.id
+
+
+@pytest.mark.asyncio
+@patch('agent_core.brain.nudge_engine._create_campaign_from_event', new_callable=AsyncMock)
+@patch('agent_core.brain.nudge_engine.llm_client')
+@patch('agent_core.brain.nudge_engine.crm_service')
+@patch('agent_core.brain.nudge_engine.negative_preferences')
+async def test_find_best_matches_for_events_loads_clients_once(mock_negative_preferences, mock_crm_service, mock_llm_client, mock_create_campaign):
+    """An event batch loads the client set once, embeds its resources concurrently and skips events without a resource."""
+    user = User(id=uuid.uuid4(), full_name="Realtor", email="batch@test.com", vertical="real_estate")
+    buyer = Client(id=uuid.uuid4(), user_id=user.id, full_name="Buyer", user_tags=[],
+                   preferences={"locations": ["green valley"], "keywords": ["pool"]})
+    nudged = Client(id=uuid.uuid4(), user_id=user.id, full_name="Already Nudged", user_tags=[],
+                    preferences={"locations": ["green valley"], "keywords": ["pool"]})
+    payload = {"ListPrice": 500000, "BedroomsTotal": 3, "PublicRemarks": "Big pool", "SubdivisionName": "Green Valley Estates"}
+    events = [
+        MarketEvent(id=uuid.uuid4(), user_id=user.id, event_type="new_listing", entity_id=f"LK-B{i}", market_area="default", payload=payload)
+        for i in range(3)
+    ]
+    resources = {
+        event.entity_id: Resource(id=uuid.uuid4(), user_id=user.id, resource_type="property", entity_id=event.entity_id,
+                                  attributes={"PublicRemarks": "Big pool"})
+        for event in events[:2]
+    }
+
+    mock_crm_service.get_resources_by_entity_ids.return_value = resources
+    mock_crm_service.get_all_clients.return_value = [buyer, nudged]
+    mock_crm_service.get_client_ids_with_nudge_for_resources.return_value = {
+        (resources["LK-B0"].id, "new_listing"): {str(nudged.id)}
+    }
+    mock_negative_preferences.get_matrix_for_user.return_value = NegativePreferenceMatrix([])
+    mock_crm_service.get_listing_embedding.return_value = None
+    in_flight, peak = [0], [0]
+    async def generate_embedding(text):
+        in_flight[0] += 1
+        peak[0] = max(peak[0], in_flight[0])
+        await asyncio.sleep(0)
+        in_flight[0] -= 1
+        return [0.0] * DIMENSION
+    mock_llm_client.generate_embedding = AsyncMock(side_effect=generate_embedding)
+
+    scored = await nudge_engine.find_best_matches_for_events(events, user, MagicMock())
+
+    assert scored == events[:2]
+    assert peak[0] == 2
+    mock_crm_service.get_all_clients.assert_called_once()
+    assert mock_create_campaign.await_count == 2
+    first_audience, second_audience = (call.args[3] for call in mock_create_campaign.await_args_list)
+    assert [m.client_id for m in first_audience] == [buyer.id]
+    assert {m.client_id for m in second_audience} == {buyer.id, nudged.id}
+    assert [event.status for event in scored] == ["processed", "processed"]
+
+
+@pytest.mark.asyncio
+@patch('agent_core.brain.nudge_engine._create_campaign_from_event', new_callable=AsyncMock)
+@patch('agent_core.brain.nudge_engine.llm_client')
+@patch('agent_core.brain.nudge_engine.crm_service')
+@patch('agent_core.brain.nudge_engine.negative_preferences')
+async def test_find_best_matches_for_events_contains_failures_to_one_event(mock_negative_preferences, mock_crm_service, mock_llm_client, mock_create_campaign):
+    """A failure creating one event's nudge marks only that event "error" and the rest of the batch still runs."""
+    user = User(id=uuid.uuid4(), full_name="Realtor", email="batch-error@test.com", vertical="real_estate")
+    buyer = Client(id=uuid.uuid4(), user_id=user.id, full_name="Buyer", user_tags=[],
+                   preferences={"locations": ["green valley"], "keywords": ["pool"]})
+    payload = {"ListPrice": 500000, "BedroomsTotal": 3, "PublicRemarks": "Big pool", "SubdivisionName": "Green Valley Estates"}
+    events = [
+        MarketEvent(id=uuid.uuid4(), user_id=user.id, event_type="new_listing", entity_id=f"LK-E{i}", market_area="default", payload=payload)
+        for i in range(3)
+    ]
+    mock_crm_service.get_resources_by_entity_ids.return_value = {
+        event.entity_id: Resource(id=uuid.uuid4(), user_id=user.id, resource_type="property", entity_id=event.entity_id,
+                                  attributes={"PublicRemarks": "Big pool"})
+        for event in events
+    }
+    mock_crm_service.get_all_clients.return_value = [buyer]
+    mock_crm_service.get_client_ids_with_nudge_for_resources.return_value = {}
+    mock_negative_preferences.get_matrix_for_user.return_value = NegativePreferenceMatrix([])
+    mock_crm_service.get_listing_embedding.return_value = None
+    mock_llm_client.generate_embedding = AsyncMock(return_value=[0.0] * DIMENSION)
+    mock_create_campaign.side_effect = [None, RuntimeError("insert failed"), None]
+    db_session = MagicMock()
+
+    scored = await nudge_engine.find_best_matches_for_events(events, user, db_session)
+
+    assert scored == events
+    assert [event.status for event in events] == ["processed", "error", "processed"]
+    assert db_session.begin_nested.call_count == 3
+
+
+@pytest.mark.asyncio
+@patch('agent_core.brain.nudge_engine.llm_client')
+@patch('agent_core.brain.nudge_engine.crm_service')
+async def test_resource_embedding_is_served_from_cache(mock_crm_service, mock_llm_client):
+    """A cached listing embedding is reused; a miss embeds once and stores the result."""
+    resource = Resource(id=uuid.uuid4(), user_id=uuid.uuid4(), resource_type="property", entity_id="LK-3",
+                        attributes={"PublicRemarks": "Corner lot with mountain views"})
+    mock_llm_client.generate_embedding = AsyncMock(return_value=[0.5] * DIMENSION)
+
+    mock_crm_service.get_listing_embedding.return_value = [0.25] * DIMENSION
+    assert await nudge_engine._get_resource_embedding(resource) == [0.25] * DIMENSION
+    mock_llm_client.generate_embedding.assert_not_awaited()
+
+    mock_crm_service.get_listing_embedding.return_value = None
+    assert await nudge_engine._get_resource_embedding(resource) == [0.5] * DIMENSION
+    remarks_hash = mock_crm_service.get_listing_embedding.call_args.args[1]
+    mock_crm_service.save_listing_embedding.assert_called_once_with("LK-3", remarks_hash, [0.5] * DIMENSION)
+
+    # A failed embedding call (zero vector) must not be cached.
+    mock_crm_service.save_listing_embedding.reset_mock()
+    mock_llm_client.generate_embedding = AsyncMock(return_value=[0.0] * DIMENSION)
+    await nudge_engine._get_resource_embedding(resource)
+    mock_crm_service.save_listing_embedding.assert_not_called()
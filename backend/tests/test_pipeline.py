@@ -0,0 +1,77 @@
+# File Path: backend/tests/test_pipeline.py
+#
+# What does this file test:
+# This file tests the global event fan-out stage of the main opportunity pipeline:
+# turning GlobalMlsEvents into user-specific MarketEvents in bulk, skipping
+# (user, listing) pairs that already exist, and dispatching scoring tasks in
+# per-user batches sent in chunked Celery groups.
+#
+# When was it updated: 2026-10-16
+
+import asyncio
+import uuid
+from datetime import datetime
+from unittest.mock import patch
+
+from sqlmodel import Session, select
+
+from data.models.event import GlobalMlsEvent, MarketEvent
+from data.models.user import User
+from workflow import pipeline
+
+
+def _global_event(session: Session, listing_key: str) -> GlobalMlsEvent:
+    event = GlobalMlsEvent(
+        source_id="flexmls_reso_default",
+        listing_key=listing_key,
+        raw_payload={"ListingKey": listing_key, "ListPrice": 500000},
+        event_timestamp=datetime.utcnow(),
+    )
+    session.add(event)
+    return event
+
+
+def test_fan_out_global_events_inserts_missing_pairs_and_dispatches_groups(session: Session, test_user: User):
+    """
+    Tests that fan-out creates one MarketEvent per missing (user, listing) pair,
+    leaves existing pairs alone, is idempotent, and dispatches the new events
+    in groups of SCORING_GROUP_SIZE.
+    """
+    second_user = User(id=uuid.uuid4(), full_name="Second Realtor", phone_number=f"+1555{uuid.uuid4().int % 10_000_000:07d}")
+    session.add(second_user)
+    suffix = uuid.uuid4().hex[:8]
+    global_events = [_global_event(session, f"LK-{suffix}-{index}") for index in range(3)]
+    session.add(MarketEvent(
+        user_id=test_user.id, event_type="new_listing", entity_id=global_events[0].listing_key,
+        payload={}, market_area="default",
+    ))
+    session.commit()
+    for event in global_events:
+        session.refresh(event)
+
+    with patch.object(pipeline, "SCORING_BATCH_SIZE", 2), patch.object(pipeline, "SCORING_GROUP_SIZE", 2), \
+            patch("workflow.pipeline.group") as mock_group:
+        created = asyncio.run(pipeline.fan_out_global_events([test_user, second_user], global_events))
+        assert created == 5
+        dispatched = [list(call.args[0]) for call in mock_group.call_args_list]
+        assert [len(chunk) for chunk in dispatched] == [2, 1]
+        assert mock_group.return_value.apply_async.call_count == 2
+        batches = [signature.kwargs for chunk in dispatched for signature in chunk]
+        assert sorted(len(batch["event_ids"]) for batch in batches) == [1, 2, 2]
+        assert {batch["user_id"] for batch in batches} == {str(test_user.id), str(second_user.id)}
+
+        assert asyncio.run(pipeline.fan_out_global_events([test_user, second_user], global_events)) == 0
+
+    listing_keys = [event.listing_key for event in global_events]
+    session.expire_all()
+    rows = session.exec(select(MarketEvent).where(MarketEvent.entity_id.in_(listing_keys))).all()
+    assert len(rows) == 6
+    assert {(row.user_id, row.entity_id) for row in rows} == {
+        (user.id, key) for user in (test_user, second_user) for key in listing_keys
+    }
+    fanned_out = [row for row in rows if row.user_id == second_user.id]
+    assert all(row.status == "unprocessed" and row.payload["ListingKey"] == row.entity_id for row in fanned_out)
+    dispatched_ids = {event_id for batch in batches for event_id in batch["event_ids"]}
+    assert dispatched_ids == {str(row.id) for row in rows if row.payload}
+    user_by_event = {str(row.id): str(row.user_id) for row in rows}
+    assert all(user_by_event[event_id] == batch["user_id"] for batch in batches for event_id in batch["event_ids"])
@@ -4,9 +4,12 @@
 # This file tests scheduled message functionality including bulk message creation,
 # timezone handling, message scheduling, and Celery task integration. It validates
 # the scheduled messaging system that allows users to send messages at specific
-# times with proper timezone conversion and bulk operations.
+# times with proper timezone conversion and bulk operations. It also covers the
+# scheduler tick that claims due messages and queues them as send batches,
+# including re-claiming messages whose task was lost, and the batch send task,
+# which skips a message cancelled after its batch was queued.
 # 
-# When was it updated: 2025-01-27
+# When was it updated: 2026-10-16
 # --- CORRECTED VERSION ---
 
 import pytest
@@ -15,10 +18,12 @@ from unittest.mock import patch, MagicMock
 import uuid
 from datetime import datetime, timedelta, timezone
 import pytz
-from sqlmodel import Session
+from sqlmodel import Session, select
 
 from data.models.user import User
 from data.models.client import Client
+from data.models.message import ScheduledMessage, MessageStatus
+from integrations.sms_dispatcher import SmsResult
 
 # Fixed IDs for predictability
 USER_ID = uuid.uuid4()
@@ -70,7 +75,11 @@ def test_create_bulk_scheduled_messages_succeeds(
         # --- Assert ---
         assert response.status_code == 202, response.json()
         assert response.json() == {"detail": "Successfully scheduled messages for 3 clients."}
-        assert mock_apply_async.call_count == 3
+        # Rows are stored with their due time; the dispatcher queues sends later.
+        mock_apply_async.assert_not_called()
+        stored = session.exec(select(ScheduledMessage)).all()
+        assert {message.client_id for message in stored} == {CLIENT_A_ID, CLIENT_B_ID, CLIENT_C_ID}
+        assert all(message.status == MessageStatus.PENDING and message.celery_task_id is None for message in stored)
 
 @patch('api.rest.scheduled_messages.celery_app')
 def test_create_single_scheduled_message_uses_client_timezone(
@@ -107,9 +116,158 @@ def test_create_single_scheduled_message_uses_client_timezone(
 
         # --- Assert ---
         assert response.status_code == 201, response.json()
-        mock_apply_async.assert_called_once()
+        # No ETA task: the scheduler claims the message when it comes due.
+        mock_apply_async.assert_not_called()
 
         # The API uses the payload timezone (America/Chicago), not the client timezone
-        expected_eta = pytz.timezone("America/Chicago").localize(datetime.fromisoformat(local_schedule_time_str)).astimezone(pytz.utc)
-        actual_eta = mock_apply_async.call_args.kwargs['eta']
-        assert actual_eta == expected_eta
\ No newline at end of file
+        expected_due = pytz.timezone("America/Chicago").localize(datetime.fromisoformat(local_schedule_time_str)).astimezone(pytz.utc)
+        stored = session.get(ScheduledMessage, uuid.UUID(response.json()["id"]))
+        assert stored.scheduled_at_utc.replace(tzinfo=timezone.utc) == expected_due
+        assert stored.celery_task_id is None
+
+
+def test_scheduler_tick_claims_the_next_tick_of_due_messages(session: Session, test_user: User, test_client: Client):
+    """
+    Tests that a scheduler tick claims pending messages due before the next tick
+    exactly once, batching them by due time with an ETA only for those not yet
+    due, still sends messages that are long overdue, and leaves later and
+    cancelled messages alone.
+    """
+    import celery_tasks
+
+    now = datetime.now(timezone.utc)
+    def scheduled(offset: timedelta, status: MessageStatus = MessageStatus.PENDING) -> ScheduledMessage:
+        return ScheduledMessage(user_id=test_user.id, client_id=test_client.id, content="Hi", timezone="UTC",
+                                scheduled_at_utc=now + offset, status=status)
+    due, also_due, this_tick, next_hour, cancelled, stale = (
+        scheduled(-timedelta(seconds=30)), scheduled(-timedelta(seconds=5)), scheduled(timedelta(seconds=20)),
+        scheduled(timedelta(hours=1)), scheduled(-timedelta(minutes=1), MessageStatus.CANCELLED), scheduled(-timedelta(days=2)),
+    )
+    session.add_all([due, also_due, this_tick, next_hour, cancelled, stale])
+    session.commit()
+
+    with patch('celery_tasks.engine', session.get_bind()), \
+         patch('celery_tasks.send_scheduled_messages_batch_task.apply_async') as mock_apply_async:
+        result = celery_tasks.dispatch_due_scheduled_messages_task()
+        second = celery_tasks.dispatch_due_scheduled_messages_task()
+
+    assert result == {"status": "success", "dispatched": 4, "batches": 2}
+    assert second["dispatched"] == 0
+    session.expire_all()
+    batches = {tuple(call.args[0][0]): call.kwargs for call in mock_apply_async.call_args_list}
+    assert set(batches) == {(str(stale.id), str(due.id), str(also_due.id)), (str(this_tick.id),)}
+    assert batches[(str(stale.id), str(due.id), str(also_due.id))]["eta"] is None
+    assert batches[(str(this_tick.id),)]["eta"] >= this_tick.scheduled_at_utc.replace(tzinfo=timezone.utc)
+    for message_ids, kwargs in batches.items():
+        assert {session.get(ScheduledMessage, uuid.UUID(message_id)).celery_task_id for message_id in message_ids} == {kwargs["task_id"]}
+    assert session.get(ScheduledMessage, next_hour.id).celery_task_id is None
+    assert session.get(ScheduledMessage, stale.id).status == MessageStatus.PENDING
+
+def test_scheduler_reclaims_messages_whose_task_was_lost(session: Session, test_user: User, test_client: Client):
+    """Tests that a claim older than the lease is handed to a new task, and the old task then skips the message."""
+    import celery_tasks
+
+    now = datetime.now(timezone.utc)
+    lost = ScheduledMessage(user_id=test_user.id, client_id=test_client.id, content="Hi", timezone="UTC",
+                            scheduled_at_utc=now - timedelta(minutes=40), status=MessageStatus.PENDING,
+                            celery_task_id="lost-task", claimed_at=now - timedelta(minutes=40))
+    session.add(lost)
+    session.commit()
+
+    with patch('celery_tasks.engine', session.get_bind()), \
+         patch('celery_tasks.send_scheduled_messages_batch_task.apply_async') as mock_apply_async:
+        assert celery_tasks.dispatch_due_scheduled_messages_task()["dispatched"] == 1
+        celery_tasks.send_scheduled_message_task.push_request(id="lost-task")
+        try:
+            skipped = celery_tasks.send_scheduled_message_task.run(str(lost.id))
+        finally:
+            celery_tasks.send_scheduled_message_task.pop_request()
+
+    session.expire_all()
+    assert session.get(ScheduledMessage, lost.id).celery_task_id == mock_apply_async.call_args.kwargs["task_id"]
+    assert skipped == {"status": "skipped", "reason": "claimed_by_another_task"}
+
+def test_batch_task_sends_claimed_messages_in_one_commit(session: Session, test_user: User):
+    """
+    Tests that the batch send task delivers only the messages it holds the claim
+    for, logs sent messages, fails undeliverable ones and updates last_interaction.
+    """
+    import celery_tasks
+    from data.models.message import Message, MessageSource
+
+    test_user.twilio_phone_number = "+15550001111"
+    ada = Client(id=uuid.uuid4(), user_id=test_user.id, full_name="Ada Lovelace", phone="+15550002222")
+    no_phone = Client(id=uuid.uuid4(), user_id=test_user.id, full_name="Alan Turing")
+    now = datetime.now(timezone.utc)
+    def claimed(client: Client, task_id: str = "batch-1") -> ScheduledMessage:
+        return ScheduledMessage(user_id=test_user.id, client_id=client.id, content="Happy birthday [Client Name]!",
+                                timezone="UTC", scheduled_at_utc=now, status=MessageStatus.PENDING,
+                                celery_task_id=task_id, claimed_at=now)
+    to_ada, to_no_phone, other_batch = claimed(ada), claimed(no_phone), claimed(ada, "batch-2")
+    session.add_all([test_user, ada, no_phone, to_ada, to_no_phone, other_batch])
+    session.commit()
+
+    send = MagicMock(return_value=True)
+    async def fake_dispatch(from_number, jobs):
+        return [SmsResult(job.client_id, job.to_number, job.body, send(from_number, job.to_number, job.body)) for job in jobs]
+
+    with patch('celery_tasks.engine', session.get_bind()), \
+         patch('celery_tasks.sms_dispatcher.dispatch', side_effect=fake_dispatch):
+        celery_tasks.send_scheduled_messages_batch_task.push_request(id="batch-1")
+        try:
+            result = celery_tasks.send_scheduled_messages_batch_task.run([str(to_ada.id), str(to_no_phone.id), str(other_batch.id)])
+        finally:
+            celery_tasks.send_scheduled_messages_batch_task.pop_request()
+
+    assert result == {"status": "success", "sent": 1, "failed": 1}
+    send.assert_called_once_with("+15550001111", "+15550002222", "Happy birthday Ada!")
+    session.expire_all()
+    assert session.get(ScheduledMessage, to_ada.id).status == MessageStatus.SENT
+    assert session.get(ScheduledMessage, to_no_phone.id).status == MessageStatus.FAILED
+    assert session.get(ScheduledMessage, other_batch.id).status == MessageStatus.PENDING
+    [log] = session.exec(select(Message)).all()
+    assert (log.client_id, log.source, log.content) == (ada.id, MessageSource.SCHEDULED, "Happy birthday Ada!")
+    assert session.get(Client, ada.id).last_interaction is not None
+
+def test_cancelling_one_message_leaves_the_rest_of_its_batch(authenticated_client: TestClient, session: Session, test_user: User):
+    """
+    Tests that cancelling a message claimed by a batch task does not revoke the
+    shared task: the task skips the cancelled message and sends the other one.
+    """
+    import celery_tasks
+
+    test_user.twilio_phone_number = "+15550001111"
+    ada = Client(id=uuid.uuid4(), user_id=test_user.id, full_name="Ada Lovelace", phone="+15550002222")
+    grace = Client(id=uuid.uuid4(), user_id=test_user.id, full_name="Grace Hopper", phone="+15550003333")
+    now = datetime.now(timezone.utc)
+    to_ada, to_grace = (
+        ScheduledMessage(user_id=test_user.id, client_id=client.id, content="Happy holidays [Client Name]!",
+                         timezone="UTC", scheduled_at_utc=now, status=MessageStatus.PENDING,
+                         celery_task_id="batch-1", claimed_at=now)
+        for client in (ada, grace)
+    )
+    session.add_all([test_user, ada, grace, to_ada, to_grace])
+    session.commit()
+
+    with patch('api.rest.scheduled_messages.celery_app') as mock_celery:
+        response = authenticated_client.delete(f"/api/scheduled-messages/{to_grace.id}")
+    assert response.status_code == 204
+    mock_celery.control.revoke.assert_not_called()
+
+    send = MagicMock(return_value=True)
+    async def fake_dispatch(from_number, jobs):
+        return [SmsResult(job.client_id, job.to_number, job.body, send(from_number, job.to_number, job.body)) for job in jobs]
+
+    with patch('celery_tasks.engine', session.get_bind()), \
+         patch('celery_tasks.sms_dispatcher.dispatch', side_effect=fake_dispatch):
+        celery_tasks.send_scheduled_messages_batch_task.push_request(id="batch-1")
+        try:
+            result = celery_tasks.send_scheduled_messages_batch_task.run([str(to_ada.id), str(to_grace.id)])
+        finally:
+            celery_tasks.send_scheduled_messages_batch_task.pop_request()
+
+    assert result == {"status": "success", "sent": 1, "failed": 0}
+    send.assert_called_once_with("+15550001111", "+15550002222", "Happy holidays Ada!")
+    session.expire_all()
+    assert session.get(ScheduledMessage, to_ada.id).status == MessageStatus.SENT
+    assert session.get(ScheduledMessage, to_grace.id).status == MessageStatus.CANCELLED
@@ -4,9 +4,12 @@
 # This file tests the semantic service functionality including vector index initialization,
 # client embedding updates, semantic search, and similar client finding. It validates
 # the AI-powered semantic matching system that uses vector embeddings to find
-# similar clients and enable intelligent content recommendations.
+# similar clients and enable intelligent content recommendations. It also covers the
+# per-user index shards and how they load from snapshots and catch up with writes,
+# that concurrent embedding calls are coalesced into batched provider requests, and
+# that the two-tier embedding cache serves repeated text without calling the provider.
 # 
-# When was it updated: 2025-01-27
+# When was it updated: 2026-10-16
 
 import pytest
 import uuid
@@ -47,35 +50,18 @@ class TestSemanticService:
 
     @pytest.mark.asyncio
     @patch('agent_core.semantic_service.crm_service')
-    @patch('agent_core.semantic_service.generate_embedding')
-    async def test_initialize_vector_index_success(self, mock_generate_embedding, mock_crm_service):
-        """Test successful vector index initialization"""
+    async def test_initialize_vector_index_is_lazy(self, mock_crm_service):
+        """Test that startup drops loaded shards without scanning any clients"""
         # Setup
-        mock_clients = [
-            Client(id=uuid.uuid4(), notes_embedding=[0.1] * 1536),
-            Client(id=uuid.uuid4(), notes_embedding=[0.2] * 1536),
-        ]
-        mock_crm_service._get_all_clients_for_system_indexing.return_value = mock_clients
+        semantic_service._loaded_shards[uuid.uuid4()] = semantic_service.ClientVectorIndex()
 
         # Execute
         await semantic_service.initialize_vector_index()
 
         # Assert
-        mock_crm_service._get_all_clients_for_system_indexing.assert_called_once()
-        assert semantic_service.faiss_index.ntotal == 2
-
-    @pytest.mark.asyncio
-    @patch('agent_core.semantic_service.crm_service')
-    async def test_initialize_vector_index_empty(self, mock_crm_service):
-        """Test vector index initialization with no clients"""
-        # Setup
-        mock_crm_service._get_all_clients_for_system_indexing.return_value = []
-
-        # Execute
-        await semantic_service.initialize_vector_index()
-
-        # Assert
-        assert semantic_service.faiss_index.ntotal == 0
+        assert len(semantic_service._loaded_shards) == 0
+        mock_crm_service._get_all_clients_for_system_indexing.assert_not_called()
+        mock_crm_service.get_client_embeddings.assert_not_called()
 
     @pytest.mark.asyncio
     @patch('agent_core.semantic_service.crm_service')
@@ -83,29 +69,47 @@ class TestSemanticService:
     async def test_find_similar_clients_success(self, mock_generate_embedding, mock_crm_service):
         """Test finding similar clients"""
         # Setup
+        await semantic_service.initialize_vector_index()
         user_id = uuid.uuid4()
         client_ids = [uuid.uuid4(), uuid.uuid4()]
-        mock_clients = [
-            Client(id=client_ids[0], user_id=user_id),
-            Client(id=client_ids[1], user_id=user_id),
+        mock_crm_service.get_client_embeddings.return_value = [
+            (client_ids[0], [0.1] * 1536),
+            (client_ids[1], [0.2] * 1536),
         ]
         
-        # Mock the index to have some data
-        semantic_service.faiss_index.add_with_ids(
-            np.array([[0.1] * 1536, [0.2] * 1536]).astype('float32'),
-            np.array([0, 1])
-        )
-        semantic_service.index_to_client_id_map = client_ids
-        
         mock_generate_embedding.return_value = [0.15] * 1536
-        mock_crm_service.get_all_clients.return_value = mock_clients
 
         # Execute
         result = await semantic_service.find_similar_clients("test query", user_id)
 
         # Assert
         assert isinstance(result, list)
+        assert set(result) == set(client_ids)
         mock_generate_embedding.assert_called_once_with("test query")
+        mock_crm_service.get_client_embeddings.assert_called_once_with(user_id)
+        mock_crm_service.get_all_clients.assert_not_called()
+
+    @pytest.mark.asyncio
+    @patch('agent_core.semantic_service.crm_service')
+    @patch('agent_core.semantic_service.generate_embedding')
+    async def test_find_similar_clients_only_searches_own_shard(self, mock_generate_embedding, mock_crm_service):
+        """Test that another tenant's closer matches cannot crowd out the caller's top-k"""
+        # Setup
+        await semantic_service.initialize_vector_index()
+        small_user, big_user = uuid.uuid4(), uuid.uuid4()
+        small_ids = [uuid.uuid4(), uuid.uuid4()]
+        big_rows = [(uuid.uuid4(), [0.15] * 1536) for _ in range(20)]
+        small_rows = [(small_ids[0], [0.1] * 1536), (small_ids[1], [0.1] * 768 + [0.2] * 768)]
+        mock_crm_service.get_client_embeddings.side_effect = lambda user_id: small_rows if user_id == small_user else big_rows
+        mock_generate_embedding.return_value = [0.15] * 1536
+
+        # Execute
+        big_result = await semantic_service.find_similar_clients("test query", big_user, top_k=2)
+        small_result = await semantic_service.find_similar_clients("test query", small_user, top_k=2)
+
+        # Assert
+        assert len(big_result) == 2
+        assert set(small_result) == set(small_ids)
 
     @pytest.mark.asyncio
     @patch('agent_core.semantic_service.crm_service')
@@ -113,8 +117,8 @@ class TestSemanticService:
     async def test_find_similar_clients_empty_index(self, mock_generate_embedding, mock_crm_service):
         """Test finding similar clients with empty index"""
         # Setup
-        semantic_service.faiss_index.reset()
-        semantic_service.index_to_client_id_map = []
+        await semantic_service.initialize_vector_index()
+        mock_crm_service.get_client_embeddings.return_value = []
 
         # Execute
         result = await semantic_service.find_similar_clients("test query", uuid.uuid4())
@@ -123,6 +127,25 @@ class TestSemanticService:
         assert result == []
         mock_generate_embedding.assert_not_called()
 
+    @patch('agent_core.semantic_service.crm_service')
+    def test_least_recently_used_shard_is_evicted(self, mock_crm_service):
+        """Test that only MAX_LOADED_SHARDS shards stay loaded"""
+        # Setup
+        semantic_service._loaded_shards.clear()
+        mock_crm_service.get_client_embeddings.return_value = []
+        first, second, third = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+
+        # Execute
+        with patch('agent_core.semantic_service.MAX_LOADED_SHARDS', 2):
+            semantic_service._get_shard(first)
+            semantic_service._get_shard(second)
+            semantic_service._get_shard(first)
+            semantic_service._get_shard(third)
+
+        # Assert
+        assert list(semantic_service._loaded_shards) == [first, third]
+        semantic_service._loaded_shards.clear()
+
     @pytest.mark.asyncio
     @patch('agent_core.semantic_service.crm_service')
     @patch('agent_core.semantic_service.generate_embedding')
@@ -201,4 +224,138 @@ class TestSemanticService:
         # Assert
         mock_crm_service.get_recent_messages.assert_called_once()
         mock_generate_embedding.assert_called_once()
-        assert mock_client.notes_embedding == [0.1] * 1536 
\ No newline at end of file
+        assert mock_client.notes_embedding == [0.1] * 1536 
+
+class TestSemanticServiceShards:
+    """Test suite for loading per-user shards from snapshots"""
+
+    @patch('agent_core.semantic_service.crm_service')
+    def test_shard_loads_snapshot_and_catches_up(self, mock_crm_service, tmp_path):
+        """A shard mmaps its snapshot, applies newer writes and drops deleted clients"""
+        user_id = uuid.uuid4()
+        kept, deleted, updated = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+        index = semantic_service.ClientVectorIndex(semantic_service.DIMENSION)
+        index.add([kept, deleted], np.random.rand(2, semantic_service.DIMENSION))
+        index.watermark = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        index.save(str(tmp_path / str(user_id)))
+
+        mock_crm_service.get_client_embeddings_updated_since.return_value = [
+            (updated, [0.3] * 1536, datetime(2026, 2, 1))
+        ]
+        mock_crm_service.get_embedded_client_ids.return_value = [kept, updated]
+        semantic_service._loaded_shards.clear()
+
+        with patch('agent_core.semantic_service.get_settings') as mock_settings:
+            mock_settings.return_value.VECTOR_INDEX_DIR = str(tmp_path)
+            shard = semantic_service._get_shard(user_id)
+
+        mock_crm_service.get_client_embeddings.assert_not_called()
+        assert mock_crm_service.get_client_embeddings_updated_since.call_args.args[0] == user_id
+        assert shard.ntotal == 2
+        assert shard.tombstones == {semantic_service._to_index_id(deleted)}
+        assert shard.watermark == datetime(2026, 2, 1, tzinfo=timezone.utc)
+        semantic_service._loaded_shards.clear()
+
+
+@pytest.fixture
+def fresh_embedding_cache():
+    """An empty embedding cache whose persistent tier is a mock"""
+    from agent_core import embedding_cache
+    with patch.object(embedding_cache, '_cache', embedding_cache.EmbeddingCache()), \
+            patch('agent_core.embedding_cache.crm_service') as mock_crm_service:
+        mock_crm_service.get_cached_embeddings.return_value = {}
+        yield mock_crm_service
+
+
+class TestEmbeddingBatching:
+    """Concurrent generate_embedding calls share batched provider requests"""
+
+    @pytest.mark.asyncio
+    @patch('agent_core.llm_client.get_settings')
+    @patch('agent_core.llm_client._generate_embeddings_for_provider', new_callable=AsyncMock)
+    async def test_concurrent_calls_are_coalesced(self, mock_provider, mock_get_settings, fresh_embedding_cache):
+        """Gathered calls become one request per batch cap; duplicate texts share one input"""
+        from agent_core import llm_client
+        mock_get_settings.return_value = MagicMock(LLM_PROVIDER="openai")
+        mock_provider.side_effect = lambda texts: [[float(len(text))] for text in texts]
+
+        with patch.object(llm_client, 'EMBEDDING_BATCH_MAX_INPUTS', 3):
+            embeddings = await llm_client.generate_embeddings(["a", "bb", "a", "ccc", "dddd"])
+
+        assert embeddings == [[1.0], [2.0], [1.0], [3.0], [4.0]]
+        assert [call.args[0] for call in mock_provider.await_args_list] == [["a", "bb", "ccc"], ["dddd"]]
+        # Coalesced callers get their own copy of the shared result.
+        assert embeddings[0] is not embeddings[2]
+
+    @pytest.mark.asyncio
+    @patch('agent_core.llm_client.get_settings')
+    @patch('agent_core.llm_client._generate_embeddings_for_provider', new_callable=AsyncMock)
+    async def test_failed_batch_returns_zero_vectors(self, mock_provider, mock_get_settings, fresh_embedding_cache):
+        """A provider failure resolves every waiting caller with the usual zero vector"""
+        from agent_core import llm_client
+        mock_get_settings.return_value = MagicMock(LLM_PROVIDER="openai")
+        mock_provider.side_effect = RuntimeError("provider down")
+
+        embeddings = await llm_client.generate_embeddings(["one", "two"])
+
+        assert embeddings == [[0.0] * llm_client.EMBEDDING_DIMENSION] * 2
+        mock_provider.assert_awaited_once()
+        fresh_embedding_cache.save_cached_embeddings.assert_not_called()
+
+
+class TestEmbeddingCache:
+    """Identical text is embedded once, across callers and processes"""
+
+    @pytest.mark.asyncio
+    @patch('agent_core.llm_client.get_settings')
+    @patch('agent_core.llm_client._generate_embeddings_for_provider', new_callable=AsyncMock)
+    async def test_repeated_text_is_served_from_cache(self, mock_provider, mock_get_settings, fresh_embedding_cache):
+        """A miss embeds and stores; a repeat hits memory; text stored by another process hits the table"""
+        from agent_core import llm_client, embedding_cache
+        mock_get_settings.return_value = MagicMock(LLM_PROVIDER="openai")
+        mock_provider.side_effect = lambda texts: [[0.5, 0.25] for _ in texts]
+        stored_key = embedding_cache.cache_key(llm_client._embedding_model(), "stored elsewhere")
+        fresh_embedding_cache.get_cached_embeddings.side_effect = (
+            lambda keys: {key: np.array([1.0, 0.0], dtype=np.float32) for key in keys if key == stored_key}
+        )
+
+        assert await llm_client.generate_embedding("corner lot") == [0.5, 0.25]
+        assert await llm_client.generate_embedding("corner lot") == [0.5, 0.25]
+        assert await llm_client.generate_embedding("stored elsewhere") == [1.0, 0.0]
+
+        assert [call.args[0] for call in mock_provider.await_args_list] == [["corner lot"]]
+        saved = fresh_embedding_cache.save_cached_embeddings.call_args.args[0]
+        assert [entry["content_hash"] for entry in saved] == [embedding_cache.cache_key(llm_client._embedding_model(), "corner lot")]
+        assert embedding_cache.get_cache().stats()["memory_hits"] == 1
+        assert embedding_cache.get_cache().stats()["persistent_hits"] == 1
+        assert embedding_cache.get_cache().stats()["misses"] == 1
+
+    @pytest.mark.asyncio
+    async def test_memory_tier_evicts_least_recently_used_by_size(self, fresh_embedding_cache):
+        """The memory tier stays within its byte budget, evicting the least recently used first"""
+        from agent_core import embedding_cache
+        cache = embedding_cache.EmbeddingCache(max_bytes=2 * 4 * 4)  # two 4-d float32 vectors
+        await cache.put_many("model", {"a": [1.0] * 4, "b": [2.0] * 4})
+        assert cache.get("a") == [1.0] * 4
+        await cache.put_many("model", {"c": [3.0] * 4, "zero": [0.0] * 4})
+
+        assert cache.get("b") is None
+        assert cache.get("a") == [1.0] * 4 and cache.get("c") == [3.0] * 4
+        assert cache.get("zero") is None
+        assert cache.stats()["bytes"] == 2 * 4 * 4
+
+    @pytest.mark.asyncio
+    async def test_persistent_tier_runs_off_the_event_loop(self, fresh_embedding_cache):
+        """Table reads and writes run on a worker thread, not the event loop's thread"""
+        import threading
+        from agent_core import embedding_cache
+        loop_thread = threading.get_ident()
+        db_threads = []
+        fresh_embedding_cache.get_cached_embeddings.side_effect = lambda keys: db_threads.append(threading.get_ident()) or {}
+        fresh_embedding_cache.save_cached_embeddings.side_effect = lambda entries: db_threads.append(threading.get_ident())
+        cache = embedding_cache.EmbeddingCache()
+
+        assert await cache.get_many(["a"]) == {}
+        await cache.put_many("model", {"a": [1.0] * 4})
+
+        assert len(db_threads) == 2 and loop_thread not in db_threads
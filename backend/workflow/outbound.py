@@ -1,82 +1,109 @@
 """
 File Path: backend/workflow/outbound.py
 FINAL VERSION: Adds robust logging, error handling, and session management.
+Recipients are loaded in one query and sent through integrations.sms_dispatcher,
+so a large campaign neither blocks the event loop nor exceeds the sending
+number's throughput; results are recorded in one transaction afterwards.
 """
 import uuid
 import logging
+from datetime import datetime, timezone
 from sqlmodel import Session
 from data.database import engine
 from data import crm as crm_service
-from integrations import twilio_outgoing
+from data.models.message import Message, MessageDirection, MessageStatus, MessageSource, MessageSenderType
+from integrations import sms_dispatcher
 
 # Get a logger instance for this module
 logger = logging.getLogger(__name__)
 
+def _audience_client_ids(audience) -> list:
+    """The distinct, well-formed client ids of a matched_audience, in audience order."""
+    client_ids = {}
+    for recipient in audience:
+        try:
+            client_ids[uuid.UUID(str(recipient.get("client_id")))] = None
+        except (TypeError, ValueError, AttributeError):
+            continue
+    return list(client_ids)
+
 async def send_campaign_to_audience(campaign_id: uuid.UUID, user_id: uuid.UUID):
     """
-    Fetches a campaign, personalizes the message for each recipient,
-    sends it via Twilio, and updates the interaction timestamp within a
-    single, safe transaction.
+    Fetches a campaign, personalizes the message for each recipient, sends the
+    messages concurrently via Twilio, then logs the delivered messages and updates
+    the interaction timestamps of the clients reached within a single transaction.
+    Failed sends are not logged as messages, so the inbox only shows texts the
+    client received; they are reported in the returned result instead.
     """
     logger.info(f"OUTBOUND WORKFLOW: Starting send for campaign_id: {campaign_id} for user_id: {user_id}")
-    
-    # Use a single, consistent session for the entire task
+
+    # No session is held open while messages are in flight.
     with Session(engine) as session:
-        try:
-            campaign = crm_service.get_campaign_briefing_by_id(campaign_id, user_id=user_id, session=session)
-            if not campaign:
-                logger.error(f"OUTBOUND WORKFLOW ERROR: Campaign {campaign_id} not found for user {user_id}.")
-                return
+        campaign = crm_service.get_campaign_briefing_by_id(campaign_id, user_id=user_id, session=session)
+        if not campaign:
+            logger.error(f"OUTBOUND WORKFLOW ERROR: Campaign {campaign_id} not found for user {user_id}.")
+            return
+
+        final_draft = campaign.edited_draft if campaign.edited_draft else campaign.original_draft
+        if not final_draft or not final_draft.strip():
+            logger.error(f"OUTBOUND WORKFLOW ERROR: Campaign {campaign_id} has no message content.")
+            return
+
+        audience = campaign.matched_audience
+        if not audience:
+            logger.error(f"OUTBOUND WORKFLOW ERROR: Campaign {campaign_id} has no audience.")
+            return
 
-            final_draft = campaign.edited_draft if campaign.edited_draft else campaign.original_draft
-            if not final_draft or not final_draft.strip():
-                logger.error(f"OUTBOUND WORKFLOW ERROR: Campaign {campaign_id} has no message content.")
-                return
+        user = crm_service.get_user_by_id(user_id, session=session)
+        if not user or not user.twilio_phone_number:
+            logger.error(f"OUTBOUND WORKFLOW ERROR: User {user_id} has no Twilio number configured. Cannot send campaign.")
+            return
+        from_number = user.twilio_phone_number
 
-            audience = campaign.matched_audience
-            if not audience:
-                logger.error(f"OUTBOUND WORKFLOW ERROR: Campaign {campaign_id} has no audience.")
-                return
-            
-            user = crm_service.get_user_by_id(user_id, session=session)
-            if not user or not user.twilio_phone_number:
-                logger.error(f"OUTBOUND WORKFLOW ERROR: User {user_id} has no Twilio number configured. Cannot send campaign.")
-                return
+        client_ids = _audience_client_ids(audience)
+        clients = {client.id: client for client in crm_service.get_clients_by_ids(client_ids, user_id=user_id, session=session)}
 
-            success_count = 0
-            failure_count = 0
-            for recipient in audience:
-                client_id_str = recipient.get("client_id")
-                if not client_id_str:
-                    continue
+        jobs = []
+        failed_client_ids = []
+        for client_id in client_ids:
+            client = clients.get(client_id)
+            if not client or not client.phone:
+                logger.warning(f"OUTBOUND WORKFLOW: Client {client_id} not found or has no phone. Skipping.")
+                failed_client_ids.append(client_id)
+                continue
 
-                client = crm_service.get_client_by_id(uuid.UUID(client_id_str), user_id=user_id, session=session)
-                if not client or not client.phone:
-                    logger.warning(f"OUTBOUND WORKFLOW: Client {client_id_str} not found or has no phone. Skipping.")
-                    failure_count += 1
-                    continue
-                
-                # Personalize the message with the client's first name
-                first_name = client.full_name.split(" ")[0] if client.full_name else "there"
-                personalized_message = final_draft.replace("[Client Name]", first_name)
-                
-                was_sent = twilio_outgoing.send_sms(
-                    from_number=user.twilio_phone_number,
-                    to_number=client.phone, 
-                    body=personalized_message
+            # Personalize the message with the client's first name
+            first_name = client.full_name.split(" ")[0] if client.full_name else "there"
+            jobs.append(sms_dispatcher.SmsJob(client.id, client.phone, final_draft.replace("[Client Name]", first_name)))
+
+    results = await sms_dispatcher.dispatch(from_number, jobs)
+    sent_results = [result for result in results if result.sent]
+    sent_client_ids = [result.client_id for result in sent_results]
+    failed_client_ids += [result.client_id for result in results if not result.sent]
+
+    with Session(engine) as session:
+        try:
+            now = datetime.now(timezone.utc)
+            crm_service.save_messages([
+                Message(
+                    user_id=user_id,
+                    client_id=result.client_id,
+                    content=result.body,
+                    direction=MessageDirection.OUTBOUND,
+                    status=MessageStatus.SENT,
+                    source=MessageSource.MANUAL,
+                    sender_type=MessageSenderType.USER,
+                    created_at=now,
                 )
-                
-                if was_sent:
-                    crm_service.update_last_interaction(client.id, user_id=user_id, session=session)
-                    success_count += 1
-                else:
-                    failure_count += 1
-            
-            # Commit all last_interaction updates at the end
+                for result in sent_results
+            ], session)
+            crm_service.update_last_interaction_for_clients(sent_client_ids, user_id=user_id, session=session)
             session.commit()
-            
-            logger.info(f"OUTBOUND WORKFLOW: Campaign send complete for {campaign_id}. Success: {success_count}, Failed: {failure_count}.")
-
         except Exception as e:
-            logger.error(f"OUTBOUND WORKFLOW: A critical error occurred while sending campaign {campaign_id}. Error: {e}", exc_info=True)
-            session.rollback()
\ No newline at end of file
+            logger.error(f"OUTBOUND WORKFLOW: Failed to record results for campaign {campaign_id}. Error: {e}", exc_info=True)
+            session.rollback()
+
+    if failed_client_ids:
+        logger.warning(f"OUTBOUND WORKFLOW: Campaign {campaign_id} was not delivered to clients {[str(client_id) for client_id in failed_client_ids]}.")
+    logger.info(f"OUTBOUND WORKFLOW: Campaign send complete for {campaign_id}. Success: {len(sent_client_ids)}, Failed: {len(failed_client_ids)}.")
+    return {"sent": len(sent_client_ids), "failed": len(failed_client_ids), "failed_client_ids": failed_client_ids}
@@ -7,67 +7,79 @@ from datetime import datetime
 from sqlmodel import Session, select
 from sqlalchemy.exc import IntegrityError
 from uuid import uuid4
+from celery import group
 
 from data import crm as crm_service
 from agent_core.brain import nudge_engine
 from integrations.mls.factory import get_mls_client
 from data.models.user import User
-from data.models.event import MarketEvent, GlobalMlsEvent
+from data.models.event import GlobalMlsEvent
 from data.database import engine
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
 
-async def process_global_events_for_user(user: User, global_events: list[GlobalMlsEvent]):
+# MarketEvents scored per score_events_batch_task, and batch tasks sent per Celery group.
+SCORING_BATCH_SIZE = 200
+SCORING_GROUP_SIZE = 100
+
+
+def dispatch_scoring_tasks(inserted: list[tuple]) -> None:
     """
-    MODIFIED: Processes a batch of global events for a single user by creating
-    user-specific MarketEvents and dispatching a Celery task for scoring.
+    Enqueues score_events_batch_task for newly created (market_event_id, user_id)
+    pairs: each user's events go out in batches of SCORING_BATCH_SIZE so the
+    task loads that user's clients once per batch, SCORING_GROUP_SIZE tasks per
+    group send.
     """
-    # --- ADDED: Import the new Celery task ---
-    from celery_tasks import score_event_for_best_match_task
-    from uuid import uuid4
+    from celery_tasks import score_events_batch_task
+
+    event_ids_by_user: dict = {}
+    for market_event_id, user_id in inserted:
+        event_ids_by_user.setdefault(user_id, []).append(str(market_event_id))
+
+    signatures = [
+        score_events_batch_task.s(user_id=str(user_id), event_ids=event_ids[start:start + SCORING_BATCH_SIZE])
+        for user_id, event_ids in event_ids_by_user.items()
+        for start in range(0, len(event_ids), SCORING_BATCH_SIZE)
+    ]
+    for start in range(0, len(signatures), SCORING_GROUP_SIZE):
+        group(signatures[start:start + SCORING_GROUP_SIZE]).apply_async()
+    logger.info(f"PIPELINE: Dispatched {len(signatures)} scoring tasks for {len(inserted)} MarketEvents across {len(event_ids_by_user)} users.")
 
-    logger.info(f"PIPELINE: Processing {len(global_events)} global events for user {user.id}...")
-    
-    for detached_event in global_events:
-        try:
-            with Session(engine) as db_session:
-                global_event = db_session.merge(detached_event)
-                
-                # Check for existing MarketEvent to ensure idempotency
-                existing_market_event = db_session.exec(
-                    select(MarketEvent).where(
-                        MarketEvent.user_id == user.id,
-                        MarketEvent.entity_id == global_event.listing_key
-                    )
-                ).first()
-                if existing_market_event:
-                    logger.warning(f"PIPELINE: MarketEvent for entity {global_event.listing_key} and user {user.id} already exists. Skipping.")
-                    continue
-
-                market_event_record = MarketEvent(
-                    id=uuid4(),
-                    user_id=user.id,
-                    event_type="new_listing",
-                    entity_id=global_event.listing_key,
-                    entity_type="property",
-                    payload=global_event.raw_payload,
-                    market_area="default",
-                    status="unprocessed" # Mark as unprocessed until the task runs
-                )
-                db_session.add(market_event_record)
-                db_session.commit()
-                db_session.refresh(market_event_record)
 
-                # --- THIS IS THE KEY CHANGE ---
-                # Dispatch a Celery task to handle scoring asynchronously
-                score_event_for_best_match_task.delay(market_event_id=str(market_event_record.id))
-                
-                logger.info(f"PIPELINE: Dispatched scoring task for event {market_event_record.id} (Listing: {global_event.listing_key}) for user {user.id}.")
+async def fan_out_global_events(users: list[User], global_events: list[GlobalMlsEvent]) -> int:
+    """
+    Creates the user-specific MarketEvents for a batch of global events in one
+    transaction (existing (user, listing) pairs are skipped) and dispatches
+    per-user batch scoring tasks for the new ones. Returns the number of
+    MarketEvents created.
+    """
+    if not users or not global_events:
+        return 0
 
-        except Exception as e:
-            logger.error(f"PIPELINE: Failed to create MarketEvent or dispatch task for {detached_event.listing_key}. Error: {e}", exc_info=True)
+    logger.info(f"PIPELINE: Fanning {len(global_events)} global events out to {len(users)} users...")
+    try:
+        with Session(engine) as db_session:
+            inserted = crm_service.create_market_events_for_global_events(
+                [user.id for user in users], global_events, db_session
+            )
+            db_session.commit()
+    except Exception as e:
+        logger.error(f"PIPELINE: Failed to create MarketEvents for {len(users)} users. Error: {e}", exc_info=True)
+        return 0
+
+    dispatch_scoring_tasks(inserted)
+    return len(inserted)
+
+
+async def process_global_events_for_user(user: User, global_events: list[GlobalMlsEvent]):
+    """
+    Processes a batch of global events for a single user by creating
+    user-specific MarketEvents and dispatching a Celery task for scoring.
+    """
+    created = await fan_out_global_events([user], global_events)
+    logger.info(f"PIPELINE: Created {created} MarketEvents from {len(global_events)} global events for user {user.id}.")
 
 
 async def run_main_opportunity_pipeline(minutes_ago: int | None = None):
@@ -159,7 +171,6 @@ async def run_main_opportunity_pipeline(minutes_ago: int | None = None):
 
     logger.info(f"PIPELINE: Found {len(realtor_users)} active users to process {len(newly_added_events)} events for.")
     
-    for user in realtor_users:
-        await process_global_events_for_user(user, newly_added_events)
+    await fan_out_global_events(realtor_users, newly_added_events)
 
     logger.info("PIPELINE: Main opportunity pipeline run finished.")
\ No newline at end of file